@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Agrupación de secuencias en lotes por longitud para la inferencia.
+
+Ordenar por longitud y formar lotes contiguos minimiza el relleno (padding);
+el presupuesto de tokens limita el tamaño de los lotes con secuencias largas.
+"""
+
+import numpy as np
+
+
+def length_bucketed_batches(lengths, batch_size=32, max_tokens=None):
+    """Lista de arrays de índices (en el orden original) agrupados por longitud.
+
+    Cada lote tiene como máximo batch_size secuencias y, si se indica
+    max_tokens, batch_size * longitud_máxima_del_lote <= max_tokens.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    order = np.argsort(lengths, kind='stable')
+    batches = []
+    current = []
+    longest = 0
+    for i in order:
+        length = max(int(lengths[i]), 1)
+        candidate = max(longest, length)
+        too_many = len(current) >= batch_size
+        too_long = max_tokens is not None and current and candidate * (len(current) + 1) > max_tokens
+        if current and (too_many or too_long):
+            batches.append(np.array(current, dtype=np.int64))
+            current, candidate = [], length
+        current.append(i)
+        longest = candidate
+    if current:
+        batches.append(np.array(current, dtype=np.int64))
+    return batches
+
+
+def padding_ratio(lengths, batches):
+    """Fracción de posiciones de relleno que producen los lotes."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    padded = sum(len(b) * lengths[b].max() for b in batches if len(b))
+    return 1 - lengths.sum() / padded if padded else 0.0
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""Etiquetado de indicadores de contexto (sarcasmo, retórica, énfasis, ...).
+
+Todas las expresiones de todos los léxicos se compilan en un solo autómata de
+Aho-Corasick, de modo que un texto se recorre una vez sin importar cuántos
+indicadores haya. Una coincidencia solo cuenta si respeta los límites de
+palabra ('right' no coincide dentro de 'copyright'). Las oraciones de un
+corpus se etiquetan juntas: se unen con saltos de línea, se recorren en una
+sola pasada y cada coincidencia se asigna a su oración con searchsorted.
+
+Los léxicos adicionales se cargan de archivos de texto: una expresión por
+línea (las líneas vacías y las que empiezan con '#' se ignoran); la categoría
+es el nombre del archivo sin extensión.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_LEXICONS = {
+    'sarcasm': ['really', 'obviously', 'clearly', 'oh sure', 'right'],
+    'rhetoric': ['isn\'t it', 'don\'t you think', 'how about', 'what if'],
+    'emphasis': ['very', 'extremely', 'absolutely', 'totally'],
+}
+
+
+def normalize(text):
+    """Minúsculas y apóstrofos tipográficos como rectos (conserva la longitud)."""
+    return text.lower().replace('’', "'")
+
+
+def _is_word(char):
+    return char.isalnum() or char == '_'
+
+
+def load_lexicon(path):
+    """(categoría, expresiones) de un archivo de léxico."""
+    with open(path, 'r', encoding='utf-8') as f:
+        phrases = [line.strip() for line in f]
+    category = os.path.splitext(os.path.basename(path))[0]
+    return category, [p for p in phrases if p and not p.startswith('#')]
+
+
+def load_lexicons(paths):
+    """Dict categoría -> expresiones de archivos o directorios de léxicos (*.txt)."""
+    lexicons = {}
+    for path in paths:
+        files = ([os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.txt')]
+                 if os.path.isdir(path) else [path])
+        for file_path in files:
+            category, phrases = load_lexicon(file_path)
+            lexicons.setdefault(category, []).extend(phrases)
+    return lexicons
+
+
+class ContextTagger:
+    """Autómata de Aho-Corasick sobre las expresiones de varios léxicos."""
+
+    def __init__(self, lexicons=None):
+        lexicons = DEFAULT_LEXICONS if lexicons is None else lexicons
+        self.categories = list(lexicons)
+        self.patterns = []
+        self.pattern_category = []
+        seen = set()
+        for c, category in enumerate(self.categories):
+            for phrase in lexicons[category]:
+                phrase = normalize(phrase.strip())
+                if phrase and (phrase, c) not in seen:
+                    seen.add((phrase, c))
+                    self.patterns.append(phrase)
+                    self.pattern_category.append(c)
+        self.pattern_category = np.asarray(self.pattern_category, dtype=np.int64)
+        self._build()
+
+    @classmethod
+    def from_files(cls, paths, include_defaults=True):
+        """Etiquetador con los léxicos de archivos (añadidos a los por defecto si include_defaults)."""
+        lexicons = {c: list(p) for c, p in DEFAULT_LEXICONS.items()} if include_defaults else {}
+        for category, phrases in load_lexicons(paths).items():
+            lexicons.setdefault(category, []).extend(phrases)
+        return cls(lexicons)
+
+    def _build(self):
+        # Trie de todas las expresiones
+        goto = [{}]
+        outputs = [[]]
+        for p, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = goto[state][char] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(p)
+
+        # Enlaces de fallo por niveles (BFS); cada estado hereda las salidas de su fallo
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(char, 0) if goto[f].get(char, 0) != nxt else 0
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        self.goto = goto
+        self.fail = fail
+        self.outputs = [tuple(out) for out in outputs]
+        self.lengths = [len(p) for p in self.patterns]
+        # Comprobar el límite de palabra solo en los extremos que son caracteres de palabra
+        self.check_start = [_is_word(p[0]) for p in self.patterns]
+        self.check_end = [_is_word(p[-1]) for p in self.patterns]
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def find(self, text):
+        """[(inicio, fin, id de expresión)] de todas las coincidencias con límites de palabra."""
+        text = normalize(text)
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        lengths, check_start, check_end = self.lengths, self.check_start, self.check_end
+        size = len(text)
+        matches = []
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for p in outputs[state]:
+                start = i + 1 - lengths[p]
+                if check_start[p] and start > 0 and _is_word(text[start - 1]):
+                    continue
+                if check_end[p] and i + 1 < size and _is_word(text[i + 1]):
+                    continue
+                matches.append((start, i + 1, p))
+        return matches
+
+    def matches(self, sentences):
+        """DataFrame con una fila por coincidencia: oración, inicio, fin, categoría e indicador.
+
+        Las posiciones son relativas a cada oración.
+        """
+        sentences = list(sentences)
+        lengths = np.array([len(s) for s in sentences], dtype=np.int64)
+        # Cada oración empieza tras la anterior y un salto de línea (que es límite de palabra)
+        offsets = np.concatenate(([0], np.cumsum(lengths + 1)[:-1])) if len(sentences) else lengths
+        found = self.find('\n'.join(sentences))
+        starts = np.array([m[0] for m in found], dtype=np.int64)
+        ends = np.array([m[1] for m in found], dtype=np.int64)
+        ids = np.array([m[2] for m in found], dtype=np.int64)
+        owner = np.searchsorted(offsets, starts, side='right') - 1
+        return pd.DataFrame({
+            'sentence': owner,
+            'start': starts - offsets[owner],
+            'end': ends - offsets[owner],
+            'category': pd.Categorical.from_codes(self.pattern_category[ids], self.categories),
+            'indicator': [self.patterns[p] for p in ids],
+        })
+
+    def counts(self, sentences, matches=None):
+        """DataFrame (oraciones x categorías) con el número de coincidencias."""
+        sentences = list(sentences)
+        if matches is None:
+            matches = self.matches(sentences)
+        n_categories = len(self.categories)
+        keys = matches['sentence'].to_numpy() * n_categories + matches['category'].cat.codes.to_numpy()
+        table = np.bincount(keys, minlength=len(sentences) * n_categories)
+        return pd.DataFrame(table.reshape(len(sentences), n_categories), columns=self.categories)
+
+    def contexts(self, sentences):
+        """Por oración, las categorías encontradas (en el orden de los léxicos)."""
+        counts = self.counts(sentences).to_numpy()
+        return [[self.categories[c] for c in np.flatnonzero(row)] for row in counts]
+
+
+def tag_corpus(corpus, tagger=None, debates=None, speakers=None):
+    """Coincidencias de todas las oraciones de los turnos de un DebateCorpus, en una pasada.
+
+    Añade a cada coincidencia el debate, el orador y el turno de su oración.
+    """
+    from token_cache import get_cache
+
+    tagger = tagger or get_tagger()
+    cache = get_cache()
+    rows = corpus.select(debates, speakers)
+    sentences, owners = [], []
+    for i, row in enumerate(rows):
+        turn_sentences = cache.sentences(corpus.turn_text(row))
+        sentences.extend(turn_sentences)
+        owners.extend([i] * len(turn_sentences))
+
+    matches = tagger.matches(sentences)
+    owner = np.asarray(owners, dtype=np.int64)[matches['sentence'].to_numpy()]
+    matches.insert(0, 'debate', [corpus.debates[d] for d in rows['debate'][owner]])
+    matches.insert(1, 'speaker', [corpus.speakers[s] for s in rows['speaker'][owner]])
+    matches.insert(2, 'turn', rows['turn'][owner])
+    return matches
+
+
+_default_tagger = None
+
+
+def get_tagger():
+    """Etiquetador con los léxicos por defecto, compartido por todo el proceso."""
+    global _default_tagger
+    if _default_tagger is None:
+        _default_tagger = ContextTagger()
+    return _default_tagger
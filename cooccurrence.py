@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""Matriz dispersa de co-ocurrencias para las redes de palabras.
+
+Los tokens se codifican como enteros y las co-ocurrencias dentro de una
+ventana se cuentan de forma vectorizada en una matriz dispersa de SciPy.
+El grafo de networkx solo se construye para el subgrafo final que se dibuja.
+"""
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+from keyness import top_k
+
+WEIGHTINGS = ('count', 'pmi', 'npmi')
+
+
+def cooccurrence_matrix(token_id_arrays, vocab_size, window=1):
+    """Co-ocurrencias simétricas entre tokens a distancia <= window.
+
+    token_id_arrays es una lista de documentos (turnos, oraciones...); las
+    ventanas no cruzan el límite entre documentos.
+    """
+    if isinstance(token_id_arrays, np.ndarray):
+        token_id_arrays = [token_id_arrays]
+    token_id_arrays = [np.asarray(ids, dtype=np.int64) for ids in token_id_arrays]
+    ids = np.concatenate(token_id_arrays) if token_id_arrays else np.empty(0, dtype=np.int64)
+    documents = np.repeat(np.arange(len(token_id_arrays)), [len(a) for a in token_id_arrays])
+
+    rows, cols = [], []
+    for offset in range(1, window + 1):
+        same_document = documents[:-offset] == documents[offset:]
+        rows.append(ids[:-offset][same_document])
+        cols.append(ids[offset:][same_document])
+    rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.empty(0, dtype=np.int64)
+
+    directed = sparse.coo_matrix(
+        (np.ones(len(rows), dtype=np.float64), (rows, cols)), shape=(vocab_size, vocab_size)
+    ).tocsr()
+    # Cada par se cuenta una vez sin importar el orden; la diagonal no se duplica
+    return (directed + directed.T - sparse.diags(directed.diagonal())).tocsr()
+
+
+def weight_matrix(counts, weighting='count'):
+    """Convierte conteos en PMI o NPMI manteniendo la estructura dispersa."""
+    if weighting == 'count':
+        return counts
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"Ponderación desconocida: {weighting}")
+
+    coo = sparse.triu(counts).tocoo()
+    total = coo.data.sum()
+    marginals = np.asarray(counts.sum(axis=1)).ravel()
+    marginal_total = marginals.sum()
+    p_xy = coo.data / total
+    p_x = marginals[coo.row] / marginal_total
+    p_y = marginals[coo.col] / marginal_total
+    values = np.log(p_xy / (p_x * p_y))
+    if weighting == 'npmi':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(p_xy < 1, values / -np.log(p_xy), 1.0)
+
+    upper = sparse.coo_matrix((values, (coo.row, coo.col)), shape=counts.shape)
+    return (upper + sparse.triu(upper, k=1).T).tocsr()
+
+
+def top_subgraph(counts, vocabulary, node_ids, weighting='count', min_count=1):
+    """Grafo de networkx restringido a los nodos indicados (p. ej. las top-N palabras)."""
+    node_ids = np.asarray(node_ids, dtype=np.int64)
+    sub_counts = counts[node_ids][:, node_ids]
+    sub_weights = weight_matrix(counts, weighting)[node_ids][:, node_ids]
+
+    upper = sparse.triu(sub_counts).tocoo()
+    keep = upper.data >= min_count
+    rows, cols, data = upper.row[keep], upper.col[keep], upper.data[keep]
+    weights = np.asarray(sub_weights[rows, cols]).ravel()
+
+    G = nx.Graph()
+    G.add_edges_from(
+        (vocabulary[node_ids[r]], vocabulary[node_ids[c]], {'weight': float(w), 'count': int(n)})
+        for r, c, w, n in zip(rows, cols, weights, data)
+    )
+    return G
+
+
+def word_network(token_id_arrays, vocabulary, n=30, window=1, weighting='count', min_count=1):
+    """Red de co-ocurrencias entre las n palabras más frecuentes."""
+    if isinstance(token_id_arrays, np.ndarray):
+        token_id_arrays = [token_id_arrays]
+    vocab_size = len(vocabulary)
+    frequencies = np.zeros(vocab_size, dtype=np.int64)
+    for ids in token_id_arrays:
+        frequencies += np.bincount(ids, minlength=vocab_size)
+    top_ids = top_k(frequencies, n)
+    top_ids = top_ids[frequencies[top_ids] > 0]
+
+    counts = cooccurrence_matrix(token_id_arrays, vocab_size, window)
+    return top_subgraph(counts, vocabulary, top_ids, weighting, min_count)
@@ -7,24 +7,27 @@ Original file is located at
     https://colab.research.google.com/drive/1EbxIRKXe8OgMhuBZOF3P_hY7fgSXgqK4
 """
 
-!pip install gensim textstat
-import re
+!pip install textstat
 import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.util import ngrams
 from collections import Counter
 from wordcloud import WordCloud
-from nltk.probability import FreqDist
 import matplotlib.pyplot as plt
 import networkx as nx
-from textblob import TextBlob
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
-import gensim
-from gensim import corpora
-import textstat
 import math
+import numpy as np
+from transcript_index import index_for_text, load_transcript
+from token_cache import get_cache
+from keyness import count_matrix, keyness, top_keywords
+from transcript_index import DebateCorpus
+from ngrams import id_bits
+from minhash import MinHashIndex, shingles, jaccard
+from scheduler import run_units, word_stats, network, sentence_polarity, readability_scores, text_polarity
+from topic_model import SegmentLDA
+from lexicon_sentiment import score_corpus
+from sentiment_series import analyze_series, timeline, align
+import os
 
 # Descarga recursos necesarios de NLTK (solo si no están ya descargados)
 nltk.download('punkt', quiet=True)
@@ -32,29 +35,24 @@ nltk.download('stopwords', quiet=True)
 nltk.download('punkt_tab')
 
 def extract_speaker_text(text, speakers_to_include):
-    pattern = r'([A-Z]+):\s*(.+?)(?=\n[A-Z]+:|\Z)'
-    matches = re.findall(pattern, text, re.DOTALL)
-    extracted_text = {speaker: [] for speaker in speakers_to_include}
-    for speaker, content in matches:
-        if speaker in speakers_to_include:
-            extracted_text[speaker].append(content.strip())
-    return {speaker: ' '.join(texts) for speaker, texts in extracted_text.items()}
+    # El índice de turnos se construye una sola vez por texto
+    return index_for_text(text).speaker_texts(speakers_to_include)
 
 def preprocess_text(text):
-    stop_words = set(stopwords.words('english'))
-    words = word_tokenize(text.lower())
-    return [word for word in words if word.isalnum() and word not in stop_words]
+    # Tokenización compartida: cada texto se tokeniza una sola vez por proceso
+    return get_cache().words(text, content_only=True)
 
 def generate_wordcloud_and_stats(text, title, top_n=20):
-    filtered_words = preprocess_text(text)
-    word_counts = Counter(filtered_words)
-    bigrams = list(ngrams(filtered_words, 2))
-    trigrams = list(ngrams(filtered_words, 3))
-    bigram_counts = Counter(bigrams)
-    trigram_counts = Counter(trigrams)
+    plot_wordcloud_and_stats(word_stats(text), title, top_n)
+
+def plot_wordcloud_and_stats(stats, title, top_n=20):
+    # Listas [(término, frecuencia)] ya ordenadas de mayor a menor frecuencia
+    word_counts = stats['words']
+    bigram_counts = stats['bigrams']
+    trigram_counts = stats['trigrams']
 
     def generate_cloud(counts, title_suffix):
-        wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(counts)
+        wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(dict(counts))
         plt.figure(figsize=(10, 5))
         plt.imshow(wordcloud, interpolation='bilinear')
         plt.axis('off')
@@ -62,14 +60,10 @@ def generate_wordcloud_and_stats(text, title, top_n=20):
         plt.show()
 
     def generate_bar_plot(counts, title_suffix, top_n=20):
-        if isinstance(counts, Counter):
-            top_items = dict(counts.most_common(top_n))
-        else:
-            # Si counts es un diccionario, ordenamos manualmente
-            top_items = dict(sorted(counts.items(), key=lambda x: x[1], reverse=True)[:top_n])
+        top_items = counts[:top_n]
 
         plt.figure(figsize=(12, 6))
-        plt.barh(list(top_items.keys()), list(top_items.values()))
+        plt.barh([item for item, _ in top_items], [count for _, count in top_items])
         plt.title(f'Top {top_n} {title_suffix}')
         plt.xlabel('Frecuencia')
         plt.gca().invert_yaxis()
@@ -77,64 +71,92 @@ def generate_wordcloud_and_stats(text, title, top_n=20):
         plt.show()
 
     generate_cloud(word_counts, 'Word Cloud')
-    generate_cloud({' '.join(k): v for k, v in bigram_counts.items()}, 'Bigram Cloud')
-    generate_cloud({' '.join(k): v for k, v in trigram_counts.items()}, 'Trigram Cloud')
+    generate_cloud(bigram_counts, 'Bigram Cloud')
+    generate_cloud(trigram_counts, 'Trigram Cloud')
 
     generate_bar_plot(word_counts, 'palabras más frecuentes')
-    generate_bar_plot({' '.join(k): v for k, v in bigram_counts.items()}, 'bigramas más frecuentes')
-    generate_bar_plot({' '.join(k): v for k, v in trigram_counts.items()}, 'trigramas más frecuentes')
+    generate_bar_plot(bigram_counts, 'bigramas más frecuentes')
+    generate_bar_plot(trigram_counts, 'trigramas más frecuentes')
 
     print(f"\nEstadísticas para {title}:")
-    print(f"Total de palabras (sin stopwords): {len(filtered_words)}")
+    print(f"Total de palabras (sin stopwords): {stats['total_words']}")
     print(f"\nTop {top_n} palabras más frecuentes:")
-    for word, count in word_counts.most_common(top_n):
+    for word, count in word_counts[:top_n]:
         print(f"{word}: {count}")
 
     print(f"\nTop {top_n} bigramas más frecuentes:")
-    for bigram, count in bigram_counts.most_common(top_n):
-        print(f"{' '.join(bigram)}: {count}")
+    for bigram, count in bigram_counts[:top_n]:
+        print(f"{bigram}: {count}")
 
     print(f"\nTop {top_n} trigramas más frecuentes:")
-    for trigram, count in trigram_counts.most_common(top_n):
-        print(f"{' '.join(trigram)}: {count}")
-
-def generate_word_network(text, title, n=30):
-    words = preprocess_text(text)
-    word_freq = Counter(words)
-    top_words = [word for word, _ in word_freq.most_common(n)]
-
-    G = nx.Graph()
-    for i in range(len(words)-1):
-        if words[i] in top_words and words[i+1] in top_words:
-            if G.has_edge(words[i], words[i+1]):
-                G[words[i]][words[i+1]]['weight'] += 1
-            else:
-                G.add_edge(words[i], words[i+1], weight=1)
+    for trigram, count in trigram_counts[:top_n]:
+        print(f"{trigram}: {count}")
+
+def generate_word_network(text, title, n=30, window=1, weighting='count'):
+    # Co-ocurrencias en matriz dispersa; el grafo solo contiene las n palabras más frecuentes
+    plot_word_network(network(text, n=n, window=window, weighting=weighting), title)
 
+def plot_word_network(G, title):
     plt.figure(figsize=(16,12))
     pos = nx.spring_layout(G, k=0.5, iterations=50)
     nx.draw(G, pos, node_color='lightblue', node_size=3000, with_labels=True, font_size=8,
-            width=[G[u][v]['weight'] for u,v in G.edges()])
+            width=[G[u][v]['count'] for u,v in G.edges()])
     plt.title(f'{title} Word Network')
     plt.show()
 
 def sentiment_over_time(text, title, window_size=100):
-    sentences = sent_tokenize(text)
-    sentiments = [TextBlob(sentence).sentiment.polarity for sentence in sentences]
+    sentences, sentiments = sentence_polarity(text)
+    plot_sentiment_over_time(sentences, sentiments, title, window_size)
+
+def plot_sentiment_over_time(sentences, sentiments, title, window_size=100, analytics=None):
+    # Media móvil, EWMA, volatilidad y cambios de tono: se calculan una vez (o vienen
+    # ya calculados de la línea de tiempo del debate) y sirven al gráfico y al resumen
+    if analytics is None:
+        analytics = analyze_series(sentiments, window=window_size)
+    mean = np.asarray(analytics['rolling_mean'])
+    volatility = np.nan_to_num(np.asarray(analytics['volatility']))
+    changes = np.flatnonzero(np.asarray(analytics['change_point']))
 
     plt.figure(figsize=(12,6))
-    plt.plot(sentiments)
+    plt.plot(sentiments, alpha=0.3, label='Oración')
+    plt.plot(mean, label=f'Media móvil ({window_size})')
+    plt.fill_between(np.arange(len(mean)), mean - volatility, mean + volatility, alpha=0.15)
+    plt.plot(np.asarray(analytics['ewma']), label='EWMA')
+    plt.plot(np.asarray(analytics['level']), color='k', linewidth=1, label='Nivel entre cambios')
+    for change in changes:
+        plt.axvline(x=change, color='gray', linestyle=':')
     plt.title(f'{title} Sentiment Over Time')
     plt.xlabel('Sentences')
     plt.ylabel('Sentiment (-1 negative, +1 positive)')
     plt.axhline(y=0, color='r', linestyle='--')
+    plt.legend()
     plt.show()
 
     avg_sentiment = sum(sentiments) / len(sentiments)
     print(f"Promedio de sentimiento: {avg_sentiment:.2f}")
+    print(f"Volatilidad media (ventana de {window_size}): {np.nanmean(analytics['volatility']):.3f}")
+    print(f"Cambios de tono en las oraciones: {', '.join(str(c) for c in changes) or 'ninguno'}")
     print(f"Sentencia más positiva: {sentences[sentiments.index(max(sentiments))]}")
     print(f"Sentencia más negativa: {sentences[sentiments.index(min(sentiments))]}")
 
+def sentiment_timeline(corpus, debate, speakers, window_size=100):
+    """Polaridad por oración de los turnos del debate y sus series, en su línea de tiempo común."""
+    return timeline(score_corpus(corpus, debates=debate, speakers=speakers, text=True),
+                    'polarity', window=window_size)
+
+def plot_sentiment_timeline(sentiment, speakers, title):
+    """EWMA de cada orador sobre las oraciones de todo el debate (último valor de cada uno)."""
+    aligned = align(sentiment, 'ewma', speakers=speakers)
+    plt.figure(figsize=(12,6))
+    for speaker in speakers:
+        plt.plot(aligned.index, aligned[speaker], label=speaker)
+    plt.title(f'{title} Sentiment Timeline')
+    plt.xlabel('Sentences (all speakers)')
+    plt.ylabel('EWMA sentiment')
+    plt.axhline(y=0, color='r', linestyle='--')
+    plt.legend()
+    plt.show()
+
 def comparative_wordcloud(text1, text2, title1, title2):
     words1 = preprocess_text(text1)
     words2 = preprocess_text(text2)
@@ -152,143 +174,183 @@ def comparative_wordcloud(text1, text2, title1, title2):
     plt.title(f'Comparative Wordcloud: {title1} vs {title2}')
     plt.show()
 
-def analyze_debate(file_path, speakers_to_include):
-    with open(file_path, 'r', encoding='utf-8') as file:
-        debate_text = file.read()
+SPEAKER_STAGES = ['stats', 'network', 'readability']
 
-    extracted_texts = extract_speaker_text(debate_text, speakers_to_include)
+def analyze_debate(file_path, speakers_to_include, workers=1, window_size=100):
+    return analyze_debates({file_path: speakers_to_include}, workers=workers, window_size=window_size)
 
-    all_words = []
-    speaker_words = {}
+def analyze_debates(debates, workers=None, topic_model=None, window_size=100):
+    """
+    Analiza varios debates (dict ruta -> oradores) repartiendo las unidades
+    (debate, orador, etapa) en un pool de procesos; los gráficos y la salida
+    se generan después, en el orden de entrada.
+
+    Los temas salen de un solo LDA entrenado sobre todos los turnos de todos
+    los oradores; si se pasa topic_model (un SegmentLDA ya entrenado), se
+    actualiza en línea con estos debates en lugar de entrenar uno nuevo.
+    El sentimiento por oración y sus series (media móvil de window_size
+    oraciones, EWMA, volatilidad y cambios de tono) se calculan una vez por
+    debate y los usan todos los gráficos. Devuelve el modelo de temas.
+    """
+    corpus = DebateCorpus()
+    for file_path in debates:
+        corpus.add(load_transcript(file_path), name=file_path)
+    results = run_units(corpus, debates, SPEAKER_STAGES, workers=workers)
+
+    if topic_model is None:
+        topic_model = SegmentLDA(num_topics=5, workers=workers).fit(corpus, debates)
+    else:
+        topic_model.update(corpus, debates)
+    print_topics(topic_model.topics(num_words=10))
+    mixtures = topic_model.mixtures(corpus, debates)
+    # Los oradores sin tokens tras filter_extremes no tienen mezcla de temas
+    with_mixture = set(mixtures.index.get_level_values(0))
+
+    for file_path, speakers_to_include in debates.items():
+        extracted_texts = corpus[file_path].speaker_texts(speakers_to_include)
+        report_debate(extracted_texts, speakers_to_include,
+                      {(u.speaker, u.stage): r for u, r in results.items() if u.debate == file_path},
+                      mixtures.loc[file_path] if file_path in with_mixture else None,
+                      sentiment_timeline(corpus, file_path, speakers_to_include, window_size),
+                      window_size)
+    return topic_model
+
+def report_debate(extracted_texts, speakers_to_include, stage_results, topic_mixtures=None,
+                  sentiment=None, window_size=100):
+    speaker_tokens = {}
 
     for speaker, text in extracted_texts.items():
         print(f"\nAnálisis para {speaker}:")
-        words = word_tokenize(text.lower())
-        all_words.extend(words)
-        speaker_words[speaker] = words
+        stats = stage_results[speaker, 'stats']
+        speaker_tokens[speaker] = get_cache().tokens(text)
 
-        print(f"Total de palabras: {len(words)}")
+        print(f"Total de palabras: {stats['total_tokens']}")
 
         # Calcular y mostrar TTR
-        ttr = calculate_ttr(text)
-        print(f"Type-Token Ratio (TTR): {ttr:.4f}")
+        print(f"Type-Token Ratio (TTR): {stats['ttr']:.4f}")
 
-        generate_wordcloud_and_stats(text, speaker)
-        generate_word_network(text, speaker)
-        sentiment_over_time(text, speaker)
+        plot_wordcloud_and_stats(stats, speaker)
+        plot_word_network(stage_results[speaker, 'network'], speaker)
+        rows = sentiment[sentiment['speaker'] == speaker] if sentiment is not None else []
+        if len(rows):
+            plot_sentiment_over_time(rows['text'].tolist(), rows['polarity'].tolist(), speaker,
+                                     window_size, analytics=rows)
 
         # Nuevos análisis
-        analyze_topics(text)
-        analyze_readability(text)
-
-    # Calcular Log-Likelihood entre los dos primeros speakers
-    speaker1, speaker2 = speakers_to_include[:2]
-    words1 = speaker_words[speaker1]
-    words2 = speaker_words[speaker2]
-
-    freq1 = Counter(words1)
-    freq2 = Counter(words2)
-
-    total1 = len(words1)
-    total2 = len(words2)
+        if topic_mixtures is not None and speaker in topic_mixtures.index:
+            print_topic_mixture(topic_mixtures.loc[speaker])
+        print_readability(stage_results[speaker, 'readability'])
 
-    all_unique_words = set(freq1.keys()) | set(freq2.keys())
+    # Series de todos los oradores en la línea de tiempo común del debate
+    if sentiment is not None:
+        plot_sentiment_timeline(sentiment, speakers_to_include, ' vs '.join(speakers_to_include))
 
-    print(f"\nTop 20 palabras con mayor Log-Likelihood entre {speaker1} y {speaker2}:")
-    ll_scores = []
-    for word in all_unique_words:
-        count1 = freq1[word]
-        count2 = freq2[word]
-        ll = calculate_log_likelihood(count1, count2, total1, total2)
-        ll_scores.append((word, ll))
+    # Calcular Log-Likelihood entre todos los pares de speakers en una sola pasada
+    vocabulary = get_cache().vocabulary
+    counts = count_matrix([speaker_tokens[s] for s in speakers_to_include], len(vocabulary))
+    table = keyness(counts)
+    top = top_keywords(table, vocabulary.words, 'log_likelihood', k=20)
 
-    for word, ll in sorted(ll_scores, key=lambda x: x[1], reverse=True)[:20]:
-        print(f"{word}: {ll:.2f}")
+    for (i, j), keywords in zip(table['pairs'], top):
+        print(f"\nTop 20 palabras con mayor Log-Likelihood entre {speakers_to_include[i]} y {speakers_to_include[j]}:")
+        for word, ll in keywords:
+            print(f"{word}: {ll:.2f}")
 
+    speaker1, speaker2 = speakers_to_include[:2]
     comparative_wordcloud(extracted_texts[speaker1], extracted_texts[speaker2], speaker1, speaker2)
 
 
 def analyze_topics(text, num_topics=5, num_words=10):
     """
-    Realiza un análisis de temas utilizando LDA.
+    Realiza un análisis de temas utilizando LDA (cada oración es un documento).
     """
-    words = preprocess_text(text)
-    # Crear diccionario
-    dictionary = corpora.Dictionary([words])
-
-    # Crear corpus
-    corpus = [dictionary.doc2bow(words)]
-
-    # Entrenar modelo LDA
-    lda_model = gensim.models.LdaMulticore(corpus=corpus, id2word=dictionary, num_topics=num_topics)
+    print_topics(SegmentLDA(num_topics).fit_texts(get_cache().sentences(text)).topics(num_words))
 
+def print_topics(topics):
     print(f"\nTemas principales (LDA):")
-    for idx, topic in lda_model.print_topics(-1, num_words=num_words):
+    for idx, topic in topics:
         print(f"Tema {idx + 1}: {topic}")
 
+def print_topic_mixture(mixture, top=3):
+    """Temas con más peso en el discurso de un orador."""
+    shares = ', '.join(f"Tema {idx + 1}: {share:.2f}" for idx, share in mixture.nlargest(top).items())
+    print(f"Mezcla de temas: {shares}")
+
 def analyze_readability(text):
     """
     Analiza la complejidad del discurso utilizando diferentes métricas de legibilidad.
     """
+    print_readability(readability_scores(text))
+
+def print_readability(scores):
     print("\nAnálisis de complejidad del discurso:")
-    print(f"Índice Flesch-Kincaid Grade: {textstat.flesch_kincaid_grade(text)}")
-    print(f"Índice de legibilidad Flesch: {textstat.flesch_reading_ease(text)}")
-    print(f"Índice SMOG: {textstat.smog_index(text)}")
-    print(f"Índice Coleman-Liau: {textstat.coleman_liau_index(text)}")
-    print(f"Índice de legibilidad automatizado: {textstat.automated_readability_index(text)}")
+    print(f"Índice Flesch-Kincaid Grade: {scores['flesch_kincaid_grade']}")
+    print(f"Índice de legibilidad Flesch: {scores['flesch_reading_ease']}")
+    print(f"Índice SMOG: {scores['smog_index']}")
+    print(f"Índice Coleman-Liau: {scores['coleman_liau_index']}")
+    print(f"Índice de legibilidad automatizado: {scores['automated_readability_index']}")
 
 
 def compare_debates(debate1_path, debate2_path, speakers1, speakers2):
-    with open(debate1_path, 'r', encoding='utf-8') as file:
-        debate1_text = file.read()
-    with open(debate2_path, 'r', encoding='utf-8') as file:
-        debate2_text = file.read()
-
-    trump1_text = extract_speaker_text(debate1_text, ['TRUMP'])['TRUMP']
-    trump2_text = extract_speaker_text(debate2_text, ['TRUMP'])['TRUMP']
+    trump1_text = load_transcript(debate1_path).speaker_text('TRUMP')
+    trump2_text = load_transcript(debate2_path).speaker_text('TRUMP')
 
     print("\nComparación de Trump entre debates:")
     comparative_wordcloud(trump1_text, trump2_text, 'Trump (Debate 1)', 'Trump (Debate 2)')
 
-    sentiment1 = TextBlob(trump1_text).sentiment.polarity
-    sentiment2 = TextBlob(trump2_text).sentiment.polarity
+    sentiment1 = text_polarity(trump1_text)
+    sentiment2 = text_polarity(trump2_text)
 
     print(f"Sentimiento de Trump en Debate 1: {sentiment1:.2f}")
     print(f"Sentimiento de Trump en Debate 2: {sentiment2:.2f}")
 
 def calculate_jaccard_similarity(text1, text2, n=1):
-    # Preprocess texts
-    stop_words = set(stopwords.words('english'))
-    words1 = [word.lower() for word in word_tokenize(text1) if word.isalnum() and word.lower() not in stop_words]
-    words2 = [word.lower() for word in word_tokenize(text2) if word.isalnum() and word.lower() not in stop_words]
-
-    # Generate n-grams
-    ngrams1 = set(ngrams(words1, n))
-    ngrams2 = set(ngrams(words2, n))
+    # Ids de contenido (en caché) y n-gramas como claves enteras de 64 bits
+    cache = get_cache()
+    ids1 = cache.tokens(text1, content_only=True)
+    ids2 = cache.tokens(text2, content_only=True)
+    bits = id_bits(len(cache.vocabulary))
+    ngrams1 = shingles(ids1, n, bits)
+    ngrams2 = shingles(ids2, n, bits)
 
-    # Calculate Jaccard similarity
-    intersection = len(ngrams1.intersection(ngrams2))
-    union = len(ngrams1.union(ngrams2))
-
-    return intersection / union if union != 0 else 0
+    return jaccard(ngrams1, ngrams2)
 
 def compare_debates_jaccard(debate1_path, debate2_path, speakers1, speakers2):
-    with open(debate1_path, 'r', encoding='utf-8') as file:
-        debate1_text = file.read()
-    with open(debate2_path, 'r', encoding='utf-8') as file:
-        debate2_text = file.read()
-
-    trump1_text = extract_speaker_text(debate1_text, ['TRUMP'])['TRUMP']
-    trump2_text = extract_speaker_text(debate2_text, ['TRUMP'])['TRUMP']
+    trump1_text = load_transcript(debate1_path).speaker_text('TRUMP')
+    trump2_text = load_transcript(debate2_path).speaker_text('TRUMP')
 
     print("\nJaccard Similarity Analysis for Trump's speeches:")
     for n in [1, 2, 3]:
         similarity = calculate_jaccard_similarity(trump1_text, trump2_text, n)
         print(f"{n}-gram Jaccard Similarity: {similarity:.4f}")
 
+def detect_reused_turns(file_paths, speaker=None, n=3, threshold=0.5, top_n=20):
+    """
+    Turnos casi idénticos entre cualquier número de debates (discurso de campaña
+    reutilizado): candidatos por MinHash/LSH, confirmados con Jaccard exacto.
+    Con umbrales bajos las bandas no llegan al umbral pedido (para 0.1, el
+    umbral LSH es 0.125 y los pares con Jaccard 0.1 son candidatos con
+    probabilidad ~0.47); el umbral efectivo se imprime.
+    """
+    corpus = DebateCorpus.from_files(file_paths)
+    index = MinHashIndex.from_corpus(corpus, speakers=speaker, n=n, threshold=threshold)
+    matches = index.near_duplicates()
+
+    print(f"\nTurnos reutilizados entre debates ({n}-gramas, Jaccard >= {threshold}):")
+    print(f"{len(index)} turnos indexados, {len(matches)} pares encontrados "
+          f"(umbral LSH efectivo {index.lsh_threshold:.3f})")
+    for i, j, similarity in matches[:top_n]:
+        print(f"\n{similarity:.3f}  {index.labels[i]}  <->  {index.labels[j]}")
+        print(f"  {corpus.turn_text(index.turns[i])[:120]}")
+        print(f"  {corpus.turn_text(index.turns[j])[:120]}")
+
+    for group in index.clusters(matches)[:top_n]:
+        print(f"Grupo de {len(group)} turnos: {[index.labels[t] for t in group]}")
+    return matches
+
 def calculate_ttr(text):
-    words = word_tokenize(text.lower())
-    return len(set(words)) / len(words)
+    words = get_cache().tokens(text)
+    return len(np.unique(words)) / len(words)
 
 def calculate_log_likelihood(count1, count2, total1, total2):
     expected1 = total1 * (count1 + count2) / (total1 + total2)
@@ -298,115 +360,125 @@ def calculate_log_likelihood(count1, count2, total1, total2):
     return ll
 
 if __name__ == "__main__":
-    print("Analizando el primer debate (Trump vs Biden):")
-    analyze_debate('debate.txt', ['TRUMP', 'BIDEN'])
-
-    print("\nAnalizando el segundo debate (Trump vs Harris):")
-    analyze_debate('debate2.txt', ['TRUMP', 'HARRIS'])
+    # Ambos debates se analizan en paralelo (DEBATES_WORKERS procesos, por defecto todos los núcleos)
+    print("Analizando los debates (Trump vs Biden, Trump vs Harris):")
+    analyze_debates({
+        'debate.txt': ['TRUMP', 'BIDEN'],
+        'debate2.txt': ['TRUMP', 'HARRIS'],
+    }, workers=int(os.environ.get('DEBATES_WORKERS', 0)) or None)
 
     compare_debates('debate.txt', 'debate2.txt', ['TRUMP', 'BIDEN'], ['TRUMP', 'HARRIS'])
     compare_debates_jaccard('debate.txt', 'debate2.txt', ['TRUMP', 'BIDEN'], ['TRUMP', 'HARRIS'])
+    detect_reused_turns(['debate.txt', 'debate2.txt'], speaker='TRUMP', n=2, threshold=0.1)
 
 # Import required libraries
 !pip install transformers torch pandas numpy seaborn sklearn nltk textblob vaderSentiment bertopic
 import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
 from bertopic import BERTopic
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import pandas as pd
 import numpy as np
 import seaborn as sns
 import matplotlib.pyplot as plt
 from sklearn.metrics.pairwise import cosine_similarity
-from nltk.tokenize import sent_tokenize
-import re
 import os
+from transcript_index import index_for_text, load_transcript
+from token_cache import get_cache
+from embeddings import BatchedEmbedder
+from embedding_store import EmbeddingStore
+from sentiment import score_sentences
+from model_registry import registry
+from inference_backend import use_backend
+from embedding_store import text_hash
+from pipeline import Pipeline
+from results_table import ResultTable
+from context_tagger import ContextTagger, get_tagger
+from lexicon_sentiment import get_scorer
+import sys
 
 class AdvancedDebateAnalyzer:
-    def __init__(self):
-        # Initialize BERT model for sentiment analysis
-        self.sentiment_model = pipeline(
-            "sentiment-analysis",
-            model="nlptown/bert-base-multilingual-uncased-sentiment"
-        )
-
-        # Initialize BERT model for embeddings
-        self.tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
-        self.model = AutoModelForSequenceClassification.from_pretrained('bert-base-uncased')
-
-        # Initialize VADER for comparison
-        self.vader = SentimentIntensityAnalyzer()
-
-        # Initialize BERTopic for topic modeling
-        self.topic_model = BERTopic(language="english")
+    def __init__(self, embedding_store=None, context_lexicons=None):
+        # Models are loaded on first use from the shared registry, so a run that
+        # never asks for sentiment or embeddings never loads those weights
+        self.sentiment_name = "nlptown/bert-base-multilingual-uncased-sentiment"
+        self.bert_name = 'bert-base-uncased'
+        # Token budget per sentiment batch (sentences x padded length)
+        self.sentiment_max_tokens = 8192
+
+        # With an embedding_store directory, texts embedded in earlier runs are read from disk
+        self.embedding_store = EmbeddingStore(embedding_store) if embedding_store else None
+
+        # BERTopic model shared by all speakers and debates, fitted in fit_topics
+        self.topic_model = None
+        # Consecutive sentences per BERTopic document
+        self.topic_chunk_size = 5
+
+        # Context indicators compiled into one Aho-Corasick automaton; extra lexicon
+        # files (one phrase per line, category = file name) extend the defaults
+        self.context_tagger = ContextTagger.from_files(context_lexicons) if context_lexicons else get_tagger()
+        self.context_types = tuple(self.context_tagger.categories)
+
+    @property
+    def sentiment_model(self):
+        return registry.get('sentiment', self.sentiment_name)
+
+    @property
+    def tokenizer(self):
+        return registry.get('backbone', self.bert_name)[0]
+
+    @property
+    def model(self):
+        # Same BERT weights as DebateAnalyzer's embeddings
+        return registry.get('backbone', self.bert_name)[1]
+
+    @property
+    def vader(self):
+        """VADER-style lexicon scorer over the shared token ids (whole sentence array at once)"""
+        return get_scorer()
+
+    @property
+    def embedder(self):
+        """Batched BERT embeddings (mean of the last hidden state)"""
+        return BatchedEmbedder(self.tokenizer, self.model, store=self.embedding_store)
 
     def extract_speaker_text(self, text, speaker):
-        """Extract text for specific speaker using improved regex"""
-        pattern = rf'{speaker}:\s*(.*?)(?=\n[A-Z]+:|$)'
-        matches = re.findall(pattern, text, re.DOTALL | re.MULTILINE)
-        return ' '.join([m.strip() for m in matches])
+        """Extract text for specific speaker from the shared turn index"""
+        return index_for_text(text).speaker_text(speaker)
 
     def get_bert_embeddings(self, text):
         """Generate BERT embeddings for text with chunking for long texts"""
-        # Tokenize the text
-        tokens = self.tokenizer(
-            text,
-            padding=True,
-            truncation=True,
-            max_length=512,  # BERT's maximum sequence length
-            return_tensors="pt"
+        # Long texts are split into 512-token windows, embedded in batches and averaged
+        return self.embedder.embed_long([text])
+
+    def analyze_sentiment_advanced(self, text, sentences=None):
+        """Multi-level sentiment analysis using BERT and VADER, one score per sentence"""
+        if sentences is None:
+            sentences = get_cache().sentences(text)
+
+        # Sentences are sorted by length and packed into batches under a token budget;
+        # VADER-style compounds come from one vectorized lexicon pass over all sentences
+        scored = score_sentences(
+            self.sentiment_model.model,
+            self.sentiment_model.tokenizer,
+            sentences,
+            vader=self.vader,
+            max_tokens=self.sentiment_max_tokens
         )
 
-        # Process in chunks if text is too long
-        chunk_size = 512
-        all_embeddings = []
+        bert_score = np.mean(scored['scores'])
+        vader_compound = np.mean(scored['vader_compound'])
 
-        for i in range(0, len(tokens['input_ids'][0]), chunk_size):
-            chunk_tokens = {
-                'input_ids': tokens['input_ids'][:, i:i+chunk_size],
-                'attention_mask': tokens['attention_mask'][:, i:i+chunk_size]
-            }
-
-            with torch.no_grad():
-                outputs = self.model(**chunk_tokens)
-                chunk_embeddings = outputs.logits.mean(dim=1).numpy()
-                all_embeddings.append(chunk_embeddings)
-
-        # Combine embeddings from all chunks
-        if len(all_embeddings) > 1:
-            return np.mean(all_embeddings, axis=0)
-        else:
-            return all_embeddings[0]
-
-    def analyze_sentiment_advanced(self, text):
-        """Multi-level sentiment analysis using BERT and VADER with chunking"""
-        sentences = sent_tokenize(text)
-
-        # Process sentences in chunks
-        chunk_size = 10  # Process 10 sentences at a time
-        bert_sentiments = []
-
-        for i in range(0, len(sentences), chunk_size):
-            chunk = sentences[i:i+chunk_size]
-            chunk_text = ' '.join(chunk)
-            chunk_sentiments = self.sentiment_model(chunk_text, truncation=True, max_length=512)
-            bert_sentiments.extend(chunk_sentiments)
-
-        bert_score = np.mean([float(s['score']) for s in bert_sentiments])
-
-        # VADER analysis (doesn't need chunking)
-        vader_scores = [self.vader.polarity_scores(sentence) for sentence in sentences]
-        vader_compound = np.mean([score['compound'] for score in vader_scores])
+        # Context indicators of all sentences in one pass of the automaton
+        contexts = self.context_tagger.contexts(sentences)
 
         # Detailed analysis per sentence
         sentence_analysis = []
-        for i, (sentence, vader_score) in enumerate(zip(sentences, vader_scores)):
-            bert_sent = bert_sentiments[i] if i < len(bert_sentiments) else bert_sentiments[-1]
+        for i, sentence in enumerate(sentences):
             sentence_analysis.append({
                 'sentence': sentence,
-                'bert_score': float(bert_sent['score']),
-                'vader_compound': vader_score['compound'],
-                'context': self._analyze_context(sentence)
+                'bert_label': scored['labels'][i],
+                'bert_score': float(scored['scores'][i]),
+                'vader_compound': float(scored['vader_compound'][i]),
+                'context': contexts[i]
             })
 
         return {
@@ -417,100 +489,115 @@ class AdvancedDebateAnalyzer:
 
     def _analyze_context(self, sentence):
         """Analyze contextual elements like sarcasm and rhetoric"""
-        context_indicators = {
-            'sarcasm': ['really', 'obviously', 'clearly', 'oh sure', 'right'],
-            'rhetoric': ['isn\'t it', 'don\'t you think', 'how about', 'what if'],
-            'emphasis': ['very', 'extremely', 'absolutely', 'totally']
-        }
+        return self.context_tagger.contexts([sentence])[0]
 
-        found_contexts = []
-        lower_sentence = sentence.lower()
+    def _empty_topics(self):
+        return {
+            'topics': [],
+            'topic_info': pd.DataFrame(),
+            'topic_representations': {},
+            'distribution': pd.Series(dtype=float)
+        }
 
-        for context_type, indicators in context_indicators.items():
-            if any(indicator in lower_sentence for indicator in indicators):
-                found_contexts.append(context_type)
+    def analyze_topics(self, text, sentences=None):
+        """Perform topic modeling using BERTopic on precomputed embeddings"""
+        if sentences is None:
+            sentences = get_cache().sentences(text)
+        return self.fit_topics({'text': sentences})['text']
+
+    def fit_topics(self, units, embeddings=None):
+        """Fit one BERTopic model across all speakers and debates
+
+        units maps a label (e.g. (debate, speaker)) to its sentences. Every
+        topic_chunk_size consecutive sentences form one document; documents are
+        embedded with the analyzer's batched BERT embedder (read from the
+        embedding store when cached) unless an embedding matrix with one row per
+        document is passed, so BERTopic never loads its own embedding model.
+        Returns, per label, the label's topics, its topic info (counts restricted
+        to the label) and its topic distribution; the shared model stays on
+        self.topic_model, so the per-label results are small and cheap to pickle.
+        """
+        docs, owners, n_sentences = [], [], 0
+        for label, sentences in units.items():
+            n_sentences += len(sentences)
+            size = self.topic_chunk_size
+            chunks = [' '.join(sentences[i:i + size]) for i in range(0, len(sentences), size)]
+            chunks = [chunk for chunk in chunks if len(chunk.strip()) > 0]
+            docs.extend(chunks)
+            owners.extend([label] * len(chunks))
 
-        return found_contexts
+        # Asegurarse de que tenemos suficientes documentos para el análisis (al menos
+        # 10 oraciones, como antes de agrupar las oraciones en documentos de 5)
+        if n_sentences < 10 or not docs:
+            print("Warning: Not enough text for meaningful topic analysis")
+            return {label: self._empty_topics() for label in units}
 
-    def analyze_topics(self, text):
-        """Perform topic modeling using BERTopic with chunking"""
         try:
-            # Split text into smaller chunks to handle long texts
-            sentences = sent_tokenize(text)
-
-            # Asegurarse de que tenemos suficientes documentos para el análisis
-            if len(sentences) < 10:
-                print("Warning: Not enough text for meaningful topic analysis")
-                return {
-                    'topic_model': None,
-                    'topics': [],
-                    'topic_info': pd.DataFrame(),
-                    'topic_representations': {}
-                }
-
-            # Usar chunks más pequeños y manejar documentos vacíos
-            chunk_size = min(50, len(sentences))  # Ajustar el tamaño del chunk
-            chunks = [' '.join(sentences[i:i+chunk_size]) for i in range(0, len(sentences), chunk_size)]
-            chunks = [chunk for chunk in chunks if len(chunk.strip()) > 0]
+            if embeddings is None:
+                embeddings = self.embedder.embed(docs)
 
             # Configurar BERTopic con parámetros más conservadores
             self.topic_model = BERTopic(
-                nr_topics=min(10, len(chunks)),  # Limitar número de tópicos
+                nr_topics=min(10, len(docs)),  # Limitar número de tópicos
                 language="english",
                 verbose=True
             )
-
-            # Fit y transform
-            topics, _ = self.topic_model.fit_transform(chunks)
-
-            return {
-                'topic_model': self.topic_model,
-                'topics': topics,
-                'topic_info': self.topic_model.get_topic_info(),
-                'topic_representations': self.topic_model.get_topics()
-            }
+            topics, _ = self.topic_model.fit_transform(docs, embeddings=embeddings)
         except Exception as e:
             print(f"Error in topic analysis: {str(e)}")
-            return {
-                'topic_model': None,
-                'topics': [],
-                'topic_info': pd.DataFrame(),
-                'topic_representations': {}
+            return {label: self._empty_topics() for label in units}
+
+        topic_info = self.topic_model.get_topic_info()
+        representations = self.topic_model.get_topics()
+        assigned = pd.DataFrame({'label': owners, 'Topic': topics})
+        results = {}
+        for label in units:
+            own = assigned.loc[[owner == label for owner in owners], 'Topic']
+            counts = own.value_counts()
+            info = topic_info.set_index('Topic').loc[counts.index].assign(Count=counts.values).reset_index()
+            results[label] = {
+                'topics': own.tolist(),
+                'topic_info': info,
+                'topic_representations': representations,
+                'distribution': counts / counts.sum() if len(counts) else counts.astype(float)
             }
+        return results
 
     def calculate_semantic_similarity(self, text1, text2):
         """Calculate semantic similarity using BERT embeddings"""
-        emb1 = self.get_bert_embeddings(text1)
-        emb2 = self.get_bert_embeddings(text2)
+        emb1, emb2 = self.embedder.embed_long([text1, text2])
 
         return cosine_similarity(emb1.reshape(1, -1), emb2.reshape(1, -1))[0][0]
 
     def analyze_debate(self, debate_text, speakers):
         """Perform comprehensive debate analysis"""
         results = {}
+        sentences = {}
 
         for speaker in speakers:
             print(f"\nAnalyzing {speaker}'s speech...")
             speaker_text = self.extract_speaker_text(debate_text, speaker)
+            sentences[speaker] = get_cache().sentences(speaker_text)
 
             # Sentiment Analysis
             print(f"Performing sentiment analysis for {speaker}...")
-            sentiment_results = self.analyze_sentiment_advanced(speaker_text)
-
-            # Topic Analysis
-            print(f"Performing topic analysis for {speaker}...")
-            topic_results = self.analyze_topics(speaker_text)
+            results[speaker] = {'sentiment': self.analyze_sentiment_advanced(speaker_text, sentences[speaker])}
 
-            # Store results
-            results[speaker] = {
-                'sentiment': sentiment_results,
-                'topics': topic_results
-            }
+        # Topic Analysis: one model for all speakers
+        print("Performing topic analysis...")
+        topic_results = self.fit_topics(sentences)
+        for speaker in speakers:
+            results[speaker]['topics'] = topic_results[speaker]
 
         return results
 
-    def compare_debates(self, debate1_text, debate2_text, speaker):
-        """Compare two debates for the same speaker"""
+    def compare_debates(self, debate1_text, debate2_text, speaker,
+                        debate1_results=None, debate2_results=None):
+        """Compare two debates for the same speaker
+
+        Results already returned by analyze_debate can be passed in so the
+        speaker's sentiment and topics are reused instead of recomputed.
+        """
         print(f"\nComparing {speaker}'s speeches across debates...")
 
         text1 = self.extract_speaker_text(debate1_text, speaker)
@@ -518,12 +605,27 @@ class AdvancedDebateAnalyzer:
 
         similarity = self.calculate_semantic_similarity(text1, text2)
 
-        sentiment1 = self.analyze_sentiment_advanced(text1)
-        sentiment2 = self.analyze_sentiment_advanced(text2)
+        sentiment1 = self._speaker_sentiment(text1, speaker, debate1_results)
+        sentiment2 = self._speaker_sentiment(text2, speaker, debate2_results)
+
+        if all(r is not None and speaker in r for r in (debate1_results, debate2_results)):
+            topics1, topics2 = debate1_results[speaker]['topics'], debate2_results[speaker]['topics']
+        else:
+            # Both debates in one topic model, so their distributions are comparable
+            shared = self.fit_topics({
+                'debate1': get_cache().sentences(text1),
+                'debate2': get_cache().sentences(text2)
+            })
+            topics1, topics2 = shared['debate1'], shared['debate2']
 
-        topics1 = self.analyze_topics(text1)
-        topics2 = self.analyze_topics(text2)
+        return self._comparison(similarity, sentiment1, sentiment2, topics1, topics2)
 
+    def _speaker_sentiment(self, text, speaker, results=None):
+        if results is not None and speaker in results:
+            return results[speaker]['sentiment']
+        return self.analyze_sentiment_advanced(text)
+
+    def _comparison(self, similarity, sentiment1, sentiment2, topics1, topics2):
         return {
             'semantic_similarity': similarity,
             'sentiment_comparison': {
@@ -536,6 +638,29 @@ class AdvancedDebateAnalyzer:
             }
         }
 
+    def sentence_table(self, debate_results):
+        """Per-sentence results of several debates as one columnar table
+
+        debate_results maps a debate name to the output of analyze_debate (or of
+        the visualize stage). One row per sentence with debate, speaker, sentence
+        number, BERT label and score, VADER compound and one flag per context type.
+        """
+        records, texts = [], []
+        for debate, results in debate_results.items():
+            for speaker, data in results.items():
+                for i, sentence in enumerate(data['sentiment']['sentence_analysis']):
+                    records.append({
+                        'debate': debate,
+                        'speaker': speaker,
+                        'sentence': i,
+                        'bert_label': sentence['bert_label'],
+                        'bert_score': sentence['bert_score'],
+                        'vader_compound': sentence['vader_compound'],
+                        **{f'context_{kind}': kind in sentence['context'] for kind in self.context_types}
+                    })
+                    texts.append(sentence['sentence'])
+        return ResultTable.from_records(records, text=texts)
+
     def visualize_results(self, results, output_dir='./visualizations'):
         """Generate visualizations for analysis results"""
         # Ensure output directory exists
@@ -560,18 +685,18 @@ class AdvancedDebateAnalyzer:
         # Topic visualization using BERTopic
         for speaker, data in results.items():
             try:
-                topic_model = data['topics']['topic_model']
+                # Tópicos del modelo compartido, con los conteos de este orador
+                topic_info = data['topics']['topic_info']
                 # Asegurarse de que haya tópicos antes de visualizar
-                if len(topic_model.get_topic_info()) > 0:
+                if len(topic_info) > 0:
                     # Crear visualización estática en lugar de interactiva
                     fig, ax = plt.subplots(figsize=(15, 8))
-                    topic_info = topic_model.get_topic_info()
                     top_topics = topic_info.head(10)  # Mostrar solo los 10 principales tópicos
 
                     # Crear gráfico de barras para los tópicos
                     ax.barh(range(len(top_topics)), top_topics['Count'])
                     ax.set_yticks(range(len(top_topics)))
-                    ax.set_yticklabels([f"Topic {i}" for i in range(len(top_topics))])
+                    ax.set_yticklabels([f"Topic {i}" for i in top_topics['Topic']])
 
                     plt.title(f'Top 10 Topics for {speaker}')
                     plt.xlabel('Count')
@@ -586,43 +711,117 @@ class AdvancedDebateAnalyzer:
                 print(f"Error visualizing topics for {speaker}: {str(e)}")
                 continue
 
-def main():
+    def build_pipeline(self, debates, compare_speaker=None, backend='fp32',
+                       checkpoint_dir='checkpoints', output_dir='./visualizations'):
+        """Express the analysis as a graph of checkpointed stages
+
+        debates maps a debate name to (file path, speakers). Stage keys hash the
+        transcript contents, the tokenizer settings, the model names, the inference
+        backend, the VADER scorer and the context lexicons, so a rerun only executes the stages whose inputs changed.
+        """
+        pipeline = Pipeline(checkpoint_dir)
+        models = {'sentiment': self.sentiment_name, 'bert': self.bert_name, 'backend': backend}
+        # vader_compound comes from the vectorized lexicon scorer, not from vaderSentiment
+        vader = 'lexicon_sentiment.LexiconScorer'
+        # Sentence splits depend on the token cache's splitter and word tokenizer
+        tokenizer = get_cache().settings(True, 'english')
+        # Sentence contexts depend on the tagger's lexicons, not only on the defaults
+        tagger = self.context_tagger
+        contexts = text_hash(repr((tagger.categories, tagger.patterns, tagger.pattern_category.tolist())))
+
+        for debate, (path, speakers) in debates.items():
+            with open(path, 'r', encoding='utf-8') as f:
+                content = text_hash(f.read())
+            pipeline.add(f'extract:{debate}',
+                         lambda path, speakers: {s: load_transcript(path).speaker_text(s) for s in speakers},
+                         params={'path': path, 'speakers': list(speakers)}, fingerprint=content)
+
+            for speaker in speakers:
+                unit = f'{debate}:{speaker}'
+                pipeline.add(f'tokenize:{unit}',
+                             lambda texts, speaker: get_cache().sentences(texts[speaker]),
+                             deps=[f'extract:{debate}'], params={'speaker': speaker},
+                             fingerprint=tokenizer)
+                pipeline.add(f'sentiment:{unit}',
+                             lambda texts, sentences, speaker:
+                                 self.analyze_sentiment_advanced(texts[speaker], sentences),
+                             deps=[f'extract:{debate}', f'tokenize:{unit}'],
+                             params={'speaker': speaker}, version='2',
+                             fingerprint={**models, 'contexts': contexts, 'vader': vader})
+
+        # One BERTopic model over every speaker of every debate, on the cached BERT embeddings
+        units = [f'{debate}:{speaker}' for debate, (_, speakers) in debates.items() for speaker in speakers]
+        pipeline.add('topics',
+                     lambda *sentences, units: self.fit_topics(dict(zip(units, sentences))),
+                     deps=[f'tokenize:{unit}' for unit in units], params={'units': units},
+                     version='2', fingerprint={**models, 'chunk_size': self.topic_chunk_size})
+        for unit in units:
+            # Small per-speaker slices (no model inside), checkpointed so their digests are stable
+            pipeline.add(f'topics:{unit}', lambda shared, unit: shared[unit],
+                         deps=['topics'], params={'unit': unit})
+
+        for debate, (_, speakers) in debates.items():
+            # Plots are cheap and written to output_dir, so they are never checkpointed
+            pipeline.add(f'visualize:{debate}',
+                         lambda *outputs, speakers: self._visualize_stage(speakers, outputs, output_dir),
+                         deps=[f'{kind}:{debate}:{s}' for s in speakers for kind in ('sentiment', 'topics')],
+                         params={'speakers': list(speakers)}, checkpoint=False)
+
+        names = [debate for debate, (_, speakers) in debates.items() if compare_speaker in speakers]
+        if len(names) >= 2:
+            units = [f'{names[0]}:{compare_speaker}', f'{names[1]}:{compare_speaker}']
+            for debate, unit in zip(names, units):
+                pipeline.add(f'embed:{unit}',
+                             lambda texts, speaker: self.get_bert_embeddings(texts[speaker])[0],
+                             deps=[f'extract:{debate}'], params={'speaker': compare_speaker},
+                             fingerprint=models)
+            pipeline.add(f'compare:{compare_speaker}',
+                         lambda emb1, emb2, sentiment1, sentiment2, topics1, topics2: self._comparison(
+                             cosine_similarity(emb1.reshape(1, -1), emb2.reshape(1, -1))[0][0],
+                             sentiment1, sentiment2, topics1, topics2),
+                         deps=[f'{kind}:{unit}' for kind in ('embed', 'sentiment', 'topics') for unit in units])
+        return pipeline
+
+    def _visualize_stage(self, speakers, outputs, output_dir):
+        results = {
+            speaker: {'sentiment': outputs[2 * i], 'topics': outputs[2 * i + 1]}
+            for i, speaker in enumerate(speakers)
+        }
+        self.visualize_results(results, output_dir)
+        return results
+
+def main(dry_run=False):
+    # CPU inference backend: fp32 (default), int8 or onnx
+    backend = use_backend(os.environ.get('DEBATES_BACKEND', 'fp32'))
+
     # Initialize the analyzer
-    analyzer = AdvancedDebateAnalyzer()
-
-    # Read debate texts
-    print("Reading debate texts...")
-    with open('debate.txt', 'r', encoding='utf-8') as f:
-        debate1_text = f.read()
-    with open('debate2.txt', 'r', encoding='utf-8') as f:
-        debate2_text = f.read()
-
-    # Analyze first debate
-    print("\nAnalyzing first debate...")
-    debate1_results = analyzer.analyze_debate(
-        debate1_text,
-        ['TRUMP', 'BIDEN']
+    analyzer = AdvancedDebateAnalyzer(embedding_store='embedding_store')
+
+    # Stages are checkpointed under ./checkpoints; a rerun resumes from the completed ones
+    pipeline = analyzer.build_pipeline(
+        {
+            'debate1': ('debate.txt', ['TRUMP', 'BIDEN']),
+            'debate2': ('debate2.txt', ['TRUMP', 'HARRIS'])
+        },
+        compare_speaker='TRUMP',
+        backend=backend
     )
 
-    # Analyze second debate
-    print("\nAnalyzing second debate...")
-    debate2_results = analyzer.analyze_debate(
-        debate2_text,
-        ['TRUMP', 'HARRIS']
-    )
+    if dry_run:
+        print("Stages that would run:")
+        pipeline.run(dry_run=True)
+        return
 
-    # Compare Trump's performance across debates
-    print("\nComparing Trump's performance across debates...")
-    trump_comparison = analyzer.compare_debates(
-        debate1_text,
-        debate2_text,
-        'TRUMP'
-    )
+    # Analyze both debates, compare Trump's performance and generate visualizations;
+    # the comparison reuses the sentiment and topic stages of each debate
+    print("\nRunning analysis pipeline...")
+    outputs = pipeline.run()
+    debate1_results = outputs['visualize:debate1']
+    debate2_results = outputs['visualize:debate2']
+    trump_comparison = outputs['compare:TRUMP']
 
-    # Generate visualizations
-    print("\nGenerating visualizations...")
-    analyzer.visualize_results(debate1_results)
-    analyzer.visualize_results(debate2_results)
+    # One row per sentence; results_table.load('results/sentences') reopens it without rerunning models
+    analyzer.sentence_table({'debate1': debate1_results, 'debate2': debate2_results}).save('results/sentences')
 
     # Print summary statistics
     print("\nDebate 1 Analysis:")
@@ -643,4 +842,4 @@ def main():
     print(f"Semantic similarity between debates: {trump_comparison['semantic_similarity']:.3f}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(dry_run='--dry-run' in sys.argv)
\ No newline at end of file
@@ -18,30 +18,52 @@ Original file is located at
 
 import pandas as pd
 import numpy as np
-from transformers import (
-    BertTokenizer,
-    BertModel,
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    pipeline
-)
 import torch
-from sklearn.metrics.pairwise import cosine_similarity
 import re
 from tqdm import tqdm
+from transcript_index import index_for_text
+from token_cache import get_cache
+from speaker_similarity import similarity_frames, pairs
+from semantic_search import build_index
+from results_table import ResultTable
+from sentiment_series import analyze_series, timeline, align, speaker_series
+from embeddings import BatchedEmbedder
+from embedding_store import EmbeddingStore
+from sentiment import score_segments
+from model_registry import registry
+from inference_backend import use_backend
+import os
 import seaborn as sns
 import matplotlib.pyplot as plt
 
 class DebateAnalyzer:
-    def __init__(self):
-        # Inicializar modelos BERT y RoBERTa
-        self.bert_tokenizer = BertTokenizer.from_pretrained('bert-base-uncased')
-        self.bert_model = BertModel.from_pretrained('bert-base-uncased')
-        self.sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment",
-            tokenizer="cardiffnlp/twitter-roberta-base-sentiment"
-        )
+    def __init__(self, embedding_store=None):
+        # Los modelos BERT y RoBERTa se cargan bajo demanda desde el registro compartido
+        self.bert_name = 'bert-base-uncased'
+        self.sentiment_name = 'cardiffnlp/twitter-roberta-base-sentiment'
+        # Con embedding_store (directorio) los segmentos ya calculados en
+        # ejecuciones anteriores se leen del disco
+        self.embedding_store = EmbeddingStore(embedding_store) if embedding_store else None
+        # Ventanas de tokens para RoBERTa (None = contexto completo del modelo, sin solapamiento)
+        self.sentiment_window = None
+        self.sentiment_stride = None
+
+    @property
+    def bert_tokenizer(self):
+        return registry.get('backbone', self.bert_name)[0]
+
+    @property
+    def bert_model(self):
+        return registry.get('backbone', self.bert_name)[1]
+
+    @property
+    def sentiment_analyzer(self):
+        return registry.get('sentiment', self.sentiment_name)
+
+    @property
+    def embedder(self):
+        """Embeddings por lotes ordenados por longitud."""
+        return BatchedEmbedder(self.bert_tokenizer, self.bert_model, store=self.embedding_store)
 
     def preprocess_text(self, text):
         """Preprocesamiento avanzado del texto."""
@@ -54,102 +76,216 @@ class DebateAnalyzer:
 
     def extract_speaker_segments(self, text, speaker):
         """Extrae segmentos de un hablante específico."""
-        pattern = f"{speaker}:\\s+(.*?)(?=\\n\\w+:|$)"
-        segments = re.findall(pattern, text, re.DOTALL)
-        return [self.preprocess_text(s) for s in segments]
+        return [self.preprocess_text(s) for s in index_for_text(text).iter_texts(speaker)]
 
     def get_bert_embeddings(self, text):
         """Obtiene embeddings contextuales usando BERT."""
-        inputs = self.bert_tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        outputs = self.bert_model(**inputs)
-        return outputs.last_hidden_state.mean(dim=1).detach().numpy()
+        return self.embedder.embed([text])
 
-    def analyze_sentiment_roberta(self, text, chunk_size=500):
+    def analyze_sentiment_roberta(self, text):
         """Análisis de sentimiento avanzado usando RoBERTa."""
-        chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-        sentiments = []
-
-        for chunk in chunks:
-            try:
-                result = self.sentiment_analyzer(chunk)[0]
-                sentiments.append({
-                    'label': result['label'],
-                    'score': result['score']
-                })
-            except Exception as e:
-                print(f"Error en chunk: {e}")
-                continue
-
-        # Calcular sentimiento promedio
-        if sentiments:
-            avg_sentiment = np.mean([s['score'] for s in sentiments])
-            dominant_label = max(set([s['label'] for s in sentiments]),
-                               key=[s['label'] for s in sentiments].count)
-            return {'sentiment_score': avg_sentiment, 'dominant_label': dominant_label}
-        return {'sentiment_score': 0, 'dominant_label': 'NEUTRAL'}
+        if not text.strip():
+            return {'sentiment_score': 0, 'dominant_label': 'NEUTRAL', 'label_distribution': {}}
+        return self.analyze_sentiment_segments([text])[0]
+
+    def analyze_sentiment_segments(self, segments):
+        """Sentimiento RoBERTa para muchos segmentos a la vez.
+
+        Cada segmento se divide en ventanas de tokens; las ventanas de todos los
+        segmentos comparten lotes y se agregan por segmento ponderando por longitud.
+        """
+        scored = score_segments(
+            self.sentiment_analyzer.model,
+            self.sentiment_analyzer.tokenizer,
+            segments,
+            window=self.sentiment_window,
+            stride=self.sentiment_stride
+        )
+        names = scored['label_names']
+        return [
+            {
+                'sentiment_score': float(scored['scores'][i]),
+                'dominant_label': scored['labels'][i],
+                'label_distribution': dict(zip(names, scored['probs'][i].tolist()))
+            }
+            for i in range(len(segments))
+        ]
 
     def analyze_debate(self, debate_text, speakers):
         """Análisis completo del debate."""
+        return self.analyze_debates({'debate': (debate_text, speakers)})['debate']
+
+    def analyze_debates(self, debates):
+        """Análisis de varios debates con una sola pasada de embeddings.
+
+        debates: dict nombre -> (texto del debate, lista de oradores).
+        """
+        return self.nested_results(self.analyze_table(debates))
+
+    def analyze_table(self, debates):
+        """Como analyze_debates, pero como tabla columnar (una fila por segmento).
+
+        Columnas: debate, speaker, segment, turn (número de turno en el
+        debate), n_words, sentiment_score, dominant_label y prob_<etiqueta>;
+        los textos completos y los embeddings
+        (una matriz contigua) se referencian por fila. Se guarda con table.save.
+        """
+        # Reunir los segmentos de todos los oradores y debates
+        collected = []
+        for name, (debate_text, speakers) in debates.items():
+            for speaker in speakers:
+                turns = index_for_text(debate_text).select(speaker)['turn']
+                segments = zip(turns, self.extract_speaker_segments(debate_text, speaker))
+                segments = [(t, s) for t, s in segments if len(s.split()) >= 5]  # Skip very short segments
+                collected.extend((name, speaker, position, turn, segment)
+                                 for position, (turn, segment) in enumerate(segments))
+
+        texts = [segment for _, _, _, _, segment in collected]
+        embeddings = self.embedder.embed(texts)
+        sentiments = self.analyze_sentiment_segments(texts)
+
+        # Análisis por segmento
+        records = []
+        for row, (name, speaker, position, turn, segment) in enumerate(tqdm(collected, desc="Analizando segmentos")):
+            sentiment = sentiments[row]
+            records.append({
+                'debate': name,
+                'speaker': speaker,
+                'segment': position,
+                'turn': int(turn),
+                'n_words': len(segment.split()),
+                'sentiment_score': sentiment['sentiment_score'],
+                'dominant_label': sentiment['dominant_label'],
+                **{f'prob_{label}': p for label, p in sentiment['label_distribution'].items()}
+            })
+
+        return ResultTable.from_records(records, text=texts, embeddings=embeddings)
+
+    def nested_results(self, table):
+        """Resultados por debate y orador (formato de analyze_debates) a partir de la tabla."""
+        labels = [name[len('prob_'):] for name in table.columns if name.startswith('prob_')]
+        debates = table.column('debate')
+        speakers = table.column('speaker')
+        dominant = table.column('dominant_label')
         results = {}
-
-        for speaker in speakers:
-            segments = self.extract_speaker_segments(debate_text, speaker)
-            if not segments:
-                continue
-
-            # Análisis por segmento
-            segment_analysis = []
-            for segment in tqdm(segments, desc=f"Analizando {speaker}"):
-                if len(segment.split()) < 5:  # Skip very short segments
-                    continue
-
-                embeddings = self.get_bert_embeddings(segment)
-                sentiment = self.analyze_sentiment_roberta(segment)
-
-                segment_analysis.append({
-                    'text': segment[:100] + '...',
-                    'embeddings': embeddings,
-                    'sentiment': sentiment
-                })
-
-            results[speaker] = {
-                'segments': segment_analysis,
-                'total_segments': len(segment_analysis),
-                'avg_sentiment': np.mean([s['sentiment']['sentiment_score'] for s in segment_analysis])
-            }
+        for i in range(len(table)):
+            row = table.rows[i]
+            text = table.text(i)
+            results.setdefault(debates[i], {}).setdefault(speakers[i], []).append({
+                'text': text[:100] + '...',
+                'embeddings': table.embeddings[row['embedding_row']:row['embedding_row'] + 1],
+                'sentiment': {
+                    'sentiment_score': float(row['sentiment_score']),
+                    'dominant_label': dominant[i],
+                    'label_distribution': {label: float(row[f'prob_{label}']) for label in labels}
+                }
+            })
+
+        for name, speakers in results.items():
+            for speaker, segment_analysis in speakers.items():
+                speakers[speaker] = {
+                    'segments': segment_analysis,
+                    'total_segments': len(segment_analysis),
+                    'avg_sentiment': np.mean([s['sentiment']['sentiment_score'] for s in segment_analysis])
+                }
 
         return results
 
-    def compare_speakers(self, results):
-        """Compara los patrones de habla entre los oradores."""
-        comparisons = {}
-        speakers = list(results.keys())
-
-        for i in range(len(speakers)):
-            for j in range(i+1, len(speakers)):
-                speaker1, speaker2 = speakers[i], speakers[j]
-
-                # Comparar embeddings promedio
-                emb1 = np.mean([s['embeddings'] for s in results[speaker1]['segments']], axis=0)
-                emb2 = np.mean([s['embeddings'] for s in results[speaker2]['segments']], axis=0)
-                similarity = cosine_similarity(emb1.reshape(1, -1), emb2.reshape(1, -1))[0][0]
-
-                comparisons[f"{speaker1}_vs_{speaker2}"] = {
-                    'semantic_similarity': similarity,
-                    'sentiment_diff': abs(results[speaker1]['avg_sentiment'] -
-                                       results[speaker2]['avg_sentiment'])
-                }
-
-        return comparisons
+    def compare_speakers(self, results, debates=None):
+        """Compara todos los pares (debate, orador) de una sola vez.
+
+        results: salida de analyze_debate (un debate) o de analyze_debates.
+        debates: el mismo dict nombre -> (texto, oradores) de analyze_debates;
+        si se pasa, se añade el solapamiento léxico de los vocabularios.
+        Devuelve un dict métrica -> DataFrame con índice (debate, orador).
+        """
+        if any('segments' in data for data in results.values()):
+            results = {'debate': results}
+
+        labels, rows, owner, sentiment = [], [], [], []
+        for name, speakers in results.items():
+            for speaker, data in speakers.items():
+                if not data['segments']:
+                    continue
+                owner.extend([len(labels)] * len(data['segments']))
+                rows.extend(s['embeddings'] for s in data['segments'])
+                sentiment.append(data['avg_sentiment'])
+                labels.append((name, speaker))
+
+        token_ids = None
+        if debates is not None:
+            cache = get_cache()
+            token_ids = [
+                cache.tokens(index_for_text(debates[name][0]).speaker_text(speaker), content_only=True)
+                for name, speaker in labels
+            ]
+
+        return similarity_frames(
+            labels,
+            embeddings=np.vstack(rows),
+            owner=owner,
+            sentiment=sentiment,
+            token_id_arrays=token_ids
+        )
 
-    def plot_sentiment_evolution(self, results, speaker):
-        """Visualiza la evolución del sentimiento durante el debate."""
+    def build_search_index(self, table, kind='auto'):
+        """Índice de búsqueda semántica con los embeddings de todos los segmentos.
+
+        table: salida de analyze_table. Cada etiqueta es (debate, orador, turno
+        en la transcripción) y cada resultado lleva el texto completo del
+        segmento; las consultas por texto usan el mismo embedder (y su caché
+        en disco).
+        """
+        labels = list(zip(table.column('debate'), table.column('speaker'),
+                          table.column('turn').tolist()))
+        embeddings = table.embeddings[table.rows['embedding_row']]
+        return build_index(embeddings, labels, table.texts(), embed=self.embedder.embed, kind=kind)
+
+    def sentiment_timeline(self, table, window_size=5):
+        """Series de sentimiento de cada orador sobre los turnos de su debate.
+
+        table: salida de analyze_table. Media móvil de window_size segmentos,
+        EWMA, volatilidad y cambios de tono, calculados una sola vez para
+        todos los gráficos (ver sentiment_series.timeline).
+        """
+        frame = table.to_frame()[['debate', 'speaker', 'turn', 'segment', 'sentiment_score']]
+        return timeline(frame, 'sentiment_score', window=window_size, min_size=3, order=('turn',))
+
+    def plot_sentiment_evolution(self, results, speaker, window_size=5, analytics=None):
+        """Visualiza la evolución del sentimiento durante el debate.
+
+        analytics: las filas del orador en sentiment_timeline (si no se pasa,
+        las series se calculan aquí con window_size).
+        """
         sentiments = [s['sentiment']['sentiment_score'] for s in results[speaker]['segments']]
+        if analytics is None:
+            analytics = analyze_series(sentiments, window=window_size, min_size=3)
+        mean = np.asarray(analytics['rolling_mean'])
+        volatility = np.nan_to_num(np.asarray(analytics['volatility']))
         plt.figure(figsize=(12, 6))
-        plt.plot(sentiments)
+        plt.plot(sentiments, alpha=0.3, label='Segmento')
+        plt.plot(mean, label=f'Media móvil ({window_size})')
+        plt.fill_between(np.arange(len(mean)), mean - volatility, mean + volatility, alpha=0.15)
+        plt.plot(np.asarray(analytics['ewma']), label='EWMA')
+        for change in np.flatnonzero(np.asarray(analytics['change_point'])):
+            plt.axvline(x=change, color='gray', linestyle=':')
         plt.title(f'Sentiment Evolution - {speaker}')
         plt.xlabel('Debate Segment')
         plt.ylabel('Sentiment Score')
+        plt.legend()
+        plt.grid(True)
+        plt.show()
+
+    def plot_sentiment_timeline(self, sentiment_timeline, debate, column='ewma'):
+        """Serie de cada orador alineada sobre los segmentos de todo el debate."""
+        aligned = align(sentiment_timeline, column, debate=debate)
+        plt.figure(figsize=(12, 6))
+        for speaker in aligned.columns:
+            plt.plot(aligned.index, aligned[speaker], label=speaker)
+        plt.title(f'Sentiment Timeline - {debate}')
+        plt.xlabel('Debate Segment (all speakers)')
+        plt.ylabel(f'Sentiment Score ({column})')
+        plt.legend()
         plt.grid(True)
         plt.show()
 
@@ -162,20 +298,36 @@ if __name__ == "__main__":
     with open('debate2.txt', 'r', encoding='utf-8') as f:
         debate2_text = f.read()
 
-    analyzer = DebateAnalyzer()
-
-    # Analizar primer debate
-    print("Analizando Primer Debate...")
-    debate1_results = analyzer.analyze_debate(debate1_text, ['TRUMP', 'BIDEN'])
-
-    # Analizar segundo debate
-    print("\nAnalizando Segundo Debate...")
-    debate2_results = analyzer.analyze_debate(debate2_text, ['TRUMP', 'HARRIS'])
-
-    # Comparar oradores
+    # Backend de inferencia en CPU: fp32 (por defecto), int8 u onnx
+    use_backend(os.environ.get('DEBATES_BACKEND', 'fp32'))
+    analyzer = DebateAnalyzer(embedding_store='embedding_store')
+
+    # Analizar ambos debates (los embeddings se calculan en una sola pasada por lotes)
+    print("Analizando Debates...")
+    segment_table = analyzer.analyze_table({
+        'debate1': (debate1_text, ['TRUMP', 'BIDEN']),
+        'debate2': (debate2_text, ['TRUMP', 'HARRIS']),
+    })
+    # Tabla columnar en disco: results_table.load('results/segments') la abre sin recalcular
+    segment_table.save('results/segments')
+    all_results = analyzer.nested_results(segment_table)
+    debate1_results = all_results['debate1']
+    debate2_results = all_results['debate2']
+
+    # Comparar todos los oradores de ambos debates entre sí (matrices orador x debate)
     print("\nComparando oradores...")
-    debate1_comparisons = analyzer.compare_speakers(debate1_results)
-    debate2_comparisons = analyzer.compare_speakers(debate2_results)
+    comparisons = analyzer.compare_speakers(all_results, debates={
+        'debate1': (debate1_text, ['TRUMP', 'BIDEN']),
+        'debate2': (debate2_text, ['TRUMP', 'HARRIS']),
+    })
+    print(pairs(comparisons).to_string(index=False))
+
+    # Búsqueda semántica sobre todos los segmentos (el índice se guarda para consultas posteriores)
+    search_index = analyzer.build_search_index(segment_table)
+    search_index.save('segment_index.npz')
+    result = search_index.search_text("the economy and inflation", k=5, speakers='TRUMP')
+    print(f"\nSegmentos de TRUMP más cercanos a la consulta ({result['latency_ms']:.1f} ms):")
+    print(result['hits'].to_string(index=False))
 
     # Imprimir resultados
     print("\nResultados del Primer Debate:")
@@ -190,95 +342,98 @@ if __name__ == "__main__":
         print(f"Segmentos totales: {data['total_segments']}")
         print(f"Sentimiento promedio: {data['avg_sentiment']:.3f}")
 
+    # Series de sentimiento (media móvil, EWMA, volatilidad, cambios de tono) calculadas
+    # una sola vez sobre la tabla y reutilizadas por todos los gráficos
+    sentiment_timeline = analyzer.sentiment_timeline(segment_table)
+    changes = sentiment_timeline[sentiment_timeline['change_point']]
+    print("\nCambios de tono (debate, orador, turno):")
+    print(changes[['debate', 'speaker', 'turn', 'level']].to_string(index=False))
+
     # Visualizar evolución del sentimiento
     for speaker in debate1_results:
-        analyzer.plot_sentiment_evolution(debate1_results, speaker)
+        analyzer.plot_sentiment_evolution(debate1_results, speaker,
+                                          analytics=speaker_series(sentiment_timeline, 'debate1', speaker))
 
     for speaker in debate2_results:
-        analyzer.plot_sentiment_evolution(debate2_results, speaker)
+        analyzer.plot_sentiment_evolution(debate2_results, speaker,
+                                          analytics=speaker_series(sentiment_timeline, 'debate2', speaker))
+
+    analyzer.plot_sentiment_timeline(sentiment_timeline, 'debate1')
+    analyzer.plot_sentiment_timeline(sentiment_timeline, 'debate2')
 
 import re
 import numpy as np
 from collections import defaultdict
 import nltk
-from nltk.tokenize import word_tokenize
 nltk.download('punkt_tab')
 
 # Descargar recursos necesarios de NLTK
 nltk.download('punkt')
 nltk.download('stopwords')
 from nltk.corpus import stopwords
+from transcript_index import index_for_text
+from token_cache import get_cache
+import lexical_diversity
 
 class LexicalDiversityAnalyzer:
-    def __init__(self, min_factor_length=10):
+    def __init__(self, min_factor_length=10, window=50, sample_size=42):
         self.min_factor_length = min_factor_length
+        self.window = window
+        self.sample_size = sample_size
         self.stop_words = set(stopwords.words('english'))
 
+    def tokens(self, text):
+        """Ids de los tokens en minúsculas sin stopwords (del caché compartido)"""
+        cache = get_cache()
+        ids = cache.tokens(text)
+        vocabulary = cache.vocabulary
+        stop_mask = np.zeros(len(vocabulary), dtype=bool)
+        stop_mask[[vocabulary.ids[w] for w in self.stop_words if w in vocabulary.ids]] = True
+        return ids[~stop_mask[ids]]
+
     def calculate_mtld(self, text, ttr_threshold=0.72):
         """Calculate MTLD score"""
-        tokens = [t.lower() for t in word_tokenize(text) if t.lower() not in self.stop_words]
-        if len(tokens) < self.min_factor_length:
-            return 0
-
-        def factor_count(tokens_list, forward=True):
-            factors = 0
-            token_count = 0
-            types = set()
-
-            if not forward:
-                tokens_list = tokens_list[::-1]
-
-            for token in tokens_list:
-                token_count += 1
-                types.add(token)
-                ttr = len(types) / token_count
-
-                if ttr <= ttr_threshold:
-                    factors += 1
-                    token_count = 0
-                    types = set()
-
-            if token_count > 0:
-                ttr = len(types) / token_count
-                factors += (1 - ttr) / (1 - ttr_threshold)
-
-            return factors
-
-        forward_factors = factor_count(tokens)
-        backward_factors = factor_count(tokens, forward=False)
-
-        if forward_factors == 0 or backward_factors == 0:
-            return 0
+        return lexical_diversity.mtld(self.tokens(text), ttr_threshold, self.min_factor_length)
+
+    def calculate_mattr(self, text):
+        """Moving-average TTR over windows of self.window tokens"""
+        return lexical_diversity.mattr(self.tokens(text), self.window)
+
+    def calculate_hdd(self, text):
+        """HD-D (hypergeometric distribution diversity)"""
+        return lexical_diversity.hdd(self.tokens(text), self.sample_size)
+
+    def calculate_all(self, texts, ttr_threshold=0.72):
+        """TTR, MTLD, MATTR and HD-D for many texts in one batch (dict metric -> array)"""
+        return lexical_diversity.diversity(
+            [self.tokens(text) for text in texts],
+            threshold=ttr_threshold,
+            window=self.window,
+            sample_size=self.sample_size,
+            min_length=self.min_factor_length
+        )
 
-        mtld = len(tokens) / ((forward_factors + backward_factors) / 2)
-        return mtld
+    def turn_diversity(self, text, candidates):
+        """Per-turn metrics for each candidate, aligned with the candidate's turns"""
+        index = index_for_text(text)
+        return {
+            candidate: self.calculate_all(index.iter_texts(candidate))
+            for candidate in candidates
+            if index.speaker_id(candidate) >= 0
+        }
 
 def extract_speeches(text, candidates):
     """Extract speeches for each candidate from debate text"""
-    speeches = defaultdict(str)
-    lines = text.split('\n')
-    current_speaker = None
-
-    for line in lines:
-        # Buscar indicadores de orador (nombres en mayúsculas seguidos de dos puntos)
-        speaker_match = re.match(r'^([A-Z][A-Z\s]+):', line)
-
-        if speaker_match:
-            speaker = speaker_match.group(1).strip()
-            if speaker in candidates:
-                current_speaker = speaker
-            else:
-                current_speaker = None
-            continue
-
-        if current_speaker:
-            speeches[current_speaker] += line.strip() + " "
+    index = index_for_text(text)
+    speeches = {}
 
-    # Limpiar espacios extra
-    for candidate in speeches:
-        speeches[candidate] = re.sub(r'\s+', ' ', speeches[candidate]).strip()
+    for candidate in candidates:
+        if index.speaker_id(candidate) < 0:
+            continue
+        # Limpiar espacios extra (una sola unión por candidato, sin concatenar línea a línea)
+        speeches[candidate] = re.sub(r'\s+', ' ', index.speaker_text(candidate)).strip()
 
-    return dict(speeches)
+    return speeches
 
 def analyze_debates(debate1_text, debate2_text):
     """Analyze both debates"""
@@ -296,15 +451,22 @@ def analyze_debates(debate1_text, debate2_text):
 def analyze_all_speeches(debates):
     """Analyze lexical diversity for all speeches"""
     analyzer = LexicalDiversityAnalyzer()
-    results = {}
-
-    for debate_name, speeches in debates.items():
-        results[debate_name] = {}
-        for candidate, speech in speeches.items():
-            results[debate_name][candidate] = {
-                'mtld': analyzer.calculate_mtld(speech),
-                'word_count': len(speech.split())
-            }
+    units = [(debate_name, candidate, speech)
+             for debate_name, speeches in debates.items()
+             for candidate, speech in speeches.items()]
+
+    # Todas las métricas de todos los discursos en un solo lote
+    metrics = analyzer.calculate_all([speech for _, _, speech in units])
+
+    results = {debate_name: {} for debate_name in debates}
+    for i, (debate_name, candidate, speech) in enumerate(units):
+        results[debate_name][candidate] = {
+            'mtld': float(metrics['mtld'][i]),
+            'mattr': float(metrics['mattr'][i]),
+            'hdd': float(metrics['hdd'][i]),
+            'ttr': float(metrics['ttr'][i]),
+            'word_count': len(speech.split())
+        }
 
     return results
 
@@ -323,6 +485,8 @@ def run_analysis(debate1_text, debate2_text):
             print(f"\n{candidate}:")
             print(f"Palabras totales: {scores['word_count']}")
             print(f"MTLD Score: {scores['mtld']:.2f}")
+            print(f"MATTR: {scores['mattr']:.4f}")
+            print(f"HD-D: {scores['hdd']:.4f}")
 
 
     return results
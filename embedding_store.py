@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Almacén persistente de embeddings en disco (memory-mapped).
+
+Los vectores se anexan a un archivo binario y un índice JSONL, también de
+solo anexión, guarda para cada clave (modelo, revisión, pooling, hash del
+texto) su desplazamiento. Las consultas leen del archivo mapeado en memoria
+sin pasar por el modelo; `compact` reescribe el almacén sin entradas repetidas.
+
+Uso desde la línea de comandos:
+    python embedding_store.py compact DIRECTORIO
+    python embedding_store.py stats DIRECTORIO
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+
+VECTORS_FILE = 'vectors.bin'
+INDEX_FILE = 'index.jsonl'
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def make_key(model_name, revision, pooling, text):
+    return f'{model_name}@{revision or "main"}|{pooling}|{text_hash(text)}'
+
+
+class EmbeddingStore:
+    """Embeddings float32/float16 indexados por clave, en un directorio."""
+
+    def __init__(self, path, dtype='float32'):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._index = {}
+        self._data = None
+        os.makedirs(path, exist_ok=True)
+
+        index_path = os.path.join(path, INDEX_FILE)
+        if os.path.exists(index_path):
+            self._load_index(index_path)
+
+    def _load_index(self, index_path):
+        with open(index_path, 'rb') as f:
+            lines = f.readlines()
+        position = 0
+        for number, line in enumerate(lines):
+            start, position = position, position + len(line)
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                if number < len(lines) - 1:
+                    raise
+                # Última línea a medio escribir (corte durante un anexo): se descarta
+                # y se recorta el archivo para que el siguiente anexo empiece limpio
+                with open(index_path, 'r+b') as f:
+                    f.truncate(start)
+                break
+            # La última escritura de una clave es la vigente
+            self._index[entry['key']] = (entry['offset'], entry['dim'], entry['dtype'])
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.path, VECTORS_FILE)
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, INDEX_FILE)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def _mapped(self):
+        if self._data is None and os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path):
+            self._data = np.memmap(self.vectors_path, dtype=np.uint8, mode='r')
+        return self._data
+
+    def get(self, key):
+        """Vector float32 de la clave, o None si no está almacenado."""
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        offset, dim, dtype = entry
+        dtype = np.dtype(dtype)
+        raw = self._mapped()[offset:offset + dim * dtype.itemsize]
+        return raw.view(dtype).astype(np.float32, copy=False)
+
+    def get_many(self, keys):
+        """(matriz float32 con las filas encontradas, máscara de aciertos)."""
+        hits = np.fromiter((k in self._index for k in keys), dtype=bool, count=len(keys))
+        vectors = [self.get(k) for k, hit in zip(keys, hits) if hit]
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32), hits
+        return np.vstack(vectors), hits
+
+    def put_many(self, keys, vectors):
+        """Anexa los vectores (una fila por clave) al almacén.
+
+        Una clave repetida en el lote se guarda una sola vez (la última fila).
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=self.dtype)
+        if not len(keys):
+            return
+        rows = {key: i for i, key in enumerate(keys)}
+        if len(rows) < len(keys):
+            keys = list(rows)
+            vectors = vectors[list(rows.values())]
+        with open(self.vectors_path, 'ab') as data, open(self.index_path, 'a', encoding='utf-8') as index:
+            offset = data.tell()
+            data.write(vectors.tobytes())
+            # Los vectores deben llegar al disco antes que las entradas que los apuntan
+            data.flush()
+            row_bytes = vectors.shape[1] * self.dtype.itemsize
+            for i, key in enumerate(keys):
+                entry = (offset + i * row_bytes, int(vectors.shape[1]), self.dtype.name)
+                index.write(json.dumps({'key': key, 'offset': entry[0], 'dim': entry[1],
+                                        'dtype': entry[2]}) + '\n')
+                self._index[key] = entry
+        # El mapeo anterior no ve los bytes nuevos
+        self._data = None
+
+    def compact(self):
+        """Reescribe el almacén con una sola copia de cada clave vigente."""
+        tmp_vectors = self.vectors_path + '.tmp'
+        tmp_index = self.index_path + '.tmp'
+        new_index = {}
+        with open(tmp_vectors, 'wb') as data, open(tmp_index, 'w', encoding='utf-8') as index:
+            for key, (offset, dim, dtype) in self._index.items():
+                size = dim * np.dtype(dtype).itemsize
+                new_offset = data.tell()
+                data.write(self._mapped()[offset:offset + size].tobytes())
+                index.write(json.dumps({'key': key, 'offset': new_offset, 'dim': dim,
+                                        'dtype': dtype}) + '\n')
+                new_index[key] = (new_offset, dim, dtype)
+
+        self._data = None
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_index, self.index_path)
+        self._index = new_index
+
+    def stats(self):
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        live = sum(dim * np.dtype(dtype).itemsize for _, dim, dtype in self._index.values())
+        return {'entries': len(self._index), 'file_bytes': size, 'live_bytes': live}
+
+
+def cached_embeddings(store, keys, texts, compute):
+    """Devuelve los embeddings de texts y solo llama a compute con los que faltan."""
+    found, hits = store.get_many(keys)
+    if hits.all():
+        return found
+
+    missing = np.flatnonzero(~hits)
+    # Textos repetidos en el lote se calculan una sola vez
+    first = {}
+    for i in missing:
+        first.setdefault(keys[i], i)
+    unique = list(first.values())
+    computed = compute([texts[i] for i in unique])
+    store.put_many([keys[i] for i in unique], computed)
+    if len(unique) < len(missing):
+        row = {keys[i]: r for r, i in enumerate(unique)}
+        computed = computed[[row[keys[i]] for i in missing]]
+
+    out = np.empty((len(texts), computed.shape[1]), dtype=np.float32)
+    out[missing] = computed
+    if hits.any():
+        out[hits] = found
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ('compact', 'stats'):
+        print(__doc__)
+        sys.exit(1)
+
+    store = EmbeddingStore(sys.argv[2])
+    if sys.argv[1] == 'compact':
+        before = store.stats()
+        store.compact()
+        after = store.stats()
+        print(f"Compactado: {before['file_bytes']} -> {after['file_bytes']} bytes "
+              f"({after['entries']} embeddings)")
+    else:
+        for name, value in store.stats().items():
+            print(f"{name}: {value}")
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Embeddings por lotes para los segmentos de los debates.
+
+Todos los segmentos (de todos los oradores y debates) se tokenizan juntos,
+se ordenan por longitud en lotes con el mínimo relleno y se procesan con
+torch.inference_mode(). El resultado es una matriz float32 contigua cuya
+fila i corresponde al texto i. Con un EmbeddingStore, los textos ya
+calculados (mismo modelo, revisión y pooling) se leen del disco.
+"""
+
+import numpy as np
+import torch
+
+from batching import length_bucketed_batches
+from embedding_store import cached_embeddings, make_key
+
+
+class BatchedEmbedder:
+    """Calcula embeddings (media de last_hidden_state) por lotes."""
+
+    def __init__(self, tokenizer, model, batch_size=32, max_length=512, max_tokens=None, store=None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.max_tokens = max_tokens
+        self.store = store
+
+    def _keys(self, texts, pooling):
+        config = self.model.config
+        revision = getattr(config, '_commit_hash', None)
+        # Los embeddings de int8/ONNX no son intercambiables con los de fp32
+        backend = getattr(self.model, 'inference_backend', 'fp32')
+        if backend != 'fp32':
+            pooling = f'{pooling}|{backend}'
+        return [make_key(config._name_or_path, revision, pooling, text) for text in texts]
+
+    def _cached(self, texts, pooling, compute):
+        texts = list(texts)
+        if self.store is None or not texts:
+            return compute(texts)
+        return cached_embeddings(self.store, self._keys(texts, pooling), texts, compute)
+
+    @property
+    def dim(self):
+        return self.model.config.hidden_size
+
+    def _encode(self, texts):
+        return self.tokenizer(list(texts), truncation=True, max_length=self.max_length)['input_ids']
+
+    def embed_ids(self, input_ids):
+        """Embeddings para secuencias ya tokenizadas (con tokens especiales)."""
+        out = np.zeros((len(input_ids), self.dim), dtype=np.float32)
+        if not input_ids:
+            return out
+
+        lengths = [len(ids) for ids in input_ids]
+        if hasattr(self.model, 'eval'):
+            self.model.eval()
+        with torch.inference_mode():
+            for batch in length_bucketed_batches(lengths, self.batch_size, self.max_tokens):
+                inputs = self.tokenizer.pad(
+                    {'input_ids': [input_ids[i] for i in batch]}, return_tensors='pt'
+                )
+                hidden = self.model(**inputs).last_hidden_state
+                # Media solo sobre los tokens reales, ignorando el relleno
+                mask = inputs['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                out[batch] = pooled.float().numpy()
+        return out
+
+    def embed(self, texts):
+        """Matriz (len(texts), dim) en float32, truncando cada texto a max_length tokens."""
+        return self._cached(texts, f'mean:{self.max_length}',
+                            lambda missing: self.embed_ids(self._encode(missing)))
+
+    def embed_long(self, texts):
+        """Como embed, pero los textos largos se parten en ventanas y se promedian."""
+        return self._cached(texts, f'mean-windows:{self.max_length}', self._embed_windows)
+
+    def _embed_windows(self, texts):
+        # [CLS] ventana [SEP] (o <s> ventana </s> en RoBERTa)
+        cls_id, sep_id = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id
+        window = self.max_length - 2
+        encoded = self.tokenizer(list(texts), add_special_tokens=False, truncation=False,
+                                 verbose=False)['input_ids']
+
+        owners, weights, windows = [], [], []
+        for i, ids in enumerate(encoded):
+            for start in range(0, max(len(ids), 1), window):
+                chunk = ids[start:start + window]
+                windows.append([cls_id] + chunk + [sep_id])
+                owners.append(i)
+                weights.append(max(len(chunk), 1))
+
+        chunk_embeddings = self.embed_ids(windows)
+        owners = np.asarray(owners, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+
+        # Promedio ponderado por longitud de cada ventana
+        out = np.zeros((len(encoded), self.dim), dtype=np.float32)
+        np.add.at(out, owners, chunk_embeddings * weights[:, None])
+        out /= np.bincount(owners, weights=weights, minlength=len(encoded))[:, None].astype(np.float32)
+        return out
+
+
+def embed_turns(corpus, embedder, rows=None, preprocess=None):
+    """Embeddings alineados con las filas del índice de turnos (TranscriptIndex o DebateCorpus)."""
+    if rows is None:
+        rows = corpus.turns
+    texts = (corpus.turn_text(row) for row in rows)
+    if preprocess is not None:
+        texts = (preprocess(text) for text in texts)
+    return embedder.embed(list(texts))
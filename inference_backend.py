@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Backends de inferencia en CPU: fp32, int8 dinámico y ONNX Runtime.
+
+`use_backend('int8')` hace que el registro de modelos cuantice las capas
+lineales de BERT/RoBERTa a int8 al cargarlas; 'onnx' usa ONNX Runtime si
+optimum[onnxruntime] está instalado (si no, se queda en int8). La
+comprobación de precisión compara el backend con la referencia fp32 sobre una
+muestra: deriva coseno de los embeddings y acuerdo de etiquetas de sentimiento.
+
+Uso desde la línea de comandos:
+    python inference_backend.py int8 debate.txt debate2.txt
+"""
+
+import sys
+import time
+
+import numpy as np
+import torch
+
+from model_registry import LOADERS, registry
+
+BACKENDS = ('fp32', 'int8', 'onnx')
+
+
+def quantize_model(model):
+    """Copia del modelo con las capas nn.Linear cuantizadas dinámicamente a int8."""
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized.inference_backend = 'int8'
+    return quantized
+
+
+def onnx_available():
+    try:
+        import optimum.onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _load_onnx(kind, name):
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTModelForSequenceClassification
+    from transformers import AutoTokenizer, pipeline
+
+    tokenizer = AutoTokenizer.from_pretrained(name)
+    if kind == 'backbone':
+        model = ORTModelForFeatureExtraction.from_pretrained(name, export=True)
+        model.inference_backend = 'onnx'
+        return tokenizer, model
+    model = ORTModelForSequenceClassification.from_pretrained(name, export=True)
+    model.inference_backend = 'onnx'
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
+
+
+def apply_backend(kind, name, loaded, backend):
+    """Convierte un modelo ya cargado (tupla de backbone o pipeline) al backend pedido."""
+    if backend == 'fp32' or kind not in ('backbone', 'sentiment'):
+        return loaded
+    if backend == 'onnx':
+        return _load_onnx(kind, name)
+    if kind == 'backbone':
+        tokenizer, model = loaded
+        return tokenizer, quantize_model(model)
+    loaded.model = quantize_model(loaded.model)
+    return loaded
+
+
+def use_backend(backend, model_registry=registry):
+    """Selecciona el backend con el que el registro cargará los transformers."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {backend} (opciones: {', '.join(BACKENDS)})")
+    if backend == 'onnx' and not onnx_available():
+        print("ONNX Runtime no está disponible; se usa int8 dinámico")
+        backend = 'int8'
+
+    for kind in ('backbone', 'sentiment'):
+        base = LOADERS[kind]
+
+        def loader(name, kind=kind, base=base):
+            if backend == 'onnx':
+                return _load_onnx(kind, name)
+            return apply_backend(kind, name, base(name), backend)
+
+        model_registry.register(kind, loader)
+        for loaded_kind, name in model_registry.loaded():
+            if loaded_kind == kind:
+                model_registry.release(kind, name)
+    return backend
+
+
+def _cosines(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True).clip(min=1e-12)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True).clip(min=1e-12)
+    return (a * b).sum(axis=1)
+
+
+def accuracy_check(texts, backend='int8', backbone_name='bert-base-uncased',
+                   sentiment_name='cardiffnlp/twitter-roberta-base-sentiment'):
+    """Compara un backend con la referencia fp32 sobre una muestra de textos."""
+    from embeddings import BatchedEmbedder
+    from sentiment import classify
+
+    texts = list(texts)
+    reference = {kind: LOADERS[kind](name) for kind, name in
+                 (('backbone', backbone_name), ('sentiment', sentiment_name))}
+    report = {'backend': backend, 'n_texts': len(texts)}
+
+    start = time.perf_counter()
+    ref_embeddings = BatchedEmbedder(*reference['backbone']).embed(texts)
+    ref_pipe = reference['sentiment']
+    ref_probs = classify(ref_pipe.model, ref_pipe.tokenizer, texts)
+    report['fp32_seconds'] = time.perf_counter() - start
+
+    candidate = {kind: apply_backend(kind, name, LOADERS[kind](name), backend) for kind, name in
+                 (('backbone', backbone_name), ('sentiment', sentiment_name))}
+    start = time.perf_counter()
+    cand_embeddings = BatchedEmbedder(*candidate['backbone']).embed(texts)
+    cand_pipe = candidate['sentiment']
+    cand_probs = classify(cand_pipe.model, cand_pipe.tokenizer, texts)
+    report['backend_seconds'] = time.perf_counter() - start
+
+    cosines = _cosines(ref_embeddings, cand_embeddings)
+    report['embedding_cosine_mean'] = float(cosines.mean()) if len(cosines) else 1.0
+    report['embedding_cosine_min'] = float(cosines.min()) if len(cosines) else 1.0
+    report['sentiment_label_agreement'] = (
+        float((ref_probs.argmax(axis=1) == cand_probs.argmax(axis=1)).mean()) if len(texts) else 1.0
+    )
+    report['sentiment_max_prob_diff'] = float(np.abs(ref_probs - cand_probs).max()) if len(texts) else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in BACKENDS:
+        print(__doc__)
+        sys.exit(1)
+
+    from transcript_index import DebateCorpus
+
+    corpus = DebateCorpus.from_files(sys.argv[2:])
+    sample = [text for text in corpus.iter_texts() if len(text.split()) >= 5][:64]
+    for name, value in accuracy_check(sample, backend=sys.argv[1]).items():
+        print(f"{name}: {value}")
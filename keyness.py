@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Keyness vectorizado entre oradores y debates.
+
+Se construye una sola vez la matriz de frecuencias (corpus x término) y se
+calculan log-likelihood, chi-cuadrado, log-ratio y %DIFF para todos los
+términos y todos los pares de corpus en una sola pasada de NumPy.
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+METRICS = ('log_likelihood', 'chi_square', 'log_ratio', 'percent_diff')
+
+
+def count_matrix(token_id_arrays, vocab_size=None):
+    """Matriz (n_corpus, vocab_size) de frecuencias a partir de arrays de ids."""
+    token_id_arrays = [np.asarray(ids, dtype=np.int64) for ids in token_id_arrays]
+    if vocab_size is None:
+        vocab_size = max((int(ids.max()) + 1 for ids in token_id_arrays if len(ids)), default=0)
+    counts = np.zeros((len(token_id_arrays), vocab_size), dtype=np.int64)
+    for row, ids in enumerate(token_id_arrays):
+        counts[row] = np.bincount(ids, minlength=vocab_size)
+    return counts
+
+
+def all_pairs(n_corpora):
+    """Todos los pares (i, j) con i < j."""
+    return np.array(list(combinations(range(n_corpora), 2)), dtype=np.int64).reshape(-1, 2)
+
+
+def keyness(counts, pairs=None):
+    """Métricas de keyness para cada par (objetivo, referencia) y cada término.
+
+    Devuelve un dict métrica -> array (n_pares, vocab_size) y 'direction'
+    (+1 si el término es más frecuente en el objetivo, -1 si en la referencia).
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    if pairs is None:
+        pairs = all_pairs(len(counts))
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+
+    a = counts[pairs[:, 0]]
+    b = counts[pairs[:, 1]]
+    c = counts.sum(axis=1)[pairs[:, 0]][:, None]
+    d = counts.sum(axis=1)[pairs[:, 1]][:, None]
+    n = c + d
+    ab = a + b
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected1 = c * ab / n
+        expected2 = d * ab / n
+        # 0 * log(0) = 0
+        ll = 2 * (np.where(a > 0, a * np.log(a / expected1), 0.0) +
+                  np.where(b > 0, b * np.log(b / expected2), 0.0))
+
+        chi2 = n * (a * (d - b) - b * (c - a)) ** 2 / (ab * (n - ab) * c * d)
+        chi2 = np.nan_to_num(chi2, nan=0.0, posinf=0.0)
+
+        norm_a = a / c
+        norm_b = b / d
+        # Frecuencias nulas se sustituyen por 0.5 (Hardie, 2014)
+        log_ratio = np.log2(np.where(a > 0, a, 0.5) / c) - np.log2(np.where(b > 0, b, 0.5) / d)
+        percent_diff = (norm_a - norm_b) * 100 / np.where(norm_b > 0, norm_b, 1e-18)
+
+    return {
+        'pairs': pairs,
+        'log_likelihood': ll,
+        'chi_square': chi2,
+        'log_ratio': log_ratio,
+        'percent_diff': percent_diff,
+        'direction': np.sign(norm_a - norm_b).astype(np.int8),
+    }
+
+
+def top_k(scores, k):
+    """Índices de los k mayores valores a lo largo del último eje, ordenados de mayor a menor."""
+    scores = np.asarray(scores)
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1, kind='stable')
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def top_keywords(table, vocabulary, metric='log_likelihood', k=20):
+    """Lista por par de [(palabra, valor)] con los k términos más clave."""
+    scores = table[metric]
+    indices = top_k(scores, k)
+    return [
+        [(vocabulary[i], float(scores[p, i])) for i in indices[p]]
+        for p in range(len(scores))
+    ]
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Diversidad léxica (MTLD, MATTR, HD-D) sobre tokens codificados como enteros.
+
+- MTLD recorre los ids hacia adelante y hacia atrás (sin invertir la lista)
+  marcando en un arreglo el último factor en que apareció cada tipo.
+- MATTR cuenta los tipos distintos de todas las ventanas a la vez: el token j
+  aporta a las ventanas que lo contienen y no contienen su siguiente aparición,
+  un rango que se suma con un arreglo de diferencias y una suma acumulada (O(n)).
+- HD-D usa una tabla precalculada de log-factoriales para la probabilidad
+  hipergeométrica de que cada tipo aparezca en una muestra de 42 tokens.
+
+Las funciones `batch_*` procesan muchos textos (p. ej. todos los turnos de un
+corpus) en una sola pasada vectorizada.
+"""
+
+import numpy as np
+from scipy.special import gammaln
+
+DEFAULT_TTR_THRESHOLD = 0.72
+DEFAULT_WINDOW = 50
+DEFAULT_SAMPLE_SIZE = 42
+
+
+def _concat(token_id_arrays):
+    """(ids concatenados, longitudes, inicio de cada array)."""
+    arrays = [np.asarray(ids, dtype=np.int64) for ids in token_id_arrays]
+    lengths = np.array([len(ids) for ids in arrays], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(arrays) else lengths
+    ids = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+    return ids, lengths, starts
+
+
+# --- MTLD ------------------------------------------------------------------
+
+def _factors(ids, threshold, stamps, base, reverse=False):
+    """(factores MTLD de una pasada, siguiente número de factor libre).
+
+    stamps[t] guarda el número del último factor en que apareció el tipo t;
+    como los números nunca se repiten, el arreglo no se reinicia entre factores,
+    pasadas ni textos.
+    """
+    factors = 0.0
+    token_count = 0
+    types = 0
+    factor = base
+    for token in (reversed(ids) if reverse else ids):
+        token_count += 1
+        if stamps[token] != factor:
+            stamps[token] = factor
+            types += 1
+        if types / token_count <= threshold:
+            factors += 1
+            token_count = 0
+            types = 0
+            factor += 1
+
+    if token_count > 0:
+        factors += (1 - types / token_count) / (1 - threshold)
+    return factors, factor + 1
+
+
+def _mtld(ids, threshold, min_length, stamps, base):
+    if len(ids) < min_length:
+        return 0.0, base
+    ids = ids.tolist()
+    forward, base = _factors(ids, threshold, stamps, base)
+    backward, base = _factors(ids, threshold, stamps, base, reverse=True)
+    if forward == 0 or backward == 0:
+        return 0.0, base
+    return len(ids) / ((forward + backward) / 2), base
+
+
+def mtld(ids, threshold=DEFAULT_TTR_THRESHOLD, min_length=10):
+    """MTLD (media de las pasadas hacia adelante y hacia atrás); 0 si hay menos de min_length tokens."""
+    return float(batch_mtld([ids], threshold, min_length)[0])
+
+
+def batch_mtld(token_id_arrays, threshold=DEFAULT_TTR_THRESHOLD, min_length=10):
+    """MTLD de cada array de ids, compartiendo el arreglo de marcas por tipo."""
+    token_id_arrays = [np.asarray(ids) for ids in token_id_arrays]
+    size = max((int(ids.max()) + 1 for ids in token_id_arrays if len(ids)), default=0)
+    stamps = [-1] * size
+    out = np.zeros(len(token_id_arrays), dtype=np.float64)
+    base = 0
+    for i, ids in enumerate(token_id_arrays):
+        out[i], base = _mtld(ids, threshold, min_length, stamps, base)
+    return out
+
+
+# --- MATTR -----------------------------------------------------------------
+
+def _next_occurrence(ids, owner, ends):
+    """Posición de la siguiente aparición del mismo tipo en el mismo array (o el fin del array)."""
+    nxt = ends[owner].copy()
+    if len(ids) > 1:
+        # Un solo ordenamiento estable por (array, tipo) conserva el orden de posición
+        keys = owner * (int(ids.max()) + 1) + ids
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        same = sorted_keys[1:] == sorted_keys[:-1]
+        nxt[order[:-1][same]] = order[1:][same]
+    return nxt
+
+
+def batch_mattr(token_id_arrays, window=DEFAULT_WINDOW):
+    """MATTR de cada array; los textos más cortos que la ventana usan su TTR."""
+    ids, lengths, starts = _concat(token_id_arrays)
+    out = np.zeros(len(lengths), dtype=np.float64)
+    if not len(ids):
+        return out
+
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    ends = starts + lengths
+    nxt = _next_occurrence(ids, owner, ends)
+    positions = np.arange(len(ids))
+
+    # El token j cuenta como tipo distinto en las ventanas [i, i + window) con
+    # i <= j < i + window y nxt[j] >= i + window
+    first = np.maximum(starts[owner], positions - window + 1)
+    last = np.minimum(positions, np.minimum(nxt, ends[owner]) - window)
+    valid = last >= first
+    diff = (np.bincount(first[valid], minlength=len(ids) + 1) -
+            np.bincount(last[valid] + 1, minlength=len(ids) + 1))
+    distinct = np.cumsum(diff[:-1])
+
+    # Ventanas válidas: comienzan en [start, end - window]
+    n_windows = np.maximum(lengths - window + 1, 0)
+    in_window = positions - starts[owner] < n_windows[owner]
+    sums = np.bincount(owner[in_window], weights=distinct[in_window], minlength=len(lengths))
+    long_enough = n_windows > 0
+    out[long_enough] = sums[long_enough] / (n_windows[long_enough] * window)
+
+    # Textos cortos: TTR (tokens cuya siguiente aparición cae fuera del texto)
+    short = ~long_enough & (lengths > 0)
+    if short.any():
+        last_seen = nxt >= ends[owner]
+        types = np.bincount(owner[last_seen], minlength=len(lengths))
+        out[short] = types[short] / lengths[short]
+    return out
+
+
+def mattr(ids, window=DEFAULT_WINDOW):
+    return float(batch_mattr([ids], window)[0])
+
+
+# --- HD-D ------------------------------------------------------------------
+
+class HypergeometricTable:
+    """Tabla de log-factoriales para P(un tipo de frecuencia f no aparece en la muestra)."""
+
+    def __init__(self, max_tokens=0):
+        self.log_factorial = gammaln(np.arange(max_tokens + 2, dtype=np.float64) + 1)
+
+    def ensure(self, max_tokens):
+        if max_tokens + 1 >= len(self.log_factorial):
+            self.log_factorial = gammaln(np.arange(2 * max_tokens + 2, dtype=np.float64) + 1)
+
+    def p_absent(self, n_tokens, freqs, sample_size):
+        """C(N - f, s) / C(N, s) para arrays N (tokens del texto) y f (frecuencia del tipo)."""
+        n_tokens = np.asarray(n_tokens, dtype=np.int64)
+        freqs = np.asarray(freqs, dtype=np.int64)
+        self.ensure(int(n_tokens.max(initial=0)))
+        lf = self.log_factorial
+        rest = n_tokens - freqs
+        possible = rest >= sample_size
+        rest_s = np.where(possible, rest - sample_size, 0)
+        log_p = (lf[rest] - lf[rest_s] - lf[n_tokens] + lf[np.maximum(n_tokens - sample_size, 0)])
+        return np.where(possible, np.exp(log_p), 0.0)
+
+
+_table = HypergeometricTable()
+
+
+def batch_hdd(token_id_arrays, sample_size=DEFAULT_SAMPLE_SIZE):
+    """HD-D de cada array; 0 si tiene menos tokens que la muestra."""
+    ids, lengths, _ = _concat(token_id_arrays)
+    out = np.zeros(len(lengths), dtype=np.float64)
+    if not len(ids):
+        return out
+
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    # Frecuencia de cada (array, tipo)
+    pairs = owner * (int(ids.max()) + 1) + ids
+    keys, freqs = np.unique(pairs, return_counts=True)
+    pair_owner = keys // (int(ids.max()) + 1)
+    n_tokens = lengths[pair_owner]
+
+    contribution = (1 - _table.p_absent(n_tokens, freqs, sample_size)) / sample_size
+    sums = np.bincount(pair_owner, weights=contribution, minlength=len(lengths))
+    enough = lengths >= sample_size
+    out[enough] = sums[enough]
+    return out
+
+
+def hdd(ids, sample_size=DEFAULT_SAMPLE_SIZE):
+    return float(batch_hdd([ids], sample_size)[0])
+
+
+# --- Todo junto --------------------------------------------------------------
+
+def ttr(ids):
+    ids = np.asarray(ids)
+    return len(np.unique(ids)) / len(ids) if len(ids) else 0.0
+
+
+def diversity(token_id_arrays, threshold=DEFAULT_TTR_THRESHOLD, window=DEFAULT_WINDOW,
+              sample_size=DEFAULT_SAMPLE_SIZE, min_length=10):
+    """Dict métrica -> array (uno por texto): tokens, ttr, mtld, mattr y hdd."""
+    token_id_arrays = [np.asarray(ids) for ids in token_id_arrays]
+    return {
+        'tokens': np.array([len(ids) for ids in token_id_arrays], dtype=np.int64),
+        'ttr': np.array([ttr(ids) for ids in token_id_arrays], dtype=np.float64),
+        'mtld': batch_mtld(token_id_arrays, threshold, min_length),
+        'mattr': batch_mattr(token_id_arrays, window),
+        'hdd': batch_hdd(token_id_arrays, sample_size),
+    }
@@ -0,0 +1,566 @@
+# -*- coding: utf-8 -*-
+"""Sentimiento léxico vectorizado (estilo VADER y TextBlob) sobre ids de tokens.
+
+Los léxicos de VADER y de TextBlob (los instalados con cada paquete) se
+proyectan una sola vez sobre el vocabulario compartido del caché de tokens:
+por id se guardan la valencia, si es intensificador o negación, la
+intensidad, etc. Para puntuar, los tokens de todas las oraciones se
+concatenan en un solo arreglo y las reglas se aplican con desplazamientos
+del arreglo (ventanas de 1 a 3 tokens dentro de cada oración); las sumas por
+oración se hacen con bincount. Ningún paso recorre las oraciones en Python.
+
+Reglas de VADER reproducidas: intensificadores con amortiguación por
+distancia, negaciones en las 3 palabras previas ('never so', 'without
+doubt'), 'no' como negación, 'least', mayúsculas, 'kind of', la conjunción
+'but', modismos especiales y el énfasis de '!' y '?'. Diferencias conocidas:
+VADER separa las palabras por espacios y aquí se usan los tokens del caché
+(la puntuación suelta no cuenta como posición y las contracciones se unen a
+la palabra anterior), y los emojis no se traducen a texto.
+
+De TextBlob (PatternAnalyzer) se reproduce el promedio de las evaluaciones:
+palabras conocidas, modificadores (adverbios) que multiplican a la palabra
+siguiente, negaciones ('no', 'not', 'never') que invierten con factor -0.5 y
+'!' que refuerza la evaluación anterior.
+
+`validate` compara ambos puntajes con VADER y TextBlob originales.
+
+Uso desde la línea de comandos:
+    python lexicon_sentiment.py debate.txt [debate2.txt ...]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Palabras con reglas propias en VADER
+ROLES = ('no', 'or', 'nor', 'kind', 'of', 'never', 'so', 'this', 'without', 'doubt',
+         'least', 'at', 'very', 'but')
+ROLE = {word: code for code, word in enumerate(ROLES)}
+
+# Contracciones que el tokenizador separa y VADER deja unidas a la palabra
+CLITICS = frozenset(
+    prefix + suffix
+    for prefix in ("'", "’")
+    for suffix in ('s', 'm', 'd', 're', 'll', 've')
+) | frozenset(("n't", "n’t"))
+# Restos de una contracción con apóstrofo tipográfico ('don', '’', 't')
+SUFFIXES = frozenset(('s', 't', 'm', 'd', 're', 'll', 've'))
+APOSTROPHES = frozenset(("'", "’"))
+
+TEXTBLOB_NEGATIONS = frozenset(('no', 'not', 'never'))
+
+# Amortiguación de un intensificador a 1, 2 y 3 palabras de distancia
+DAMPING = (1.0, 0.95, 0.9)
+
+
+def _has_alnum(word):
+    return any(c.isalnum() for c in word)
+
+
+def _back(values, pos, k, fill):
+    """values[t - k] dentro de la misma oración (fill si no existe)."""
+    out = np.full(len(values), fill, dtype=values.dtype)
+    if len(values) > k:
+        out[k:] = values[:-k]
+    out[pos < k] = fill
+    return out
+
+
+def _forward(values, pos, lengths, fill):
+    """values[t + 1] dentro de la misma oración (fill si no existe)."""
+    out = np.full(len(values), fill, dtype=values.dtype)
+    if len(values) > 1:
+        out[:-1] = values[1:]
+    out[pos >= lengths - 1] = fill
+    return out
+
+
+def _last_before(mask, starts):
+    """Índice del último t' < t con mask[t'] en la misma oración (-1 si no hay)."""
+    marks = np.where(mask, np.arange(len(mask)), -1)
+    before = np.concatenate(([-1], np.maximum.accumulate(marks)[:-1])) if len(mask) else marks
+    before[before < starts] = -1
+    return before
+
+
+def _segments(bounds):
+    """(oración de cada token, posición en la oración, longitud de su oración)."""
+    lengths = np.diff(bounds)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    pos = np.arange(len(owner)) - bounds[:-1][owner]
+    return owner, pos, lengths[owner]
+
+
+class LexiconScorer:
+    """Puntajes estilo VADER y TextBlob por oración a partir de ids de tokens."""
+
+    def __init__(self, vocabulary=None, vader_lexicon=None, textblob_lexicon=None):
+        from vaderSentiment import vaderSentiment as vader
+
+        self.vader = vader
+        if vader_lexicon is None:
+            from model_registry import registry
+            vader_lexicon = registry.get('vader').lexicon
+        if textblob_lexicon is None:
+            from textblob.en import sentiment as textblob_lexicon
+            if dict.__len__(textblob_lexicon) == 0:
+                textblob_lexicon.load()
+        self.vader_lexicon = vader_lexicon
+        self.textblob_lexicon = textblob_lexicon
+        self._vocabulary = vocabulary
+        # Palabras de los modismos y de los intensificadores de varias palabras
+        self.idiom_words = frozenset(
+            word for phrase in list(vader.SPECIAL_CASES) + list(vader.BOOSTER_DICT)
+            if ' ' in phrase for word in phrase.split()
+        )
+        self._columns = None
+        self._size = 0
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            from token_cache import get_cache
+            return get_cache().vocabulary
+        return self._vocabulary
+
+    # --- Léxicos como arreglos por id ----------------------------------------
+
+    def _features(self, word):
+        lower = word.lower()
+        vader = self.vader
+        entry = self.textblob_lexicon.get(lower) if ' ' not in lower else None
+        known = entry is not None and None in entry
+        p, s, i = entry[None] if known else (0.0, 0.0, 1.0)
+        alnum = _has_alnum(word)
+        clitic = lower in CLITICS
+        return (
+            # VADER
+            self.vader_lexicon.get(lower, 0.0),
+            lower in self.vader_lexicon,
+            vader.BOOSTER_DICT.get(lower, 0.0),
+            lower in vader.NEGATE or "n't" in lower,
+            word.isupper(),
+            alnum and not clitic,
+            clitic,
+            lower == "n't",
+            lower in SUFFIXES,
+            lower in APOSTROPHES,
+            ROLE.get(lower, -1),
+            lower in self.idiom_words,
+            word.count('!'),
+            word.count('?'),
+            # TextBlob
+            known,
+            p,
+            s,
+            i,
+            known and 'RB' in entry,
+            lower in TEXTBLOB_NEGATIONS,
+            lower.endswith('ly'),
+            (alnum and not clitic and len(lower.strip("'")) > 1) or lower == '...',
+            (alnum and not clitic and len(lower) > 2) or lower == '...',
+            lower == '!',
+        )
+
+    _NAMES = ('v_valence', 'v_known', 'v_boost', 'v_negate', 'upper', 'v_visible', 'clitic',
+              'clitic_negate', 'suffix', 'apostrophe', 'role', 'idiom', 'exclamations',
+              'questions', 't_known', 't_polarity', 't_subjectivity', 't_intensity',
+              't_modifier', 't_negation', 't_ly', 't_clears_negation', 't_clears_modifier',
+              't_exclamation')
+    _DTYPES = (np.float64, bool, np.float64, bool, bool, bool, bool, bool, bool, bool, np.int8,
+               bool, np.int32, np.int32, bool, np.float64, np.float64, np.float64, bool, bool,
+               bool, bool, bool, bool)
+
+    def _arrays(self):
+        """Columnas por id, extendidas con las palabras nuevas del vocabulario."""
+        words = self.vocabulary.words
+        if self._columns is None or self._size < len(words):
+            rows = [self._features(word) for word in words[self._size:]]
+            new = [np.array(col, dtype=dtype) for col, dtype in zip(zip(*rows), self._DTYPES)] \
+                if rows else [np.zeros(0, dtype=dtype) for dtype in self._DTYPES]
+            if self._columns is None:
+                self._columns = dict(zip(self._NAMES, new))
+            else:
+                for name, col in zip(self._NAMES, new):
+                    self._columns[name] = np.concatenate([self._columns[name], col])
+            self._size = len(words)
+        return self._columns
+
+    # --- Puntuación --------------------------------------------------------------
+
+    def score_ids(self, tokens, bounds):
+        """Puntajes de cada segmento tokens[bounds[j]:bounds[j + 1]].
+
+        Devuelve arreglos por segmento: compound, pos, neg y neu (VADER),
+        polarity y subjectivity (TextBlob) y n_assessments (palabras
+        evaluadas por TextBlob, para promediar varios segmentos).
+        """
+        columns = self._arrays()
+        tokens = np.asarray(tokens, dtype=np.int64)
+        bounds = np.asarray(bounds, dtype=np.int64)
+        owner, pos, lengths = _segments(bounds)
+        scores = self._vader(columns, tokens, owner, pos, len(bounds) - 1)
+        scores.update(self._textblob(columns, tokens, owner, bounds, len(bounds) - 1))
+        return scores
+
+    def _vader(self, columns, tokens, owner, pos, n):
+        vader = self.vader
+        n_scalar, c_incr = vader.N_SCALAR, vader.C_INCR
+
+        # Énfasis de la puntuación (sobre todos los tokens)
+        exclamations = np.bincount(owner, columns['exclamations'][tokens], minlength=n)
+        questions = np.bincount(owner, columns['questions'][tokens], minlength=n)
+        amplifier = np.minimum(exclamations, 4) * 0.292 + np.where(
+            questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0.0)
+
+        # Palabras tal como las ve VADER: sin puntuación suelta ni contracciones separadas
+        raw_pos = pos
+        after_apostrophe = _back(columns['apostrophe'][tokens], raw_pos, 1, False)
+        keep = columns['v_visible'][tokens] & ~(columns['suffix'][tokens] & after_apostrophe)
+        negate = columns['v_negate'][tokens].copy()
+        # "n't" separado niega a la palabra a la que pertenece
+        clitic_negate = np.flatnonzero(columns['clitic_negate'][tokens] & (raw_pos > 0))
+        negate[clitic_negate - 1] = True
+
+        ids = tokens[keep]
+        negate = negate[keep]
+        owner = owner[keep]
+        counts = np.bincount(owner, minlength=n)
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        _, pos, lengths = _segments(bounds)
+
+        valence = columns['v_valence'][ids]
+        known = columns['v_known'][ids]
+        boost = columns['v_boost'][ids]
+        upper = columns['upper'][ids]
+        role = columns['role'][ids]
+        n_upper = np.bincount(owner, upper, minlength=n)
+        cap_diff = ((n_upper > 0) & (n_upper < counts))[owner]
+
+        # Intensificadores y 'kind of' no puntúan por sí mismos
+        kind_of = (role == ROLE['kind']) & (_forward(role, pos, lengths, -1) == ROLE['of'])
+        scored = known & (boost == 0) & ~kind_of
+        v = np.where(scored, valence, 0.0)
+
+        # 'no' antes de una palabra del léxico es negación, no sentimiento
+        next_known = _forward(known, pos, lengths, False)
+        v[scored & (role == ROLE['no']) & next_known] = 0.0
+        r1, r2, r3 = (_back(role, pos, k, -1) for k in (1, 2, 3))
+        after_no = ((r1 == ROLE['no']) | (r2 == ROLE['no'])
+                    | ((r3 == ROLE['no']) & ((r1 == ROLE['or']) | (r1 == ROLE['nor']))))
+        v = np.where(scored & after_no, valence * n_scalar, v)
+
+        caps = scored & upper & cap_diff
+        v = np.where(caps, np.where(v > 0, v + c_incr, v - c_incr), v)
+
+        so_this = {1: np.isin(r1, (ROLE['so'], ROLE['this'])),
+                   2: np.isin(r2, (ROLE['so'], ROLE['this']))}
+        for k in (1, 2, 3):
+            window = scored & (pos >= k) & ~_back(known, pos, k, True)
+            scalar = _back(boost, pos, k, 0.0)
+            scalar = np.where(v < 0, -scalar, scalar)
+            caps = (scalar != 0) & _back(upper, pos, k, False) & cap_diff
+            scalar = scalar + np.where(caps, np.where(v > 0, c_incr, -c_incr), 0.0)
+            v = np.where(window, v + scalar * DAMPING[k - 1], v)
+
+            negated = _back(negate, pos, k, False)
+            if k == 1:
+                factor = np.where(negated, n_scalar, 1.0)
+            elif k == 2:
+                never = (r2 == ROLE['never']) & so_this[1]
+                without = (r2 == ROLE['without']) & (r1 == ROLE['doubt'])
+                factor = np.where(never, 1.25, np.where(without | ~negated, 1.0, n_scalar))
+            else:
+                never = ((r3 == ROLE['never']) & so_this[2]) | so_this[1]
+                without = (r3 == ROLE['without']) & ((r2 == ROLE['doubt']) | (r1 == ROLE['doubt']))
+                factor = np.where(never, 1.25, np.where(without | ~negated, 1.0, n_scalar))
+            v = np.where(window, v * factor, v)
+
+        # Modismos: solo donde alguna palabra de la ventana forma parte de uno
+        idiom = columns['idiom'][ids]
+        near = (idiom | _forward(idiom, pos, lengths, False)
+                | _forward(_forward(idiom, pos, lengths, False), pos, lengths, False)
+                | _back(idiom, pos, 1, False) | _back(idiom, pos, 2, False) | _back(idiom, pos, 3, False))
+        candidates = np.flatnonzero(scored & (pos >= 3) & ~_back(known, pos, 3, True) & near)
+        if len(candidates):
+            words = self.vocabulary.words
+            for t in candidates.tolist():
+                start, end = t - pos[t], t - pos[t] + lengths[t]
+                lower = [words[i].lower() for i in ids[start:end].tolist()]
+                v[t] = self._special_idioms(v[t], lower, t - start)
+
+        # 'least' niega salvo en 'at least' / 'very least'
+        least = (r1 == ROLE['least']) & ~_back(known, pos, 1, True)
+        least &= (pos == 1) | ~np.isin(r2, (ROLE['at'], ROLE['very']))
+        v = np.where(scored & least, v * n_scalar, v)
+
+        # 'but': lo anterior pesa la mitad y lo posterior 1.5 veces
+        is_but = role == ROLE['but']
+        first_but = np.full(n, np.iinfo(np.int64).max)
+        np.minimum.at(first_but, owner[is_but], pos[is_but])
+        has_but = (first_but < np.iinfo(np.int64).max)[owner]
+        but_pos = first_but[owner]
+        v = np.where(has_but & (pos < but_pos), v * 0.5,
+                     np.where(has_but & (pos > but_pos), v * 1.5, v))
+
+        total = np.bincount(owner, v, minlength=n)
+        total = total + np.sign(total) * amplifier
+        compound = np.clip(total / np.sqrt(total * total + 15), -1.0, 1.0)
+
+        pos_sum = np.bincount(owner, np.where(v > 0, v + 1, 0.0), minlength=n)
+        neg_sum = np.bincount(owner, np.where(v < 0, v - 1, 0.0), minlength=n)
+        neu = np.bincount(owner, v == 0, minlength=n).astype(np.float64)
+        pos_sum = np.where(pos_sum > -neg_sum, pos_sum + amplifier, pos_sum)
+        neg_sum = np.where(pos_sum < -neg_sum, neg_sum - amplifier, neg_sum)
+        denominator = pos_sum - neg_sum + neu
+        denominator[denominator == 0] = 1.0
+        return {
+            'compound': compound,
+            'pos': np.abs(pos_sum / denominator),
+            'neg': np.abs(neg_sum / denominator),
+            'neu': np.abs(neu / denominator),
+        }
+
+    def _special_idioms(self, valence, lower, i):
+        """Modismos de SPECIAL_CASES e intensificadores de varias palabras (regla de VADER)."""
+        special, booster = self.vader.SPECIAL_CASES, self.vader.BOOSTER_DICT
+        one_zero = f'{lower[i - 1]} {lower[i]}'
+        two_one_zero = f'{lower[i - 2]} {lower[i - 1]} {lower[i]}'
+        two_one = f'{lower[i - 2]} {lower[i - 1]}'
+        three_two_one = f'{lower[i - 3]} {lower[i - 2]} {lower[i - 1]}'
+        three_two = f'{lower[i - 3]} {lower[i - 2]}'
+        for sequence in (one_zero, two_one_zero, two_one, three_two_one, three_two):
+            if sequence in special:
+                valence = special[sequence]
+                break
+        if len(lower) - 1 > i and f'{lower[i]} {lower[i + 1]}' in special:
+            valence = special[f'{lower[i]} {lower[i + 1]}']
+        if len(lower) - 1 > i + 1 and f'{lower[i]} {lower[i + 1]} {lower[i + 2]}' in special:
+            valence = special[f'{lower[i]} {lower[i + 1]} {lower[i + 2]}']
+        for n_gram in (three_two_one, three_two, two_one):
+            if n_gram in booster:
+                valence += booster[n_gram]
+        return valence
+
+    def _textblob(self, columns, tokens, owner, bounds, n):
+        known = columns['t_known'][tokens]
+        modifier = columns['t_modifier'][tokens]
+        negation = columns['t_negation'][tokens]
+        long_word = columns['t_clears_modifier'][tokens]
+        starts = bounds[:-1][owner]
+
+        # Última palabra conocida antes de cada token (fija el modificador activo)
+        last_known = _last_before(known, starts)
+        has_known = last_known >= 0
+        last_known_modifier = has_known & modifier[np.maximum(last_known, 0)]
+
+        def modifier_active(clears):
+            last_clear = _last_before(clears, starts)
+            return last_known_modifier & (last_clear < last_known)
+
+        # "really not good": la negación tras un adverbio en -ly se une a su evaluación
+        clears_modifier = ~known & long_word & ~negation
+        absorbed = (negation & modifier_active(clears_modifier)
+                    & columns['t_ly'][tokens[np.maximum(last_known, 0)]])
+        clears_modifier |= negation & long_word & ~absorbed
+        merged = known & modifier_active(clears_modifier)
+
+        # Negación activa: la última no absorbida, sin palabras (conocidas o largas) en medio
+        clears_negation = ~known & ~negation & columns['t_clears_negation'][tokens]
+        last_negation = _last_before(negation, starts)
+        negated = ((last_negation >= 0) & ~absorbed[np.maximum(last_negation, 0)]
+                   & (_last_before(clears_negation, starts) < last_negation)
+                   & (last_known < last_negation))
+
+        # Evaluaciones: cada palabra conocida no precedida por un modificador abre una
+        known_at = np.flatnonzero(known)
+        group = np.cumsum(~merged[known_at]) - 1
+        n_groups = int(group[-1]) + 1 if len(group) else 0
+        group_of = np.full(len(tokens), -1, dtype=np.int64)
+        group_of[known_at] = group
+        size = np.bincount(group, minlength=n_groups)
+        last = np.concatenate((np.flatnonzero(np.diff(group)), [len(group) - 1])) if n_groups else group
+        last_token = known_at[last]
+
+        polarity = columns['t_polarity'][tokens]
+        subjectivity = columns['t_subjectivity'][tokens]
+        intensity = columns['t_intensity'][tokens]
+        intensity = np.where(negated & (intensity != 0), 1.0 / np.where(intensity != 0, intensity, 1.0),
+                             intensity)
+        # Con modificador: puntaje de la última palabra por la intensidad de la anterior
+        previous = known_at[np.maximum(last - 1, 0)]
+        factor = np.where(size > 1, intensity[previous], 1.0)
+        p = np.clip(polarity[last_token] * factor, -1.0, 1.0)
+        s = np.clip(subjectivity[last_token] * factor, -1.0, 1.0)
+
+        # '!' refuerza la evaluación abierta (si ninguna palabra posterior la reemplaza)
+        is_last = np.zeros(len(tokens), dtype=bool)
+        is_last[last_token] = True
+        exclamation = np.flatnonzero(columns['t_exclamation'][tokens])
+        target = last_known[exclamation]
+        target = target[(target >= 0) & is_last[np.maximum(target, 0)]]
+        boosts = np.bincount(group_of[target], minlength=n_groups)
+        p = np.clip(p * 1.25 ** boosts, -1.0, 1.0)
+
+        is_negated = np.bincount(group, negated[known_at], minlength=n_groups) > 0
+        is_negated[group_of[last_known[absorbed]]] = True
+        p = np.where(is_negated, p * -0.5, p)
+
+        group_owner = owner[known_at[last]]
+        assessments = np.bincount(group_owner, minlength=n)
+        denominator = np.maximum(assessments, 1)
+        return {
+            'polarity': np.bincount(group_owner, p, minlength=n) / denominator,
+            'subjectivity': np.bincount(group_owner, s, minlength=n) / denominator,
+            'n_assessments': assessments,
+        }
+
+    # --- Entradas habituales ---------------------------------------------------
+
+    def score_texts(self, texts, language='english'):
+        """Puntajes por oración de varios textos, calculados juntos.
+
+        Añade text_bounds: las oraciones del texto k son [text_bounds[k],
+        text_bounds[k + 1]).
+        """
+        from token_cache import get_cache
+
+        cache = get_cache()
+        # Con mayúsculas: VADER distingue las palabras en MAYÚSCULAS
+        entries = [cache.get(text, lower=False, language=language) for text in texts]
+        offsets = np.cumsum([0] + [len(entry.tokens) for entry in entries])
+        tokens = np.concatenate([entry.tokens for entry in entries]) if entries else np.zeros(0, np.int32)
+        bounds = np.concatenate([[0]] + [entry.sentence_bounds[1:] + offset
+                                         for entry, offset in zip(entries, offsets)])
+        scores = self.score_ids(tokens, bounds)
+        scores['text_bounds'] = np.cumsum([0] + [entry.n_sentences for entry in entries])
+        return scores
+
+    def score_text(self, text, language='english'):
+        """(oraciones, puntajes por oración) de un texto."""
+        from token_cache import get_cache
+
+        sentences = get_cache().get(text, lower=False, language=language).sentences(text)
+        return sentences, self.score_texts([text], language)
+
+    def score_documents(self, texts, language='english'):
+        """Un puntaje por texto completo (como VADER o TextBlob sobre todo el texto)."""
+        from token_cache import get_cache
+
+        cache = get_cache()
+        entries = [cache.get(text, lower=False, language=language) for text in texts]
+        tokens = np.concatenate([entry.tokens for entry in entries]) if entries else np.zeros(0, np.int32)
+        return self.score_ids(tokens, np.cumsum([0] + [len(entry.tokens) for entry in entries]))
+
+    def score_sentences(self, sentences, language='english'):
+        """Puntajes de oraciones ya segmentadas (cada una se tokeniza sin partirla)."""
+        from token_cache import get_cache
+
+        cache = get_cache()
+        words = [cache.word_tokenizer(sentence, language) for sentence in sentences]
+        tokens = self.vocabulary.encode(word for sentence in words for word in sentence)
+        return self.score_ids(tokens, np.cumsum([0] + [len(sentence) for sentence in words]))
+
+    def text_polarity(self, text, language='english'):
+        """Polaridad estilo TextBlob del texto completo (media de todas sus evaluaciones)."""
+        _, scores = self.score_text(text, language)
+        total = scores['n_assessments'].sum()
+        return float(np.dot(scores['polarity'], scores['n_assessments']) / total) if total else 0.0
+
+
+def score_corpus(corpus, scorer=None, debates=None, speakers=None, text=False):
+    """DataFrame con una fila por oración de los turnos de un DebateCorpus, puntuadas juntas.
+
+    Con text=True añade la columna text con cada oración.
+    """
+    from token_cache import get_cache
+
+    scorer = scorer or get_scorer()
+    rows = corpus.select(debates, speakers)
+    texts = [corpus.turn_text(row) for row in rows]
+    scores = scorer.score_texts(texts)
+    counts = np.diff(scores.pop('text_bounds'))
+    owner = np.repeat(np.arange(len(rows)), counts)
+    frame = pd.DataFrame({
+        'debate': [corpus.debates[d] for d in rows['debate'][owner]],
+        'speaker': [corpus.speakers[s] for s in rows['speaker'][owner]],
+        'turn': rows['turn'][owner],
+        'sentence': np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts),
+    })
+    for name, values in scores.items():
+        frame[name] = values
+    if text:
+        cache = get_cache()
+        frame['text'] = [s for turn in texts for s in cache.get(turn, lower=False).sentences(turn)]
+    return frame
+
+
+def validate(texts, scorer=None):
+    """Compara por oración con VADER y TextBlob originales (correlación, error y tiempos)."""
+    from textblob import TextBlob
+    from model_registry import registry
+    from token_cache import get_cache
+
+    scorer = scorer or get_scorer()
+    cache = get_cache()
+    sentences = [s for text in texts for s in cache.get(text, lower=False).sentences(text)]
+    analyzer = registry.get('vader')
+
+    start = time.perf_counter()
+    scores = scorer.score_texts(texts)
+    lexicon_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vader = np.array([analyzer.polarity_scores(s)['compound'] for s in sentences])
+    vader_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    textblob = np.array([TextBlob(s).sentiment.polarity for s in sentences])
+    textblob_seconds = time.perf_counter() - start
+
+    def agreement(ours, reference):
+        return {
+            'pearson': float(np.corrcoef(ours, reference)[0, 1]) if len(ours) > 1 else float('nan'),
+            'mae': float(np.mean(np.abs(ours - reference))) if len(ours) else 0.0,
+            'exact': float(np.mean(np.abs(ours - reference) < 1e-3)) if len(ours) else 0.0,
+            'same_sign': float(np.mean(np.sign(ours) == np.sign(reference))) if len(ours) else 0.0,
+        }
+
+    return {
+        'sentences': len(sentences),
+        'vader': agreement(scores['compound'], vader),
+        'textblob': agreement(scores['polarity'], textblob),
+        'seconds': {'lexicon': lexicon_seconds, 'vader': vader_seconds, 'textblob': textblob_seconds},
+    }
+
+
+_default_scorer = None
+
+
+def get_scorer():
+    """Puntuador con los léxicos de VADER y TextBlob, compartido por todo el proceso."""
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = LexiconScorer()
+    return _default_scorer
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    texts = []
+    for path in sys.argv[1:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    report = validate(texts)
+    print(f"Oraciones: {report['sentences']}")
+    for name in ('vader', 'textblob'):
+        metrics = report[name]
+        print(f"{name:<9} r={metrics['pearson']:.4f}  MAE={metrics['mae']:.4f}  "
+              f"iguales={metrics['exact']:.1%}  mismo signo={metrics['same_sign']:.1%}")
+    seconds = report['seconds']
+    print(f"Tiempo: léxico {seconds['lexicon']:.3f} s, VADER {seconds['vader']:.3f} s, "
+          f"TextBlob {seconds['textblob']:.3f} s")
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""Firmas MinHash e índice LSH de turnos para detectar discursos reutilizados.
+
+Cada turno se representa por el conjunto de sus n-gramas de palabras de
+contenido (claves de 64 bits, ver ngrams.py) y por una firma MinHash de
+`num_perm` valores. El índice LSH agrupa las firmas por bandas: solo los
+turnos que coinciden en alguna banda son candidatos, y cada candidato se
+verifica con el Jaccard exacto de sus conjuntos de n-gramas. Así se comparan
+todos los turnos de cualquier número de debates sin recorrer todos los pares.
+
+Uso desde la línea de comandos:
+    python minhash.py [--speaker TRUMP] [--threshold 0.5] debate.txt debate2.txt ...
+"""
+
+import sys
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from ngrams import id_bits, pack
+
+_SHIFT = np.uint64(32)
+
+
+def _mix(x):
+    """Finalizador de splitmix64: dispersa claves uint64 (aritmética módulo 2**64)."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _shingle_keys(ids, n, bits):
+    """Claves uint64 de los n-gramas: empaquetadas si n * bits <= 64, si no, un hash.
+
+    Con ids más anchos, empaquetar desbordaría los 64 bits y n-gramas
+    distintos compartirían clave; el hash encadenado de splitmix64 solo choca
+    con probabilidad ~2**-64, lo que no cambia las firmas MinHash.
+    """
+    if n * bits <= 64:
+        return pack(ids, n, bits)
+    ids = np.asarray(ids).astype(np.uint64)
+    m = len(ids) - n + 1
+    if m <= 0:
+        return np.empty(0, dtype=np.uint64)
+    keys = _mix(ids[:m])
+    for k in range(1, n):
+        keys = _mix(keys ^ ids[k:k + m])
+    return keys
+
+
+def shingles(ids, n=3, bits=None):
+    """Claves únicas (ordenadas) de los n-gramas de un array de ids."""
+    ids = np.asarray(ids)
+    if bits is None:
+        bits = id_bits(int(ids.max()) + 1 if len(ids) else 1)
+    return np.unique(_shingle_keys(ids, n, bits))
+
+
+def jaccard(a, b):
+    """Jaccard exacto entre dos conjuntos de claves únicas y ordenadas."""
+    union = len(a) + len(b)
+    if union == 0:
+        return 0.0
+    inter = len(np.intersect1d(a, b, assume_unique=True))
+    return inter / (union - inter)
+
+
+def choose_bands(num_perm, threshold, min_rows=2):
+    """(bandas, filas) con bandas * filas = num_perm y umbral LSH (1/b)^(1/r) <= threshold.
+
+    Se elige el umbral LSH más alto que no supere el pedido: los pares por
+    encima de threshold casi siempre son candidatos y la verificación exacta
+    descarta los falsos positivos. Cada banda tiene al menos min_rows filas:
+    con una sola, un único mínimo compartido ya hace candidato al par y casi
+    todos los pares lo son; si ninguna opción llega al umbral se usa la de
+    umbral más bajo.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1)
+               if num_perm % b == 0 and num_perm // b >= min(min_rows, num_perm)]
+    below = [br for br in options if (1 / br[0]) ** (1 / br[1]) <= threshold]
+    if not below:
+        return min(options, key=lambda br: (1 / br[0]) ** (1 / br[1]))
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1]))
+
+
+class MinHasher:
+    """Familia de num_perm funciones hash h(x) = (a * mix(x) + b) >> 32, con a impar."""
+
+    def __init__(self, num_perm=128, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets, chunk=1 << 16):
+        """Matriz (n_conjuntos, num_perm) uint32; los conjuntos vacíos quedan en el máximo."""
+        lengths = np.array([len(s) for s in shingle_sets], dtype=np.int64)
+        out = np.full((len(shingle_sets), self.num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        nonempty = np.flatnonzero(lengths)
+        if not len(nonempty):
+            return out
+
+        keys = _mix(np.concatenate([shingle_sets[i] for i in nonempty]).astype(np.uint64))
+        starts = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+        # Por bloques de claves para acotar la matriz (claves x permutaciones) en memoria
+        for lo in range(0, len(keys), chunk):
+            block = keys[lo:lo + chunk]
+            hashed = ((block[:, None] * self.a[None, :] + self.b[None, :]) >> _SHIFT).astype(np.uint32)
+            owners = np.searchsorted(starts, np.arange(lo, lo + len(block)), side='right') - 1
+            seg = np.flatnonzero(np.concatenate(([True], owners[1:] != owners[:-1])))
+            mins = np.minimum.reduceat(hashed, seg, axis=0)
+            rows = nonempty[owners[seg]]
+            out[rows] = np.minimum(out[rows], mins)
+        return out
+
+
+class MinHashIndex:
+    """Firmas MinHash de turnos, con índice LSH y verificación por Jaccard exacto."""
+
+    def __init__(self, n=3, num_perm=128, threshold=0.5, bands=None, seed=1):
+        self.n = n
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, seed)
+        self.bands, self.rows = (bands, num_perm // bands) if bands else choose_bands(num_perm, threshold)
+        self.bits = None
+        self.labels = []
+        # Filas del índice de turnos de cada documento (si viene de un DebateCorpus)
+        self.turns = None
+        self.shingle_sets = []
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.shingle_sets)
+
+    @property
+    def lsh_threshold(self):
+        """Umbral LSH (1/b)^(1/r): el Jaccard donde sube la probabilidad de ser candidato.
+
+        Puede quedar por encima de threshold (p. ej. 0.125 para 0.1 con 128
+        permutaciones y al menos 2 filas por banda): los pares con Jaccard
+        entre ambos valores solo se encuentran con cierta probabilidad.
+        """
+        return (1 / self.bands) ** (1 / self.rows)
+
+    def add(self, token_id_arrays, labels, vocab_size):
+        """Añade documentos (arrays de ids) con su etiqueta (debate, orador, turno)."""
+        bits = id_bits(vocab_size)
+        if self.bits is None:
+            self.bits = bits
+        elif bits > self.bits:
+            raise ValueError("El vocabulario creció más allá de los bits del índice; reconstrúyalo")
+        new_sets = [np.unique(_shingle_keys(ids, self.n, self.bits)) for ids in token_id_arrays]
+        self.shingle_sets.extend(new_sets)
+        self.labels.extend(labels)
+        self.signatures = np.vstack([self.signatures, self.hasher.signatures(new_sets)])
+
+    @classmethod
+    def from_corpus(cls, corpus, speakers=None, debates=None, n=3, num_perm=128, threshold=0.5,
+                    bands=None, cache=None):
+        """Índice de todos los turnos (filtrables por orador y debate) de un DebateCorpus."""
+        from token_cache import get_cache
+
+        cache = cache or get_cache()
+        rows = corpus.select(debates, speakers)
+        ids = [cache.tokens(corpus.turn_text(row), content_only=True) for row in rows]
+        labels = [(corpus.debates[row['debate']], corpus.speakers[row['speaker']], int(row['turn']))
+                  for row in rows]
+        index = cls(n, num_perm, threshold, bands)
+        index.add(ids, labels, len(cache.vocabulary))
+        index.turns = rows
+        return index
+
+    def _band_hashes(self, band):
+        cols = self.signatures[:, band * self.rows:(band + 1) * self.rows].astype(np.uint64)
+        h = np.zeros(len(cols), dtype=np.uint64)
+        for c in range(cols.shape[1]):
+            h = _mix(h ^ cols[:, c])
+        return h
+
+    def candidates(self, min_shingles=5, cross_debate=True):
+        """Pares (i, j), i < j, que comparten al menos una banda LSH."""
+        eligible = np.array([len(s) >= min_shingles for s in self.shingle_sets], dtype=bool)
+        members = np.flatnonzero(eligible)
+        _, debates = np.unique(np.array([label[0] for label in self.labels], dtype=object),
+                               return_inverse=True)
+        size = np.int64(len(self))
+        keys = []
+        for band in range(self.bands):
+            h = self._band_hashes(band)
+            order = members[np.argsort(h[members], kind='stable')]
+            sorted_h = h[order]
+            bounds = np.flatnonzero(np.concatenate(([True], sorted_h[1:] != sorted_h[:-1], [True])))
+            starts, lengths = bounds[:-1], np.diff(bounds)
+            # Los cubos del mismo tamaño k se procesan juntos con los pares de triu_indices(k)
+            for k in np.unique(lengths[lengths > 1]).tolist():
+                first = starts[lengths == k][:, None]
+                x, y = np.triu_indices(k, k=1)
+                i, j = order[first + x].ravel(), order[first + y].ravel()
+                if cross_debate:
+                    keep = debates[i] != debates[j]
+                    i, j = i[keep], j[keep]
+                keys.append(np.minimum(i, j) * size + np.maximum(i, j))
+        if not keys:
+            return []
+        keys = np.unique(np.concatenate(keys))
+        return list(zip((keys // size).tolist(), (keys % size).tolist()))
+
+    def near_duplicates(self, threshold=None, min_shingles=5, cross_debate=True):
+        """[(i, j, jaccard)] de los candidatos LSH con Jaccard exacto >= threshold, de mayor a menor."""
+        threshold = self.threshold if threshold is None else threshold
+        matches = []
+        for i, j in self.candidates(min_shingles, cross_debate):
+            similarity = jaccard(self.shingle_sets[i], self.shingle_sets[j])
+            if similarity >= threshold:
+                matches.append((int(i), int(j), similarity))
+        matches.sort(key=lambda m: -m[2])
+        return matches
+
+    def clusters(self, matches):
+        """Grupos de turnos conectados por near-duplicates (puntos de discurso reutilizados)."""
+        if not matches:
+            return []
+        i, j, _ = zip(*matches)
+        graph = coo_matrix((np.ones(len(i)), (i, j)), shape=(len(self), len(self)))
+        _, component = connected_components(graph, directed=False)
+        sizes = np.bincount(component)
+        groups = {}
+        for turn in np.unique(np.concatenate([i, j])):
+            if sizes[component[turn]] > 1:
+                groups.setdefault(component[turn], []).append(int(turn))
+        return sorted(groups.values(), key=len, reverse=True)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--speaker': None, '--threshold': '0.5'}
+    while args and args[0] in options and len(args) > 1:
+        options[args[0]] = args[1]
+        args = args[2:]
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    from transcript_index import DebateCorpus
+
+    corpus = DebateCorpus.from_files(args)
+    index = MinHashIndex.from_corpus(corpus, speakers=options['--speaker'],
+                                     threshold=float(options['--threshold']))
+    matches = index.near_duplicates()
+    print(f"{len(index)} turnos indexados ({index.bands} bandas x {index.rows} filas, umbral LSH "
+          f"{index.lsh_threshold:.3f}), {len(matches)} pares reutilizados entre debates")
+    for i, j, similarity in matches[:20]:
+        print(f"{similarity:.3f}  {index.labels[i]}  <->  {index.labels[j]}")
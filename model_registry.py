@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Registro de modelos compartido por todo el proceso.
+
+Cada modelo se carga la primera vez que se pide y todos los analizadores que
+usan el mismo backbone reciben los mismos pesos. Los modelos pueden liberarse
+explícitamente o, si se fija un presupuesto de memoria, los menos usados se
+liberan automáticamente al cargar uno nuevo.
+"""
+
+import gc
+import threading
+from collections import OrderedDict
+
+
+def load_backbone(name):
+    """(tokenizer, modelo base) para embeddings."""
+    from transformers import AutoModel, AutoTokenizer
+    return AutoTokenizer.from_pretrained(name), AutoModel.from_pretrained(name)
+
+
+def load_sentiment_pipeline(name):
+    from transformers import pipeline
+    return pipeline("sentiment-analysis", model=name, tokenizer=name)
+
+
+def load_vader(name=None):
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+LOADERS = {
+    'backbone': load_backbone,
+    'sentiment': load_sentiment_pipeline,
+    'vader': load_vader,
+}
+
+
+def _modules(obj):
+    """Módulos de torch contenidos en un modelo, pipeline o tupla."""
+    if isinstance(obj, (tuple, list)):
+        for item in obj:
+            yield from _modules(item)
+    elif hasattr(obj, 'parameters'):
+        yield obj
+    elif hasattr(obj, 'model') and hasattr(obj.model, 'parameters'):
+        yield obj.model
+
+
+def memory_bytes(obj):
+    """Bytes ocupados por los parámetros y buffers de un modelo."""
+    total = 0
+    for module in _modules(obj):
+        total += sum(p.numel() * p.element_size() for p in module.parameters())
+        total += sum(b.numel() * b.element_size() for b in module.buffers())
+    return total
+
+
+class ModelRegistry:
+    """Carga perezosa y compartida de modelos, indexados por (tipo, nombre)."""
+
+    def __init__(self, loaders=None, max_bytes=None):
+        self.loaders = dict(LOADERS if loaders is None else loaders)
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._lock = threading.RLock()
+
+    def register(self, kind, loader):
+        """Añade o reemplaza el cargador de un tipo de modelo."""
+        with self._lock:
+            self.loaders[kind] = loader
+
+    def get(self, kind, name=None):
+        key = (kind, name)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self.loaders[kind](name)
+                self._models[key] = model
+                if self.max_bytes is not None:
+                    self.trim(self.max_bytes, keep=key)
+            self._models.move_to_end(key)
+            return model
+
+    def is_loaded(self, kind, name=None):
+        return (kind, name) in self._models
+
+    def loaded(self):
+        return list(self._models)
+
+    def memory_bytes(self):
+        return sum(memory_bytes(model) for model in self._models.values())
+
+    def release(self, kind, name=None):
+        with self._lock:
+            if self._models.pop((kind, name), None) is not None:
+                gc.collect()
+
+    def release_all(self):
+        with self._lock:
+            self._models.clear()
+            gc.collect()
+
+    def trim(self, max_bytes, keep=None):
+        """Libera los modelos usados hace más tiempo hasta quedar bajo max_bytes."""
+        with self._lock:
+            released = []
+            for key in list(self._models):
+                if self.memory_bytes() <= max_bytes:
+                    break
+                if key == keep:
+                    continue
+                del self._models[key]
+                released.append(key)
+            if released:
+                gc.collect()
+            return released
+
+
+registry = ModelRegistry()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Conteo de n-gramas sobre ids enteros.
+
+Cada n-grama de ids se empaqueta en una clave de 64 bits (bits por id x n
+<= 64) y las claves se cuentan con np.unique, sin tuplas ni cadenas
+intermedias. Solo los k n-gramas más frecuentes se decodifican a texto; los
+empates se ordenan por primera aparición, igual que Counter.most_common.
+"""
+
+import numpy as np
+
+
+def id_bits(vocab_size):
+    """Bits necesarios para representar un id de un vocabulario de ese tamaño."""
+    return max(1, int(vocab_size - 1).bit_length())
+
+
+def pack(ids, n, bits):
+    """Claves uint64 de los n-gramas consecutivos de un array de ids."""
+    ids = np.asarray(ids)
+    m = len(ids) - n + 1
+    if m <= 0:
+        return np.empty(0, dtype=np.uint64)
+    keys = ids[:m].astype(np.uint64)
+    shift = np.uint64(bits)
+    for k in range(1, n):
+        keys <<= shift
+        keys |= ids[k:k + m].astype(np.uint64)
+    return keys
+
+
+def unpack(keys, n, bits):
+    """Matriz (len(keys), n) con los ids de cada clave."""
+    keys = np.asarray(keys, dtype=np.uint64)
+    mask = np.uint64((1 << bits) - 1)
+    out = np.empty((len(keys), n), dtype=np.int64)
+    for k in range(n):
+        out[:, n - 1 - k] = (keys >> np.uint64(bits * k)) & mask
+    return out
+
+
+class NgramCounts:
+    """Frecuencias de los n-gramas de orden n de uno o varios arrays de ids.
+
+    Los n-gramas no cruzan el límite entre arrays (turnos, oradores o debates).
+    """
+
+    def __init__(self, token_id_arrays, n, vocab_size=None):
+        if isinstance(token_id_arrays, np.ndarray) and token_id_arrays.ndim == 1:
+            token_id_arrays = [token_id_arrays]
+        arrays = [np.asarray(ids) for ids in token_id_arrays]
+        if vocab_size is None:
+            vocab_size = max((int(ids.max()) + 1 for ids in arrays if len(ids)), default=1)
+
+        self.n = n
+        self.bits = id_bits(vocab_size)
+        if self.bits * n > 64:
+            raise ValueError(f"Un vocabulario de {vocab_size} tipos no cabe en claves de 64 bits para n={n}")
+
+        if n == 1:
+            self._count_unigrams(arrays, vocab_size)
+            return
+
+        keys = [pack(ids, n, self.bits) for ids in arrays]
+        keys = keys[0] if len(keys) == 1 else np.concatenate(keys or [np.empty(0, np.uint64)])
+        self.total = len(keys)
+
+        # Equivale a np.unique(return_index, return_counts) sin sus copias intermedias
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1]))) if len(keys) else order
+        self.keys = keys[starts]
+        self.first = order[starts]
+        self.counts = np.diff(np.append(starts, len(keys)))
+
+    def _count_unigrams(self, arrays, vocab_size):
+        ids = arrays[0] if len(arrays) == 1 else np.concatenate(arrays or [np.empty(0, np.int64)])
+        self.total = len(ids)
+        counts = np.bincount(ids, minlength=vocab_size)
+        # Asignando en orden inverso, la última escritura de cada id es su primera aparición
+        first = np.full(vocab_size, len(ids), dtype=np.int64)
+        first[ids[::-1]] = np.arange(len(ids) - 1, -1, -1)
+        self.keys = np.flatnonzero(counts).astype(np.uint64)
+        self.first = first[self.keys]
+        self.counts = counts[self.keys]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def top(self, k):
+        """Posiciones de los k n-gramas más frecuentes (empates por primera aparición)."""
+        if k <= 0 or not len(self.keys):
+            return np.empty(0, dtype=np.int64)
+        if k < len(self.keys):
+            # Todos los candidatos con frecuencia >= la k-ésima, para desempatar bien
+            kth = np.partition(self.counts, len(self.counts) - k)[len(self.counts) - k]
+            candidates = np.flatnonzero(self.counts >= kth)
+        else:
+            candidates = np.arange(len(self.keys))
+        order = np.lexsort((self.first[candidates], -self.counts[candidates]))
+        return candidates[order[:k]]
+
+    def ids(self, positions):
+        """Ids (matriz (len(positions), n)) de los n-gramas en esas posiciones."""
+        return unpack(self.keys[positions], self.n, self.bits)
+
+    def most_common(self, k, vocabulary, sep=' '):
+        """[(n-grama como texto, frecuencia)] de los k más frecuentes."""
+        positions = self.top(k)
+        return [
+            (sep.join(vocabulary[i] for i in gram), int(count))
+            for gram, count in zip(self.ids(positions), self.counts[positions])
+        ]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Grafo de etapas con checkpoints en disco y reanudación.
+
+Cada etapa declara sus dependencias; su clave es el hash de su nombre,
+versión, parámetros y del contenido de las salidas de sus dependencias. Las
+salidas se guardan en disco bajo esa clave, así que una nueva ejecución (o
+una comparación posterior) reutiliza todo lo que no cambió y solo recalcula
+las etapas afectadas. `plan()` / `run(dry_run=True)` indican qué se
+ejecutaría sin ejecutar nada.
+
+Las etapas sin checkpoint (checkpoint=False) se ejecutan siempre, pero
+guardan el digest de su última salida: así `plan()` conoce las claves de
+las etapas que dependen de ellas.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+
+
+def digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+class Stage:
+    def __init__(self, name, fn, deps=(), params=None, version='1', checkpoint=True, fingerprint=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.params = params or {}
+        self.version = version
+        self.checkpoint = checkpoint
+        # Entra en la clave pero no se pasa a fn (hash del archivo, modelo, backend...)
+        self.fingerprint = fingerprint
+
+    def key(self, input_digests):
+        payload = json.dumps({
+            'name': self.name,
+            'version': self.version,
+            'params': self.params,
+            'fingerprint': self.fingerprint,
+            'inputs': [input_digests[d] for d in self.deps],
+        }, sort_keys=True, default=repr)
+        return digest(payload.encode('utf-8'))
+
+
+class Pipeline:
+    """Etapas con nombre y dependencias, ejecutadas en orden topológico."""
+
+    def __init__(self, checkpoint_dir='checkpoints'):
+        self.checkpoint_dir = checkpoint_dir
+        self.stages = {}
+
+    def add(self, name, fn, deps=(), params=None, version='1', checkpoint=True, fingerprint=None):
+        """fn recibe las salidas de deps (en orden) y luego **params."""
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"La etapa {name} depende de {dep}, que no está definida")
+        self.stages[name] = Stage(name, fn, deps, params, version, checkpoint, fingerprint)
+        return self.stages[name]
+
+    def _order(self, targets=None):
+        targets = list(self.stages) if targets is None else list(targets)
+        order, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _paths(self, stage, key):
+        base = os.path.join(self.checkpoint_dir, f"{stage.name.replace(':', '_')}-{key}")
+        return base + '.pkl', base + '.json'
+
+    def _cached_digest(self, stage, key):
+        """Digest de la salida guardada bajo key (sin checkpoint: de la última ejecución)."""
+        data_path, meta_path = self._paths(stage, key)
+        if stage.checkpoint and not os.path.exists(data_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['output_digest']
+        except (OSError, ValueError, KeyError, TypeError):
+            # Sin meta, o truncado por una ejecución interrumpida: se recalcula
+            return None
+
+    def plan(self, targets=None):
+        """Lista de (etapa, 'cached' | 'run') sin ejecutar nada."""
+        digests, plan = {}, []
+        for name in self._order(targets):
+            stage = self.stages[name]
+            if all(dep in digests for dep in stage.deps):
+                cached = self._cached_digest(stage, stage.key(digests))
+                if cached is not None:
+                    digests[name] = cached
+                    # Sin checkpoint se vuelve a ejecutar, aunque ya se conozca su salida
+                    plan.append((name, 'cached' if stage.checkpoint else 'run'))
+                    continue
+            # Si una dependencia se recalcula, su salida (y esta clave) aún no se conoce
+            plan.append((name, 'run'))
+        return plan
+
+    def run(self, targets=None, dry_run=False, verbose=True):
+        """Salidas de las etapas pedidas (y sus dependencias), reutilizando checkpoints."""
+        if dry_run:
+            plan = self.plan(targets)
+            if verbose:
+                for name, action in plan:
+                    print(f"{'[ejecutar]' if action == 'run' else '[caché]   '} {name}")
+            return plan
+
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        outputs, digests = {}, {}
+        for name in self._order(targets):
+            stage = self.stages[name]
+            key = stage.key(digests)
+            data_path, meta_path = self._paths(stage, key)
+
+            cached = self._cached_digest(stage, key) if stage.checkpoint else None
+            if cached is not None:
+                with open(data_path, 'rb') as f:
+                    data = f.read()
+                outputs[name] = pickle.loads(data)
+                digests[name] = cached
+                if verbose:
+                    print(f"[caché]    {name}")
+                continue
+
+            if verbose:
+                print(f"[ejecutar] {name}")
+            outputs[name] = stage.fn(*(outputs[d] for d in stage.deps), **stage.params)
+            data = pickle.dumps(outputs[name], protocol=pickle.HIGHEST_PROTOCOL)
+            digests[name] = digest(data)
+
+            if stage.checkpoint:
+                # Escribir primero los datos: un meta sin datos nunca queda como checkpoint válido
+                tmp_path = data_path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, data_path)
+            # Sin checkpoint solo se guarda el digest, para que plan() conozca las claves siguientes
+            tmp_path = meta_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'stage': name, 'key': key, 'output_digest': digests[name]}, f)
+            os.replace(tmp_path, meta_path)
+
+        if targets is None:
+            return outputs
+        return {name: outputs[name] for name in targets}
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Índices de legibilidad calculados a partir de conteos compartidos.
+
+Cada texto se recorre una sola vez para contar oraciones, palabras, letras,
+caracteres, sílabas y palabras polisílabas; Flesch-Kincaid, Flesch Reading
+Ease, SMOG, Coleman-Liau y ARI se derivan de esos conteos. Las sílabas se
+calculan una vez por tipo de palabra (en minúsculas) y se reutilizan en todo
+el corpus, así que la legibilidad por turno es un arreglo vectorizado.
+
+Los conteos siguen las definiciones de textstat (palabras sin puntuación
+salvo los apóstrofos de contracciones, oraciones de más de dos palabras,
+sílabas con CMUdict y Pyphen como respaldo), por lo que los índices de un
+texto coinciden con los de textstat.
+"""
+
+import re
+
+import numpy as np
+
+COUNT_FIELDS = ('sentences', 'words', 'raw_words', 'letters', 'chars', 'syllables', 'polysyllables')
+COUNTS_DTYPE = np.dtype([(field, np.int64) for field in COUNT_FIELDS])
+
+INDICES = ('flesch_kincaid_grade', 'flesch_reading_ease', 'smog_index',
+           'coleman_liau_index', 'automated_readability_index')
+
+_SENTENCE = re.compile(r'\b[^.!?]+[.!?]*', re.UNICODE)
+_NONCONTRACTION_APOSTROPHE = re.compile(r"'(?![tsd]|ve|ll|re)")
+_PUNCTUATION = re.compile(r"[^\w\s']")
+_SPACE = re.compile(r'\s')
+_WORD_CHAR = re.compile(r'\w')
+
+
+def words(text):
+    """Palabras del texto sin puntuación (las contracciones cuentan como una)."""
+    return _PUNCTUATION.sub('', _NONCONTRACTION_APOSTROPHE.sub('', text)).split()
+
+
+def sentence_count(text):
+    """Oraciones con más de dos palabras (al menos 1 si el texto no está vacío)."""
+    if not text:
+        return 0
+    sentences = _SENTENCE.findall(text)
+    short = sum(1 for sentence in sentences if len(words(sentence)) <= 2)
+    return max(1, len(sentences) - short)
+
+
+def _load_cmudict(lang):
+    if not lang.startswith('en'):
+        return {}
+    import nltk
+    from nltk.corpus import cmudict
+    try:
+        return cmudict.dict()
+    except LookupError:
+        # Igual que textstat: si falta el corpus se descarga
+        nltk.download('cmudict', quiet=True)
+    try:
+        return cmudict.dict()
+    except LookupError:
+        # Sin el corpus (p. ej. sin red) todas las palabras se silabean con Pyphen
+        return {}
+
+
+class SyllableCounter:
+    """Sílabas por tipo de palabra, calculadas una sola vez por tipo."""
+
+    def __init__(self, lang='en_US'):
+        self.lang = lang
+        self.ids = {}
+        self.counts = []
+        self._cmudict = None
+        self._pyphen = None
+
+    def _syllables(self, word):
+        if self._pyphen is None:
+            from pyphen import Pyphen
+            self._cmudict = _load_cmudict(self.lang)
+            self._pyphen = Pyphen(lang=self.lang)
+        phones = self._cmudict.get(word)
+        if phones:
+            return sum(1 for phone in phones[0] if phone[-1].isdigit())
+        return len(self._pyphen.positions(word)) + 1
+
+    def encode(self, tokens):
+        """Ids de tipo (np.int32) de las palabras, añadiendo los tipos nuevos."""
+        ids = np.empty(len(tokens), dtype=np.int32)
+        for i, token in enumerate(tokens):
+            word = token.lower()
+            type_id = self.ids.get(word)
+            if type_id is None:
+                type_id = self.ids[word] = len(self.counts)
+                self.counts.append(self._syllables(word))
+            ids[i] = type_id
+        return ids
+
+    def table(self):
+        """Sílabas de cada tipo, indexables por los ids de encode."""
+        return np.asarray(self.counts, dtype=np.int64)
+
+    def __call__(self, word):
+        return self.counts[self.encode([word])[0]]
+
+
+_default_counter = None
+
+
+def get_syllable_counter():
+    """Contador de sílabas compartido por el proceso."""
+    global _default_counter
+    if _default_counter is None:
+        _default_counter = SyllableCounter()
+    return _default_counter
+
+
+def text_counts(texts, syllables=None):
+    """Arreglo estructurado COUNTS_DTYPE con los conteos de cada texto."""
+    syllables = syllables or get_syllable_counter()
+    texts = list(texts)
+    counts = np.zeros(len(texts), dtype=COUNTS_DTYPE)
+    word_ids = []
+    for i, text in enumerate(texts):
+        tokens = words(text)
+        word_ids.append(syllables.encode(tokens))
+        counts['sentences'][i] = sentence_count(text)
+        counts['words'][i] = len(tokens)
+        counts['raw_words'][i] = len(text.split())
+        counts['letters'][i] = len(_WORD_CHAR.findall(text))
+        counts['chars'][i] = len(text) - len(_SPACE.findall(text))
+
+    if texts:
+        per_word = syllables.table()[np.concatenate(word_ids)]
+        owner = np.repeat(np.arange(len(texts)), [len(ids) for ids in word_ids])
+        counts['syllables'] = np.bincount(owner, weights=per_word, minlength=len(texts))
+        counts['polysyllables'] = np.bincount(owner, weights=per_word >= 3, minlength=len(texts))
+    return counts
+
+
+def _ratio(a, b):
+    return np.divide(a, b, out=np.zeros_like(a), where=b > 0)
+
+
+def scores(counts):
+    """Los cinco índices (arreglos float64) para cada fila de conteos."""
+    c = {field: np.atleast_1d(counts[field]).astype(np.float64) for field in COUNT_FIELDS}
+    words_per_sentence = _ratio(c['words'], c['sentences'])
+    syllables_per_word = _ratio(c['syllables'], c['words'])
+    letters_per_word = _ratio(c['letters'], c['words'])
+    sentences_per_word = _ratio(c['sentences'], c['words'])
+    chars_per_word = _ratio(c['chars'], c['raw_words'])
+
+    # Igual que textstat, un índice vale 0 cuando alguno de sus cocientes es 0
+    flesch = (words_per_sentence == 0) | (syllables_per_word == 0)
+    coleman = (letters_per_word == 0) | (sentences_per_word == 0)
+    ari = (chars_per_word == 0) | (words_per_sentence == 0)
+    return {
+        'flesch_kincaid_grade': np.where(
+            flesch, 0.0, 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59),
+        'flesch_reading_ease': np.where(
+            flesch, 0.0, 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word),
+        'smog_index': np.where(
+            c['sentences'] == 0, 0.0,
+            1.043 * np.sqrt(30 * _ratio(c['polysyllables'], c['sentences'])) + 3.1291),
+        'coleman_liau_index': np.where(
+            coleman, 0.0, 0.058 * (letters_per_word * 100) - 0.296 * (sentences_per_word * 100) - 15.8),
+        'automated_readability_index': np.where(
+            ari, 0.0, 4.71 * chars_per_word + 0.5 * words_per_sentence - 21.43),
+    }
+
+
+def aggregate(counts):
+    """Conteos sumados (p. ej. de todos los turnos de un orador) como una sola fila."""
+    total = np.zeros(1, dtype=COUNTS_DTYPE)
+    for field in COUNT_FIELDS:
+        total[field] = counts[field].sum()
+    return total
+
+
+def readability(text, syllables=None):
+    """Los cinco índices de un texto, como floats."""
+    return {name: float(values[0]) for name, values in scores(text_counts([text], syllables)).items()}
+
+
+def turn_readability(corpus, rows=None, syllables=None):
+    """(conteos, índices) por turno, alineados con las filas del índice de turnos."""
+    if rows is None:
+        rows = corpus.turns
+    counts = text_counts((corpus.turn_text(row) for row in rows), syllables)
+    return counts, scores(counts)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Resultados en formato columnar: una fila por segmento u oración.
+
+Una tabla guarda:
+- `rows`: arreglo estructurado de NumPy con columnas tipadas (puntajes en
+  float64, contadores en int64, banderas en bool). Las columnas de texto corto
+  (debate, orador, etiqueta) se guardan como códigos int32 de una lista de
+  categorías.
+- `embeddings`: una sola matriz float32 contigua; la columna `embedding_row`
+  indica la fila de cada registro (-1 si no tiene).
+- los textos completos concatenados en UTF-8, con un arreglo de desplazamientos.
+
+En disco es un directorio con rows.npy, embeddings.npy, texts.bin,
+text_offsets.npy y meta.json; `load` lo abre con memoria mapeada, así que
+abrir un corpus completo no lee los datos hasta que se consultan.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+
+def _column_dtype(values):
+    """Tipo de una columna a partir de todos sus valores (no solo el primero).
+
+    Una columna con enteros y flotantes es float64, para no truncar los
+    flotantes (p. ej. un puntaje 0 entero seguido de 0.7).
+    """
+    present = [v for v in values if v is not None]
+    if not present:
+        return np.float64
+    if any(isinstance(v, str) for v in present):
+        return np.int32
+    if all(isinstance(v, (bool, np.bool_)) for v in present):
+        return np.bool_
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)) for v in present):
+        return np.int64
+    return np.float64
+
+
+class ResultTable:
+    """Tabla columnar de resultados con textos y embeddings referenciados por fila."""
+
+    def __init__(self, rows, categories=None, texts=None, embeddings=None):
+        self.rows = rows
+        self.categories = categories or {}
+        self.embeddings = embeddings
+        # Textos: lista en memoria o (blob UTF-8, desplazamientos) al cargar de disco
+        self._texts = texts
+        self._blob = None
+        self._offsets = None
+
+    @classmethod
+    def from_records(cls, records, text=None, embeddings=None, embedding_rows=None):
+        """Tabla a partir de dicts planos (mismas claves en todos).
+
+        Las columnas str se codifican como categorías; text es la lista de
+        textos completos (uno por registro) y embedding_rows la fila de
+        embeddings de cada registro.
+        """
+        names = list(records[0]) if records else []
+        columns, categories = {}, {}
+        for name in names:
+            values = [record[name] for record in records]
+            dtype = _column_dtype(values)
+            if dtype is np.int32:
+                labels = list(dict.fromkeys(values))
+                codes = {label: i for i, label in enumerate(labels)}
+                values = [codes[v] for v in values]
+                categories[name] = labels
+            columns[name] = np.asarray(values, dtype=dtype)
+
+        if embeddings is not None:
+            if embedding_rows is None:
+                embedding_rows = np.arange(len(records))
+            columns['embedding_row'] = np.asarray(embedding_rows, dtype=np.int64)
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        rows = np.empty(len(records), dtype=[(name, col.dtype) for name, col in columns.items()])
+        for name, col in columns.items():
+            rows[name] = col
+        return cls(rows, categories, list(text) if text is not None else None, embeddings)
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def columns(self):
+        return list(self.rows.dtype.names)
+
+    def column(self, name):
+        """Valores de una columna (las categóricas, ya decodificadas)."""
+        values = self.rows[name]
+        if name in self.categories:
+            return np.asarray(self.categories[name], dtype=object)[values]
+        return values
+
+    def code(self, name, label):
+        """Código entero de una etiqueta en una columna categórica (-1 si no existe)."""
+        labels = self.categories[name]
+        return labels.index(label) if label in labels else -1
+
+    def mask(self, **equals):
+        """Filas cuyas columnas valen lo indicado, p. ej. mask(debate='debate1', speaker='TRUMP')."""
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in equals.items():
+            if name in self.categories:
+                value = self.code(name, value)
+            mask &= self.rows[name] == value
+        return mask
+
+    def text(self, i):
+        if self._texts is not None:
+            return self._texts[i]
+        if self._blob is None:
+            return None
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]]).decode('utf-8')
+
+    def texts(self, indices=None):
+        indices = range(len(self)) if indices is None else indices
+        return [self.text(i) for i in indices]
+
+    def embedding(self, i):
+        return self.embeddings[self.rows['embedding_row'][i]]
+
+    def to_frame(self, text=False):
+        """DataFrame con las columnas (categóricas como pandas.Categorical)."""
+        data = {}
+        for name in self.columns:
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(self.rows[name], self.categories[name])
+            else:
+                data[name] = self.rows[name]
+        frame = pd.DataFrame(data)
+        if text:
+            frame['text'] = self.texts()
+        return frame
+
+    # --- Persistencia --------------------------------------------------------
+
+    def save(self, path):
+        """Escribe la tabla en el directorio path."""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, 'rows.npy'), np.ascontiguousarray(self.rows))
+        if self.embeddings is not None:
+            np.save(os.path.join(path, 'embeddings.npy'), np.ascontiguousarray(self.embeddings))
+
+        texts = self.texts() if (self._texts is not None or self._blob is not None) else None
+        if texts is not None:
+            encoded = [t.encode('utf-8') for t in texts]
+            offsets = np.concatenate(([0], np.cumsum([len(b) for b in encoded]))).astype(np.int64)
+            with open(os.path.join(path, 'texts.bin'), 'wb') as f:
+                f.write(b''.join(encoded))
+            np.save(os.path.join(path, 'text_offsets.npy'), offsets)
+
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'version': FORMAT_VERSION,
+                'rows': len(self),
+                'categories': self.categories,
+                'embeddings': self.embeddings is not None,
+                'texts': texts is not None,
+            }, f, ensure_ascii=False, indent=1)
+
+
+def load(path, mmap=True):
+    """Abre una tabla guardada con ResultTable.save (con memoria mapeada por defecto)."""
+    mode = 'r' if mmap else None
+    with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f"Formato de resultados {meta['version']} no soportado en {path}")
+
+    rows = np.load(os.path.join(path, 'rows.npy'), mmap_mode=mode)
+    embeddings = None
+    if meta['embeddings']:
+        embeddings = np.load(os.path.join(path, 'embeddings.npy'), mmap_mode=mode)
+    table = ResultTable(rows, meta['categories'], embeddings=embeddings)
+    if meta['texts']:
+        table._offsets = np.load(os.path.join(path, 'text_offsets.npy'), mmap_mode=mode)
+        blob_path = os.path.join(path, 'texts.bin')
+        if os.path.getsize(blob_path) == 0:
+            table._blob = b''
+        elif mmap:
+            table._blob = np.memmap(blob_path, dtype=np.uint8, mode='r')
+        else:
+            with open(blob_path, 'rb') as f:
+                table._blob = f.read()
+    return table
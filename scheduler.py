@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""Ejecución en paralelo de los análisis por (debate, orador, etapa).
+
+Cada (debate, orador) se envía a un pool de procesos como una sola tarea con
+los turnos de ese orador (no la transcripción completa); el proceso ejecuta
+todas las etapas pedidas sobre ese texto, que así se tokeniza una sola vez.
+Los resultados se devuelven en el mismo orden en que se crearon las
+unidades, así la salida es determinista sin importar qué proceso termine
+primero. Las etapas solo calculan; los gráficos se generan después en el proceso principal. Los
+procesos del pool leen la caché de tokens en disco (DEBATES_TOKEN_CACHE)
+pero no escriben en ella: solo el proceso principal la actualiza.
+"""
+
+import os
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+Unit = namedtuple('Unit', ['debate', 'speaker', 'stage'])
+
+STAGES = {}
+
+
+def stage(name):
+    """Registra una función de análisis como etapa ejecutable por el scheduler."""
+    def register(fn):
+        STAGES[name] = fn
+        return fn
+    return register
+
+
+@stage('stats')
+def word_stats(text, top_n=200):
+    """Palabras, bigramas y trigramas más frecuentes, total de tokens y TTR.
+
+    Los n-gramas se cuentan sobre ids enteros y solo se decodifican los top_n
+    más frecuentes (los que usan las nubes de palabras y los gráficos).
+    """
+    import numpy as np
+    from ngrams import NgramCounts
+    from token_cache import get_cache
+
+    cache = get_cache()
+    tokens = cache.tokens(text)
+    content = cache.tokens(text, content_only=True)
+    vocabulary = cache.vocabulary.words
+    stats = {
+        'total_tokens': len(tokens),
+        'ttr': len(np.unique(tokens)) / len(tokens) if len(tokens) else 0.0,
+        'total_words': len(content),
+    }
+    for name, n in (('words', 1), ('bigrams', 2), ('trigrams', 3)):
+        stats[name] = NgramCounts(content, n, len(vocabulary)).most_common(top_n, vocabulary)
+    return stats
+
+
+@stage('network')
+def network(text, n=30, window=1, weighting='count'):
+    from cooccurrence import word_network
+    from token_cache import get_cache
+
+    cache = get_cache()
+    return word_network(cache.tokens(text, content_only=True), cache.vocabulary.words,
+                        n=n, window=window, weighting=weighting)
+
+
+@stage('sentiment')
+def sentence_polarity(text):
+    """(oraciones, polaridad estilo TextBlob de cada oración), vectorizada sobre los ids."""
+    from lexicon_sentiment import get_scorer
+
+    sentences, scores = get_scorer().score_text(text)
+    return sentences, scores['polarity'].tolist()
+
+
+@stage('readability')
+def readability_scores(text):
+    """Los cinco índices de legibilidad a partir de un solo recorrido del texto."""
+    from readability import readability
+    return readability(text)
+
+
+@stage('polarity')
+def text_polarity(text):
+    from lexicon_sentiment import get_scorer
+    return get_scorer().text_polarity(text)
+
+
+def _init_worker():
+    from token_cache import get_cache
+    get_cache().read_only = True
+
+
+def _run_task(task):
+    stage_names, texts, params = task
+    text = ' '.join(texts)
+    if isinstance(stage_names, str):
+        return STAGES[stage_names](text, **params)
+    # Varias etapas sobre el mismo texto: comparten la tokenización en la caché del proceso
+    return [STAGES[name](text, **params.get(name, {})) for name in stage_names]
+
+
+def run_tasks(tasks, workers=None):
+    """Ejecuta (etapa, textos, parámetros) y devuelve los resultados en el orden de entrada.
+
+    etapa puede ser una tupla de etapas (parámetros: dict etapa -> parámetros);
+    el resultado es entonces la lista de resultados de cada etapa.
+
+    workers=1 ejecuta todo en el proceso actual; None usa todos los núcleos.
+    """
+    tasks = list(tasks)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return [_run_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker) as pool:
+        # map conserva el orden de las tareas
+        return list(pool.map(_run_task, tasks))
+
+
+def speaker_units(corpus, speakers_by_debate, stages, params=None):
+    """Unidades (debate, orador, etapa) y una tarea por (debate, orador) con todas sus etapas."""
+    params = params or {}
+    stages = tuple(stages)
+    units, tasks = [], []
+    for debate, speakers in speakers_by_debate.items():
+        index = corpus[debate]
+        for speaker in speakers:
+            units.extend(Unit(debate, speaker, stage_name) for stage_name in stages)
+            tasks.append((stages, list(index.iter_texts(speaker)),
+                          {stage_name: params.get(stage_name, {}) for stage_name in stages}))
+    return units, tasks
+
+
+def run_units(corpus, speakers_by_debate, stages, workers=None, params=None):
+    """OrderedDict Unit -> resultado, en orden debate, orador, etapa."""
+    units, tasks = speaker_units(corpus, speakers_by_debate, stages, params)
+    results = [result for task_results in run_tasks(tasks, workers) for result in task_results]
+    return OrderedDict(zip(units, results))
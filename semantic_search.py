@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""Búsqueda semántica de turnos/segmentos por similitud coseno de embeddings.
+
+Los embeddings de todos los segmentos se guardan normalizados (L2) en una
+matriz float32, de modo que la similitud coseno con una consulta es un solo
+producto matriz-vector y los k mejores se obtienen con argpartition. Para
+corpus grandes se construye además un índice IVF: k-means esférico sobre los
+embeddings, listas invertidas contiguas por centroide y, en cada consulta,
+solo se puntúan las filas de los `n_probe` centroides más cercanos.
+
+Las consultas pueden ser un texto (se calcula su embedding con el mismo
+embedder), un turno ya indexado o un vector, filtradas por orador y debate.
+Cada resultado incluye la latencia de la consulta en milisegundos. El índice
+se guarda y se carga con save/load para no recalcular los embeddings.
+
+Uso desde la línea de comandos:
+    python semantic_search.py [--speaker TRUMP] [--debate debate] [--k 10] "consulta" debate.txt ...
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from keyness import top_k
+
+# Por debajo de este número de filas la búsqueda exacta es más rápida que IVF
+EXACT_LIMIT = 50000
+
+
+def normalize(vectors):
+    """Filas normalizadas (L2) en float32; las filas nulas quedan en cero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def spherical_kmeans(vectors, n_clusters, iterations=10, seed=0, sample=None):
+    """Centroides normalizados (k-means con similitud coseno) de filas ya normalizadas."""
+    rng = np.random.default_rng(seed)
+    n_clusters = min(n_clusters, len(vectors))
+    train = vectors
+    if sample is not None and len(vectors) > sample:
+        train = vectors[rng.choice(len(vectors), sample, replace=False)]
+    centers = train[rng.choice(len(train), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(train @ centers.T, axis=1)
+        members = csr_matrix((np.ones(len(train), dtype=np.float32), (assign, np.arange(len(train)))),
+                             shape=(n_clusters, len(train)))
+        sums = np.asarray(members @ train)
+        empty = np.bincount(assign, minlength=n_clusters) == 0
+        # Los centroides sin miembros se reinician en filas al azar
+        sums[empty] = train[rng.choice(len(train), int(empty.sum()), replace=False)]
+        centers = normalize(sums)
+    return centers
+
+
+class SegmentIndex:
+    """Embeddings de segmentos con etiquetas (debate, orador, turno) y su texto."""
+
+    def __init__(self, embeddings, labels, texts=None, embed=None):
+        self.embeddings = normalize(embeddings)
+        self.debates = np.array([str(label[0]) for label in labels])
+        self.speakers = np.array([str(label[1]) for label in labels])
+        self.turns = np.array([int(label[2]) for label in labels], dtype=np.int64)
+        self.texts = list(texts) if texts is not None else [''] * len(labels)
+        # Función texto(s) -> matriz de embeddings para las consultas por texto
+        self.embed = embed
+        self.centers = None
+        self.list_rows = None
+        self.list_offsets = None
+        self.n_probe = None
+        self.latencies = []
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    @property
+    def labels(self):
+        return list(zip(self.debates.tolist(), self.speakers.tolist(), self.turns.tolist()))
+
+    @classmethod
+    def from_corpus(cls, corpus, embedder, debates=None, speakers=None, preprocess=None, min_words=0):
+        """Índice de los turnos de un DebateCorpus (embeddings con embedder.embed)."""
+        rows = corpus.select(debates, speakers)
+        texts = [corpus.turn_text(row) for row in rows]
+        if preprocess is not None:
+            texts = [preprocess(text) for text in texts]
+        keep = [i for i, text in enumerate(texts) if len(text.split()) >= min_words]
+        rows = rows[keep]
+        labels = [(corpus.debates[row['debate']], corpus.speakers[row['speaker']], int(row['turn']))
+                  for row in rows]
+        texts = [texts[i] for i in keep]
+        return cls(embedder.embed(texts), labels, texts, embed=embedder.embed)
+
+    # --- IVF ---------------------------------------------------------------
+
+    def build_ivf(self, n_lists=None, n_probe=None, iterations=10, seed=0):
+        """Agrupa las filas en n_lists listas invertidas (por defecto ~sqrt(n))."""
+        if n_lists is None:
+            n_lists = max(1, int(np.sqrt(len(self))))
+        # k-means sobre una muestra de ~64 filas por lista; luego se asignan todas
+        self.centers = spherical_kmeans(self.embeddings, n_lists, iterations, seed,
+                                        sample=64 * n_lists)
+        assign = np.argmax(self.embeddings @ self.centers.T, axis=1)
+        self.list_rows = np.argsort(assign, kind='stable')
+        self.list_offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(self.centers)))))
+        self.n_probe = n_probe or max(1, len(self.centers) // 8)
+        return self
+
+    def _probe(self, query, n_probe):
+        """Filas de las listas de los n_probe centroides más cercanos a la consulta."""
+        nearest = top_k(self.centers @ query, n_probe)
+        return np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]]
+                               for c in nearest])
+
+    # --- Consultas -----------------------------------------------------------
+
+    def mask(self, speakers=None, debates=None):
+        """Filas que cumplen los filtros por orador y debate (None = sin filtro)."""
+        mask = np.ones(len(self), dtype=bool)
+        if speakers is not None:
+            mask &= np.isin(self.speakers, [speakers] if isinstance(speakers, str) else list(speakers))
+        if debates is not None:
+            mask &= np.isin(self.debates, [debates] if isinstance(debates, str) else list(debates))
+        return mask
+
+    def _search(self, query, k, speakers, debates, exclude, exact, n_probe):
+        query = normalize(query).ravel()
+        filtered = speakers is not None or debates is not None
+        mask = self.mask(speakers, debates)
+        if exclude is not None:
+            mask[exclude] = False
+
+        rows = None
+        if self.centers is not None and not exact:
+            rows = self._probe(query, n_probe or self.n_probe)
+            rows = rows[mask[rows]]
+            # Si los filtros dejan muy pocas filas en las listas exploradas, búsqueda exacta
+            if len(rows) < k:
+                rows = None
+        if rows is None and not filtered:
+            # Sin filtros: producto con la matriz completa, sin copiar filas
+            scores = self.embeddings @ query
+            if exclude is not None:
+                scores[exclude] = -np.inf
+            best = top_k(scores, min(k, int(mask.sum())))
+            return best, scores[best], len(self)
+        if rows is None:
+            rows = np.flatnonzero(mask)
+
+        scores = self.embeddings[rows] @ query
+        best = top_k(scores, k)
+        return rows[best], scores[best], len(rows)
+
+    def _hits(self, rows, scores):
+        return pd.DataFrame({
+            'debate': self.debates[rows],
+            'speaker': self.speakers[rows],
+            'turn': self.turns[rows],
+            'score': scores.astype(np.float64),
+            'text': [self.texts[i] for i in rows],
+        })
+
+    def search(self, query, k=10, speakers=None, debates=None, exclude=None, exact=False, n_probe=None):
+        """Los k segmentos más similares a un vector de consulta.
+
+        Devuelve un dict con 'hits' (DataFrame debate, orador, turno, score y
+        texto, de mayor a menor similitud), 'scored' (filas puntuadas) y
+        'latency_ms'. Con IVF construido, exact=True fuerza la búsqueda exacta.
+        """
+        start = time.perf_counter()
+        rows, scores, scored = self._search(query, k, speakers, debates, exclude, exact, n_probe)
+        latency = (time.perf_counter() - start) * 1000
+        self.latencies.append(latency)
+        return {'hits': self._hits(rows, scores), 'scored': scored, 'latency_ms': latency}
+
+    def search_text(self, text, k=10, speakers=None, debates=None, exact=False, n_probe=None):
+        """Como search, con el embedding del texto; 'latency_ms' incluye el cálculo del embedding."""
+        if self.embed is None:
+            raise ValueError("El índice no tiene embedder: páselo como embed= o use search con un vector")
+        start = time.perf_counter()
+        query = self.embed([text])[0]
+        embed_ms = (time.perf_counter() - start) * 1000
+        result = self.search(query, k, speakers, debates, None, exact, n_probe)
+        result['embed_ms'] = embed_ms
+        result['latency_ms'] += embed_ms
+        self.latencies[-1] = result['latency_ms']
+        return result
+
+    def search_turn(self, row, k=10, speakers=None, debates=None, exact=False, n_probe=None):
+        """Segmentos más similares a la fila `row` del índice (excluida ella misma)."""
+        return self.search(self.embeddings[row], k, speakers, debates, row, exact, n_probe)
+
+    def find(self, debate, speaker, turn):
+        """Fila del índice del turno (debate, orador, turno), o None."""
+        rows = np.flatnonzero((self.debates == debate) & (self.speakers == speaker) & (self.turns == turn))
+        return int(rows[0]) if len(rows) else None
+
+    # --- Persistencia --------------------------------------------------------
+
+    def save(self, path):
+        """Guarda embeddings, etiquetas, textos y el IVF (si existe) en un .npz."""
+        arrays = {'embeddings': self.embeddings, 'debates': self.debates, 'speakers': self.speakers,
+                  'turns': self.turns, 'texts': np.array(self.texts, dtype=str)}
+        if self.centers is not None:
+            arrays.update(centers=self.centers, list_rows=self.list_rows,
+                          list_offsets=self.list_offsets, n_probe=np.array(self.n_probe))
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, embed=None):
+        with np.load(path) as data:
+            labels = zip(data['debates'], data['speakers'], data['turns'])
+            index = cls(data['embeddings'], list(labels), data['texts'].tolist(), embed=embed)
+            if 'centers' in data:
+                index.centers = data['centers']
+                index.list_rows = data['list_rows']
+                index.list_offsets = data['list_offsets']
+                index.n_probe = int(data['n_probe'])
+        return index
+
+
+def build_index(embeddings, labels, texts=None, embed=None, kind='auto', **ivf_options):
+    """SegmentIndex exacto o con IVF ('auto': IVF a partir de EXACT_LIMIT filas)."""
+    index = SegmentIndex(embeddings, labels, texts, embed)
+    if kind == 'ivf' or (kind == 'auto' and len(index) >= EXACT_LIMIT):
+        index.build_ivf(**ivf_options)
+    return index
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--speaker': None, '--debate': None, '--k': '10'}
+    while args and args[0] in options and len(args) > 1:
+        options[args[0]] = args[1]
+        args = args[2:]
+    if len(args) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    from embeddings import BatchedEmbedder
+    from model_registry import registry
+    from transcript_index import DebateCorpus
+
+    query, files = args[0], args[1:]
+    tokenizer, model = registry.get('backbone', 'bert-base-uncased')
+    corpus = DebateCorpus.from_files(files)
+    index = SegmentIndex.from_corpus(corpus, BatchedEmbedder(tokenizer, model), min_words=5)
+    result = index.search_text(query, int(options['--k']), speakers=options['--speaker'],
+                               debates=options['--debate'])
+    print(f"{len(index)} turnos indexados; {result['scored']} puntuados en {result['latency_ms']:.1f} ms")
+    print(result['hits'].to_string(index=False, max_colwidth=80))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Sentimiento con transformers por lotes bajo un presupuesto de tokens.
+
+Las oraciones se tokenizan una vez, se ordenan por longitud y se agrupan en
+lotes con relleno dinámico; los resultados se devuelven en el orden original.
+"""
+
+import numpy as np
+import torch
+
+from batching import length_bucketed_batches
+
+
+def classify_ids(model, tokenizer, input_ids, batch_size=64, max_tokens=8192):
+    """Probabilidades (n, n_etiquetas) para secuencias ya tokenizadas."""
+    n_labels = model.config.num_labels
+    probs = np.zeros((len(input_ids), n_labels), dtype=np.float32)
+    if not input_ids:
+        return probs
+
+    lengths = [len(ids) for ids in input_ids]
+    if hasattr(model, 'eval'):
+        model.eval()
+    with torch.inference_mode():
+        for batch in length_bucketed_batches(lengths, batch_size, max_tokens):
+            inputs = tokenizer.pad({'input_ids': [input_ids[i] for i in batch]}, return_tensors='pt')
+            logits = model(**inputs).logits
+            probs[batch] = torch.softmax(logits.float(), dim=-1).numpy()
+    return probs
+
+
+def classify(model, tokenizer, texts, batch_size=64, max_tokens=8192, max_length=512):
+    """Probabilidades por texto, truncando cada uno a max_length tokens."""
+    input_ids = tokenizer(list(texts), truncation=True, max_length=max_length)['input_ids']
+    return classify_ids(model, tokenizer, input_ids, batch_size, max_tokens)
+
+
+def label_names(model):
+    id2label = model.config.id2label
+    return [id2label[i] for i in range(model.config.num_labels)]
+
+
+def score_sentences(model, tokenizer, sentences, vader=None, batch_size=64, max_tokens=8192):
+    """Sentimiento por oración: etiqueta, confianza y distribución completa.
+
+    Si se pasa un LexiconScorer como vader, el compound estilo VADER de todas
+    las oraciones se calcula vectorizado sobre sus ids de tokens.
+    """
+    probs = classify(model, tokenizer, sentences, batch_size, max_tokens)
+    best = probs.argmax(axis=1) if len(probs) else np.zeros(0, dtype=np.int64)
+    names = label_names(model)
+
+    result = {
+        'labels': [names[i] for i in best],
+        'scores': probs[np.arange(len(probs)), best],
+        'probs': probs,
+        'label_names': names,
+    }
+    if vader is not None:
+        result['vader_compound'] = vader.score_sentences(sentences)['compound']
+    return result
+
+
+def token_windows(input_ids, window, stride=None):
+    """Ventanas de window tokens que empiezan cada stride tokens (sin tokens especiales)."""
+    stride = stride or window
+    if len(input_ids) <= window:
+        return [input_ids]
+    starts = range(0, len(input_ids) - window + stride, stride)
+    return [input_ids[start:start + window] for start in starts if start < len(input_ids)]
+
+
+def score_segments(model, tokenizer, segments, window=None, stride=None,
+                   batch_size=64, max_tokens=8192):
+    """Sentimiento por segmento a partir de ventanas de tokens procesadas en lotes compartidos.
+
+    Las ventanas de todos los segmentos se clasifican juntas; después se
+    agregan por segmento ponderando cada ventana por su número de tokens.
+    """
+    if window is None:
+        window = min(tokenizer.model_max_length, 512) - 2
+    cls_id, sep_id = tokenizer.cls_token_id, tokenizer.sep_token_id
+    encoded = tokenizer(list(segments), add_special_tokens=False, truncation=False,
+                        verbose=False)['input_ids']
+
+    owners, weights, windows = [], [], []
+    for i, ids in enumerate(encoded):
+        for chunk in token_windows(ids, window, stride):
+            windows.append([cls_id] + chunk + [sep_id])
+            owners.append(i)
+            weights.append(max(len(chunk), 1))
+
+    window_probs = classify_ids(model, tokenizer, windows, batch_size, max_tokens)
+    owners = np.asarray(owners, dtype=np.int64)
+    weights = np.asarray(weights, dtype=np.float64)
+    totals = np.bincount(owners, weights=weights, minlength=len(encoded))[:, None]
+
+    probs = np.zeros((len(encoded), window_probs.shape[1]), dtype=np.float64)
+    np.add.at(probs, owners, window_probs * weights[:, None])
+    probs /= totals
+
+    # Confianza de la etiqueta ganadora en cada ventana, promediada por longitud
+    window_scores = window_probs.max(axis=1) if len(window_probs) else np.zeros(0)
+    scores = np.bincount(owners, weights=window_scores * weights, minlength=len(encoded)) / totals[:, 0]
+
+    names = label_names(model)
+    best = probs.argmax(axis=1) if len(probs) else np.zeros(0, dtype=np.int64)
+    return {
+        'labels': [names[i] for i in best],
+        'scores': scores,
+        'probs': probs,
+        'label_names': names,
+        'n_windows': np.bincount(owners, minlength=len(encoded)),
+    }
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""Series de sentimiento: medias móviles, EWMA, volatilidad y cambios de tono.
+
+Todas las series se calculan sobre arreglos de NumPy con sumas acumuladas:
+- media móvil y volatilidad (desviación estándar móvil) en O(n) con cumsum
+  de los valores y de sus cuadrados, sin importar el tamaño de la ventana;
+- EWMA (con el mismo ajuste que pandas `ewm(adjust=True)`) con cumsum por
+  bloques, para que los pesos exponenciales no desborden en series largas;
+- puntos de cambio en la media con PELT (costo cuadrático, poda exacta); en
+  series muy largas, con segmentación binaria, O(n log n).
+
+`timeline` pone las oraciones (o turnos) de todos los oradores de un debate
+en una línea de tiempo común (orden de turno y oración), calcula las series
+de cada orador una sola vez y las deja como columnas de un DataFrame que
+después usan todos los gráficos y reportes; `align` reparte la serie de cada
+orador sobre todas las posiciones del debate (último valor conocido).
+"""
+
+import numpy as np
+import pandas as pd
+
+SERIES_COLUMNS = ('rolling_mean', 'ewma', 'volatility', 'level')
+
+# Hasta este largo se usa PELT (óptimo); sin cambios la poda apenas descarta
+# candidatos y su costo crece de forma cuadrática
+PELT_LIMIT = 10000
+
+
+def rolling_mean(values, window, min_periods=1):
+    """Media de los últimos `window` valores (NaN con menos de min_periods)."""
+    x = np.asarray(values, dtype=np.float64)
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    end = np.arange(1, len(x) + 1)
+    start = np.maximum(end - window, 0)
+    count = end - start
+    mean = (sums[end] - sums[start]) / np.maximum(count, 1)
+    mean[count < min_periods] = np.nan
+    return mean
+
+
+def rolling_std(values, window, min_periods=2):
+    """Desviación estándar móvil (ddof=1) de los últimos `window` valores."""
+    x = np.asarray(values, dtype=np.float64)
+    # Centrar antes de acumular evita perder precisión en series largas
+    x = x - x.mean() if len(x) else x
+    sums = np.concatenate(([0.0], np.cumsum(x)))
+    squares = np.concatenate(([0.0], np.cumsum(x * x)))
+    end = np.arange(1, len(x) + 1)
+    start = np.maximum(end - window, 0)
+    count = end - start
+    s1 = sums[end] - sums[start]
+    s2 = squares[end] - squares[start]
+    variance = (s2 - s1 * s1 / np.maximum(count, 1)) / np.maximum(count - 1, 1)
+    std = np.sqrt(np.maximum(variance, 0.0))
+    std[count < max(min_periods, 2)] = np.nan
+    return std
+
+
+def ewma(values, span=None, alpha=None):
+    """Media móvil exponencial (como pandas ewm(span=...).mean(), adjust=True)."""
+    if alpha is None:
+        alpha = 2.0 / ((span or 20) + 1.0)
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    decay = 1.0 - alpha
+    if n == 0 or decay <= 0.0:
+        return x.copy()
+
+    # numerador_t = sum_i decay^(t-i) x_i; dentro de un bloque se acumula
+    # decay^-j x_j, y el bloque se limita para que decay^-j no desborde
+    block = max(1, int(50.0 / -np.log(decay)))
+    numerator = np.empty(n)
+    carry = 0.0
+    for start in range(0, n, block):
+        chunk = x[start:start + block]
+        j = np.arange(len(chunk))
+        power = decay ** j
+        numerator[start:start + len(chunk)] = power * (carry + np.cumsum(chunk / power))
+        carry = numerator[start + len(chunk) - 1] * decay
+    # denominador_t = sum_i decay^(t-i), en forma cerrada
+    denominator = (1.0 - decay ** np.arange(1, n + 1)) / alpha
+    return numerator / denominator
+
+
+def default_penalty(values):
+    """Penalización tipo BIC (2 * varianza del ruido * log n) para change_points.
+
+    La varianza del ruido se estima con las diferencias consecutivas, que
+    casi no dependen de los saltos de nivel. No se usa la MAD: los puntajes
+    por oración tienen muchos ceros y colas largas, y con ella la varianza
+    queda subestimada y aparecen cambios espurios.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    if len(x) < 3:
+        return np.inf
+    variance = np.diff(x).var() / 2.0
+    return 2.0 * variance * np.log(len(x))
+
+
+def _cumulative(x):
+    x = x - x.mean()
+    return (np.concatenate(([0.0], np.cumsum(x))),
+            np.concatenate(([0.0], np.cumsum(x * x))))
+
+
+def pelt(values, penalty, min_size=5):
+    """Partición óptima con PELT: tramos de media constante, penalty por tramo."""
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    sums, squares = _cumulative(x)
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    previous = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.zeros(1, dtype=np.int64)
+    for t in range(min_size, n + 1):
+        s1 = sums[t] - sums[candidates]
+        cost = best[candidates] + (squares[t] - squares[candidates]) - s1 * s1 / (t - candidates)
+        k = np.argmin(cost)
+        best[t] = cost[k] + penalty
+        previous[t] = candidates[k]
+        # Poda: un inicio que ya es peor que el óptimo no volverá a serlo
+        candidates = np.append(candidates[cost <= best[t]], t - min_size + 1)
+
+    points = []
+    t = previous[n]
+    while t > 0:
+        points.append(t)
+        t = previous[t]
+    return np.asarray(points[::-1], dtype=np.int64)
+
+
+def binary_segmentation(values, penalty, min_size=5):
+    """Divide recursivamente cada tramo en su mejor corte mientras la ganancia supere penalty."""
+    x = np.asarray(values, dtype=np.float64)
+    sums, squares = _cumulative(x)
+
+    def cost(a, b):
+        s1 = sums[b] - sums[a]
+        return (squares[b] - squares[a]) - s1 * s1 / (b - a)
+
+    points = []
+    pending = [(0, len(x))]
+    while pending:
+        a, b = pending.pop()
+        if b - a < 2 * min_size:
+            continue
+        # Todos los cortes posibles del tramo a la vez
+        k = np.arange(a + min_size, b - min_size + 1)
+        gain = cost(a, b) - cost(a, k) - cost(k, b)
+        best = int(np.argmax(gain))
+        if gain[best] > penalty:
+            split = int(k[best])
+            points.append(split)
+            pending.extend([(a, split), (split, b)])
+    return np.asarray(sorted(points), dtype=np.int64)
+
+
+def change_points(values, penalty=None, min_size=5, method='auto'):
+    """Índices donde empieza un nuevo tramo de media constante.
+
+    Minimiza la suma de errores cuadráticos de cada tramo más `penalty` por
+    tramo; cada tramo tiene al menos min_size puntos. method: 'pelt' (óptimo;
+    la poda descarta los inicios que ya no pueden serlo), 'binseg' o 'auto'
+    (PELT hasta PELT_LIMIT puntos).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    min_size = max(int(min_size), 1)
+    if penalty is None:
+        penalty = default_penalty(x)
+    if len(x) < 2 * min_size or not np.isfinite(penalty):
+        return np.zeros(0, dtype=np.int64)
+    if method == 'auto':
+        method = 'pelt' if len(x) <= PELT_LIMIT else 'binseg'
+    if method == 'pelt':
+        return pelt(x, penalty, min_size)
+    if method == 'binseg':
+        return binary_segmentation(x, penalty, min_size)
+    raise ValueError(f"Método de puntos de cambio desconocido: {method}")
+
+
+def segment_levels(values, points):
+    """Media de cada tramo entre puntos de cambio, repetida en cada posición."""
+    x = np.asarray(values, dtype=np.float64)
+    segment = np.zeros(len(x), dtype=np.int64)
+    segment[np.asarray(points, dtype=np.int64)] = 1
+    segment = np.cumsum(segment)
+    means = np.bincount(segment, x) / np.maximum(np.bincount(segment), 1)
+    return means[segment]
+
+
+def analyze_series(values, window=20, span=None, penalty=None, min_size=5, method='auto'):
+    """Todas las series derivadas de una serie de puntajes, en arreglos del mismo largo.
+
+    Devuelve rolling_mean, ewma (span = window si no se indica), volatility,
+    level (media del tramo entre cambios) y change_point (True donde empieza
+    un tramo nuevo).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    points = change_points(x, penalty, min_size, method)
+    change = np.zeros(len(x), dtype=bool)
+    change[points] = True
+    return {
+        'values': x,
+        'rolling_mean': rolling_mean(x, window),
+        'ewma': ewma(x, span or window),
+        'volatility': rolling_std(x, window),
+        'level': segment_levels(x, points),
+        'change_point': change,
+    }
+
+
+def timeline(frame, value, window=20, span=None, penalty=None, min_size=5,
+             order=('turn', 'sentence'), method='auto'):
+    """Series de cada (debate, orador) sobre la línea de tiempo común de su debate.
+
+    frame: una fila por oración o turno con columnas debate, speaker, las de
+    `order` que existan y la columna de puntaje `value` (p. ej. la salida de
+    lexicon_sentiment.score_corpus). Devuelve una copia ordenada por debate y
+    posición con las columnas position (orden en el debate, común a todos los
+    oradores), rolling_mean, ewma, volatility, level y change_point.
+    """
+    order = [name for name in order if name in frame.columns]
+    frame = frame.sort_values(['debate', *order], kind='stable').reset_index(drop=True)
+    frame['position'] = frame.groupby('debate', sort=False, observed=True).cumcount()
+
+    values = frame[value].to_numpy(dtype=np.float64)
+    columns = {name: np.full(len(frame), np.nan) for name in SERIES_COLUMNS}
+    change = np.zeros(len(frame), dtype=bool)
+    groups = frame.groupby(['debate', 'speaker'], sort=False, observed=True).indices
+    for rows in groups.values():
+        series = analyze_series(values[rows], window, span, penalty, min_size, method)
+        for name in SERIES_COLUMNS:
+            columns[name][rows] = series[name]
+        change[rows] = series['change_point']
+
+    for name in SERIES_COLUMNS:
+        frame[name] = columns[name]
+    frame['change_point'] = change
+    return frame
+
+
+def speaker_series(frame, debate, speaker):
+    """Filas de un orador en un debate (en orden de posición)."""
+    return frame[(frame['debate'] == debate) & (frame['speaker'] == speaker)]
+
+
+def align(frame, column='ewma', debate=None, speakers=None):
+    """DataFrame posición x orador con el último valor de cada orador en cada posición.
+
+    frame: salida de timeline. Antes de la primera intervención de un orador
+    el valor es NaN. Con varios debates en frame hay que indicar debate.
+    """
+    if debate is not None:
+        frame = frame[frame['debate'] == debate]
+    if speakers is None:
+        speakers = list(dict.fromkeys(frame['speaker']))
+    positions = frame['position'].to_numpy()
+    grid = np.arange(positions.max() + 1 if len(positions) else 0)
+    values = frame[column].to_numpy(dtype=np.float64)
+    speaker_column = frame['speaker'].to_numpy()
+
+    aligned = {}
+    for speaker in speakers:
+        mask = speaker_column == speaker
+        own_positions, own_values = positions[mask], values[mask]
+        last = np.searchsorted(own_positions, grid, side='right') - 1
+        aligned[speaker] = np.where(last >= 0, own_values[np.maximum(last, 0)] if len(own_values) else np.nan,
+                                    np.nan)
+    return pd.DataFrame(aligned, index=pd.Index(grid, name='position'))
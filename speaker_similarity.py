@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Matrices de similitud entre todas las unidades (debate, orador).
+
+Los centroides de los embeddings de cada unidad se calculan una sola vez (un
+producto con una matriz dispersa de pertenencia) y se normalizan; la
+similitud coseno de todos los pares es entonces un único producto de
+matrices. La diferencia de sentimiento y el solapamiento léxico (Jaccard de
+los vocabularios, con una matriz dispersa binaria unidad x término) también se
+calculan para todos los pares a la vez. Cada métrica se devuelve como un
+DataFrame cuadrado con índice (debate, orador) en filas y columnas.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+METRICS = ('semantic_similarity', 'sentiment_diff', 'lexical_overlap')
+
+
+def membership(owner, n_units):
+    """Matriz dispersa (n_units, n_filas) con 1/len(unidad) en las filas de cada unidad."""
+    owner = np.asarray(owner, dtype=np.int64)
+    counts = np.bincount(owner, minlength=n_units)
+    weights = 1.0 / counts[owner]
+    return csr_matrix((weights, (owner, np.arange(len(owner)))), shape=(n_units, len(owner)))
+
+
+def centroids(embeddings, owner, n_units):
+    """Centroides normalizados (L2) de las filas de embeddings agrupadas por unidad."""
+    means = np.asarray(membership(owner, n_units) @ np.asarray(embeddings, dtype=np.float64))
+    norms = np.linalg.norm(means, axis=1, keepdims=True)
+    return means / np.where(norms > 0, norms, 1.0)
+
+
+def cosine_matrix(normalized):
+    return normalized @ normalized.T
+
+
+def delta_matrix(values):
+    """|v_i - v_j| para todos los pares."""
+    values = np.asarray(values, dtype=np.float64)
+    return np.abs(values[:, None] - values[None, :])
+
+
+def lexical_overlap(token_id_arrays, vocab_size=None):
+    """Jaccard de los vocabularios de todos los pares (intersecciones con un solo producto)."""
+    arrays = [np.unique(np.asarray(ids, dtype=np.int64)) for ids in token_id_arrays]
+    if vocab_size is None:
+        vocab_size = max((int(ids[-1]) + 1 for ids in arrays if len(ids)), default=0)
+    rows = np.repeat(np.arange(len(arrays)), [len(ids) for ids in arrays])
+    cols = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+    presence = csr_matrix((np.ones(len(cols)), (rows, cols)), shape=(len(arrays), vocab_size))
+
+    intersection = (presence @ presence.T).toarray()
+    sizes = np.diag(intersection)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+
+def similarity_frames(labels, embeddings=None, owner=None, sentiment=None, token_id_arrays=None,
+                      vocab_size=None):
+    """Dict métrica -> DataFrame (unidades x unidades) con índice (debate, orador).
+
+    labels: lista de (debate, orador); owner indica la unidad de cada fila de
+    embeddings. Las métricas cuyos datos no se pasan se omiten.
+    """
+    index = pd.MultiIndex.from_tuples(labels, names=['debate', 'speaker'])
+    matrices = {}
+    if embeddings is not None:
+        matrices['semantic_similarity'] = cosine_matrix(centroids(embeddings, owner, len(labels)))
+    if sentiment is not None:
+        matrices['sentiment_diff'] = delta_matrix(sentiment)
+    if token_id_arrays is not None:
+        matrices['lexical_overlap'] = lexical_overlap(token_id_arrays, vocab_size)
+    return {name: pd.DataFrame(matrix, index=index, columns=index) for name, matrix in matrices.items()}
+
+
+def pairs(frames):
+    """Tabla larga con una fila por par de unidades distintas (i < j) y una columna por métrica."""
+    names = list(frames)
+    if not names:
+        return pd.DataFrame()
+    index = frames[names[0]].index
+    i, j = np.triu_indices(len(index), k=1)
+    table = pd.DataFrame({
+        'debate1': index.get_level_values('debate')[i],
+        'speaker1': index.get_level_values('speaker')[i],
+        'debate2': index.get_level_values('debate')[j],
+        'speaker2': index.get_level_values('speaker')[j],
+    })
+    for name in names:
+        table[name] = frames[name].to_numpy()[i, j]
+    return table
@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+"""Modo en vivo: métricas que se actualizan turno a turno.
+
+La transcripción se lee por fragmentos (un archivo que sigue creciendo o la
+entrada estándar) y un parser incremental emite cada turno cuando aparece el
+encabezado del siguiente. Por cada turno solo se procesa su texto: se suman
+sus frecuencias de palabras y n-gramas a las del orador, se avanza el estado
+de MTLD y se añade su sentimiento a las medias acumuladas. El costo por turno
+depende del turno y del vocabulario, no de todo lo transcrito hasta entonces.
+
+Un turno se completa cuando aparece el encabezado del siguiente orador, así
+que quien habla varios minutos seguidos no actualizaría nada hasta entonces.
+Con `follow(..., idle=s)` (opción --idle del CLI, 5 s por defecto), tras s
+segundos sin datos nuevos se emiten las líneas completas del turno abierto
+como actualización parcial; el resto del turno llega después con el mismo
+número de turno y se suma a él (no cuenta como un turno nuevo). Desde la
+entrada estándar no hay espera por inactividad: cada línea es un fragmento.
+
+El MTLD en vivo es el de la pasada hacia adelante (la pasada hacia atrás
+cambia con cada token nuevo); `lexical_diversity.mtld` da el valor completo
+al terminar.
+
+Uso desde la línea de comandos:
+    python streaming.py [--speakers TRUMP,BIDEN] [--follow no] [--bert yes] [--idle 5] debate.txt|-
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from keyness import keyness, top_k
+from lexical_diversity import DEFAULT_TTR_THRESHOLD
+from ngrams import pack, unpack
+from transcript_index import SPEAKER_PATTERN, normalize_speaker
+
+# Bits por id en las claves de n-gramas: fijos para que no cambien al crecer
+# el vocabulario (3 x 21 <= 64)
+STREAM_BITS = 21
+
+# Métricas de keyness cuyo valor para (B, A) es el de (A, B) por este signo
+REVERSIBLE_METRICS = {'log_likelihood': 1.0, 'chi_square': 1.0, 'log_ratio': -1.0}
+
+
+class TurnParser:
+    """Parser incremental de turnos 'ORADOR: texto'.
+
+    Solo se buscan encabezados en líneas completas, así un nombre partido entre
+    dos fragmentos no se pierde. El texto anterior al primer encabezado se
+    descarta, igual que en TranscriptIndex.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.turn = 0
+        # Caracteres del turno abierto ya emitidos por partial()
+        self.emitted = 0
+
+    def feed(self, chunk):
+        """[(número de turno, orador, texto)] de los turnos que el fragmento completa."""
+        self.buffer += chunk
+        complete = self.buffer.rfind('\n') + 1
+        headers = list(SPEAKER_PATTERN.finditer(self.buffer, 0, complete))
+        if not headers:
+            if complete and not SPEAKER_PATTERN.match(self.buffer):
+                self.buffer = self.buffer[complete:]
+            return []
+        turns = [self._turn(match, headers[i + 1].start()) for i, match in enumerate(headers[:-1])]
+        self.buffer = self.buffer[headers[-1].start():]
+        return [turn for turn in turns if turn is not None]
+
+    def flush(self):
+        """Emite el último turno pendiente (al terminar la entrada)."""
+        match = SPEAKER_PATTERN.match(self.buffer)
+        turns = [self._turn(match, len(self.buffer))] if match else []
+        self.buffer = ''
+        return [turn for turn in turns if turn is not None]
+
+    def partial(self):
+        """[(turno, orador, texto)] con las líneas completas del turno abierto aún no emitidas.
+
+        El turno sigue abierto: lo que falte se emite con el mismo número de turno.
+        """
+        match = SPEAKER_PATTERN.match(self.buffer)
+        complete = self.buffer.rfind('\n') + 1
+        if not match or complete <= match.end() + self.emitted:
+            return []
+        text = self.buffer[match.end() + self.emitted:complete].strip()
+        self.emitted = complete - match.end()
+        return [(self.turn, normalize_speaker(match.group(1)), text)] if text else []
+
+    def _turn(self, match, end):
+        # Solo el turno abierto (al inicio del búfer) puede tener texto ya emitido;
+        # si partial() ya emitió todo, el turno se cierra sin otra actualización
+        text = self.buffer[match.end() + self.emitted:end].strip()
+        turn = (self.turn, normalize_speaker(match.group(1)), text) if text or not self.emitted else None
+        self.turn += 1
+        self.emitted = 0
+        return turn
+
+
+def follow(path, poll=0.5, keep_following=True, idle=None):
+    """Fragmentos nuevos de un archivo ('-' = entrada estándar) a medida que se escriben.
+
+    Con idle, tras idle segundos sin datos nuevos se produce un fragmento vacío
+    (una vez por pausa): StreamingAnalyzer.run emite entonces el turno abierto.
+    """
+    if path == '-':
+        for line in sys.stdin:
+            yield line
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        waited, signaled = 0.0, False
+        while True:
+            chunk = f.read()
+            if chunk:
+                waited, signaled = 0.0, False
+                yield chunk
+            elif not keep_following:
+                return
+            else:
+                time.sleep(poll)
+                waited += poll
+                if idle is not None and waited >= idle and not signaled:
+                    signaled = True
+                    yield ''
+
+
+class ForwardMTLD:
+    """Estado de la pasada hacia adelante de MTLD, avanzable token a token."""
+
+    def __init__(self, threshold=DEFAULT_TTR_THRESHOLD):
+        self.threshold = threshold
+        self.factors = 0
+        self.tokens = 0
+        self.token_count = 0
+        self.types = set()
+
+    def update(self, ids):
+        threshold = self.threshold
+        types = self.types
+        token_count = self.token_count
+        for token in ids.tolist():
+            token_count += 1
+            types.add(token)
+            if len(types) / token_count <= threshold:
+                self.factors += 1
+                token_count = 0
+                types.clear()
+        self.token_count = token_count
+        self.tokens += len(ids)
+
+    @property
+    def value(self):
+        factors = self.factors
+        if self.token_count:
+            factors += (1 - len(self.types) / self.token_count) / (1 - self.threshold)
+        return self.tokens / factors if factors else 0.0
+
+
+class RunningTop:
+    """Los k términos con más conteo, actualizados solo con los términos de cada turno.
+
+    Los conteos solo crecen, así que un término fuera del top solo puede
+    entrar cuando aparece en el turno actual: basta compararlo con el menor
+    del top (exacto salvo el orden entre empates).
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.items = {}
+
+    def update(self, terms, totals):
+        """terms: términos del turno; totals: su conteo acumulado tras el turno."""
+        items = self.items
+        low = None
+        for term, total in zip(terms, totals):
+            if term in items:
+                items[term] = total
+                if term == low:
+                    low = None
+            elif len(items) < self.k:
+                items[term] = total
+            else:
+                if low is None:
+                    low = min(items, key=items.get)
+                if total > items[low]:
+                    del items[low]
+                    items[term] = total
+                    low = None
+
+    def most_common(self, k=None):
+        return sorted(self.items.items(), key=lambda item: -item[1])[:k]
+
+
+class SpeakerState:
+    """Acumuladores de un orador: frecuencias, n-gramas, MTLD y sentimiento.
+
+    Las palabras y n-gramas más frecuentes (top_n) se mantienen con cada
+    turno, así que consultarlos no recorre todo el vocabulario del orador.
+    """
+
+    def __init__(self, threshold=DEFAULT_TTR_THRESHOLD, top_n=10):
+        self.turns = 0
+        self.tokens = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.ngrams = {2: {}, 3: {}}
+        self.top = {1: RunningTop(top_n), 2: RunningTop(top_n), 3: RunningTop(top_n)}
+        self.mtld = ForwardMTLD(threshold)
+        self.sentiment_sums = {}
+
+    def add(self, ids, sentiment, new_turn=True):
+        """Suma un turno (o, con new_turn=False, otra parte del último turno)."""
+        self.turns += int(new_turn)
+        self.tokens += len(ids)
+        if len(ids):
+            terms, counts = np.unique(ids, return_counts=True)
+            size = int(terms[-1]) + 1
+            if size > len(self.counts):
+                # Capacidad duplicada: copiar los conteos es raro, no por turno
+                grown = np.zeros(max(size, 2 * len(self.counts)), dtype=np.int64)
+                grown[:len(self.counts)] = self.counts
+                self.counts = grown
+            self.counts[terms] += counts
+            self.top[1].update(terms.tolist(), self.counts[terms].tolist())
+        for n, table in self.ngrams.items():
+            keys, counts = np.unique(pack(ids, n, STREAM_BITS), return_counts=True)
+            keys = keys.tolist()
+            for key, count in zip(keys, counts.tolist()):
+                table[key] = table.get(key, 0) + count
+            self.top[n].update(keys, [table[key] for key in keys])
+        self.mtld.update(ids)
+        for name, value in sentiment.items():
+            self.sentiment_sums[name] = self.sentiment_sums.get(name, 0.0) + value
+
+    def top_words(self, k, vocabulary):
+        if k > self.top[1].k:
+            best = top_k(self.counts, k)
+            return [(vocabulary[i], int(self.counts[i])) for i in best if self.counts[i] > 0]
+        return [(vocabulary[i], count) for i, count in self.top[1].most_common(k)]
+
+    def top_ngrams(self, n, k, vocabulary):
+        table = self.ngrams[n]
+        if not table:
+            return []
+        if k > self.top[n].k:
+            keys = np.fromiter(table.keys(), dtype=np.uint64, count=len(table))
+            counts = np.fromiter(table.values(), dtype=np.int64, count=len(table))
+            best = top_k(counts, k)
+            keys, counts = keys[best], counts[best].tolist()
+        else:
+            best = self.top[n].most_common(k)
+            keys = np.array([key for key, _ in best], dtype=np.uint64)
+            counts = [count for _, count in best]
+        return [(' '.join(vocabulary[i] for i in gram), int(count))
+                for gram, count in zip(unpack(keys, n, STREAM_BITS), counts)]
+
+    def averages(self):
+        return {f'avg_{name}': total / self.turns for name, total in self.sentiment_sums.items()}
+
+
+class StreamingAnalyzer:
+    """Actualiza las métricas por orador con cada turno y devuelve una instantánea.
+
+    sentiment: funciones nombre -> f(texto) -> valor, promediadas por orador
+    (por defecto el compound de VADER; ver `bert_sentiment`).
+    """
+
+    def __init__(self, speakers=None, top_n=10, sentiment=None, threshold=DEFAULT_TTR_THRESHOLD,
+                 keyness_metric='log_likelihood'):
+        self.speakers = set(speakers) if speakers else None
+        self.top_n = top_n
+        self.sentiment = sentiment if sentiment is not None else {'vader': vader_compound}
+        self.threshold = threshold
+        self.keyness_metric = keyness_metric
+        self.parser = TurnParser()
+        self.states = {}
+        self._summaries = {}
+        self._keyness = {}
+        # (turno, texto acumulado, puntajes) del último turno, por si llega en partes
+        self._open = None
+        # Matriz orador x término de conteos, actualizada con cada turno (capacidad
+        # duplicada al crecer); _width es el mayor id visto + 1
+        self._rows = {}
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+        self._width = 0
+
+    def feed(self, chunk):
+        """Instantáneas de los turnos completados por el fragmento."""
+        return [self.update(*turn) for turn in self.parser.feed(chunk)
+                if self.speakers is None or turn[1] in self.speakers]
+
+    def flush(self):
+        return [self.update(*turn) for turn in self.parser.flush()
+                if self.speakers is None or turn[1] in self.speakers]
+
+    def partial(self):
+        """Instantáneas con lo recibido del turno abierto (tras una pausa, ver follow)."""
+        return [self.update(*turn) for turn in self.parser.partial()
+                if self.speakers is None or turn[1] in self.speakers]
+
+    def update(self, turn, speaker, text):
+        """Añade un turno y devuelve la instantánea actualizada con su latencia.
+
+        Si turn es el mismo número que la actualización anterior, text es la
+        continuación de ese turno: sus tokens se suman y el sentimiento del
+        turno se recalcula sobre el texto completo.
+        """
+        from token_cache import get_cache
+
+        start = time.perf_counter()
+        cache = get_cache()
+        ids = cache.tokens(text, content_only=True)
+        continued = self._open is not None and self._open[0] == turn
+        previous, previous_scores = (self._open[1], self._open[2]) if continued else ('', {})
+        text = f'{previous} {text}'.strip()
+        scores = {name: float(fn(text)) for name, fn in self.sentiment.items()} if text else {}
+        self._open = (turn, text, scores)
+
+        state = self.states.setdefault(speaker, SpeakerState(self.threshold, self.top_n))
+        state.add(ids, {name: value - previous_scores.get(name, 0.0) for name, value in scores.items()},
+                  new_turn=not continued)
+        self._add_counts(speaker, ids)
+        vocabulary = cache.vocabulary.words
+
+        # Solo se recalculan el resumen del orador que habló y sus pares de keyness
+        self._summaries[speaker] = {
+            'turns': state.turns,
+            'tokens': state.tokens,
+            'mtld_forward': state.mtld.value,
+            **state.averages(),
+            'words': state.top_words(self.top_n, vocabulary),
+            'bigrams': state.top_ngrams(2, self.top_n, vocabulary),
+            'trigrams': state.top_ngrams(3, self.top_n, vocabulary),
+        }
+        self._update_keyness(speaker, vocabulary)
+
+        return {
+            'turn': turn,
+            'speaker': speaker,
+            'text': text,
+            'turn_scores': scores,
+            'speakers': dict(self._summaries),
+            'keyness': dict(self._keyness),
+            'latency_ms': (time.perf_counter() - start) * 1000,
+        }
+
+    def _add_counts(self, speaker, ids):
+        row = self._rows.setdefault(speaker, len(self._rows))
+        rows, columns = self._counts.shape
+        width = int(ids.max()) + 1 if len(ids) else 0
+        if row >= rows or width > columns:
+            grown = np.zeros((max(2 * rows, row + 1) if row >= rows else rows,
+                              max(2 * columns, width) if width > columns else columns), dtype=np.int64)
+            grown[:rows, :columns] = self._counts
+            self._counts = grown
+        if len(ids):
+            terms, counts = np.unique(ids, return_counts=True)
+            self._counts[row, terms] += counts
+            self._width = max(self._width, width)
+
+    def _update_keyness(self, speaker, vocabulary):
+        others = [s for s in self._rows if s != speaker]
+        if not others:
+            return
+        # Se refrescan ambos sentidos de los pares del orador que habló; el inverso
+        # (otro, orador) sale de los mismos puntajes con direction < 0 si la métrica
+        # es simétrica o cambia de signo, y si no se calcula con sus propios pares
+        forward = [(speaker, other) for other in others]
+        backward = [(other, speaker) for other in others]
+        sign = REVERSIBLE_METRICS.get(self.keyness_metric)
+        names = forward if sign else forward + backward
+        pairs = np.array([(self._rows[a], self._rows[b]) for a, b in names], dtype=np.int64)
+        scores = keyness(self._counts[:len(self._rows), :self._width], pairs)
+        values, direction = scores[self.keyness_metric], scores['direction']
+        if sign:
+            values = np.concatenate([values, sign * values])
+            direction = np.concatenate([direction, -direction])
+        # Términos clave del objetivo frente a la referencia (más frecuentes en el objetivo)
+        ranked = np.where(direction > 0, values, -np.inf)
+        best = top_k(ranked, self.top_n)
+        for p, pair in enumerate(forward + backward):
+            self._keyness[pair] = [
+                (vocabulary[i], float(values[p, i]))
+                for i in best[p] if np.isfinite(ranked[p, i])
+            ]
+
+    def run(self, chunks):
+        """Instantánea por turno de una secuencia de fragmentos (p. ej. follow(path)).
+
+        Un fragmento vacío (pausa en follow con idle) emite el turno abierto.
+        """
+        for chunk in chunks:
+            yield from self.feed(chunk) if chunk else self.partial()
+        yield from self.flush()
+
+
+def vader_compound(text):
+    from lexicon_sentiment import get_scorer
+    return get_scorer().score_documents([text])['compound'][0]
+
+
+def bert_sentiment(name='cardiffnlp/twitter-roberta-base-sentiment'):
+    """Función texto -> confianza de la etiqueta ganadora del modelo (por ventanas, como v2)."""
+    from model_registry import registry
+    from sentiment import score_segments
+
+    def score(text):
+        analyzer = registry.get('sentiment', name)
+        return score_segments(analyzer.model, analyzer.tokenizer, [text])['scores'][0]
+    return score
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'--speakers': None, '--follow': 'yes', '--bert': 'no', '--top': '10', '--idle': '5'}
+    while args and args[0] in options and len(args) > 1:
+        options[args[0]] = args[1]
+        args = args[2:]
+    if len(args) != 1:
+        print(__doc__)
+        sys.exit(1)
+
+    sentiment = {'vader': vader_compound}
+    if options['--bert'] == 'yes':
+        sentiment['bert'] = bert_sentiment()
+    analyzer = StreamingAnalyzer(
+        speakers=options['--speakers'].split(',') if options['--speakers'] else None,
+        top_n=int(options['--top']),
+        sentiment=sentiment,
+    )
+    try:
+        for snapshot in analyzer.run(follow(args[0], keep_following=options['--follow'] == 'yes',
+                                                  idle=float(options['--idle']) or None)):
+            summary = snapshot['speakers'][snapshot['speaker']]
+            averages = '  '.join(f"{k}={v:+.3f}" for k, v in summary.items() if k.startswith('avg_'))
+            words = ', '.join(word for word, _ in summary['words'][:5])
+            print(f"[{snapshot['turn']:4d}] {snapshot['speaker']:<10} {snapshot['latency_ms']:7.1f} ms  "
+                  f"tokens={summary['tokens']:<6d} mtld={summary['mtld_forward']:.1f}  {averages}  | {words}")
+    except KeyboardInterrupt:
+        pass
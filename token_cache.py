@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""Caché de tokenización y segmentación en oraciones.
+
+Cada texto se tokeniza una sola vez: la entrada se indexa por el hash del
+contenido más la configuración del tokenizador y guarda los tokens como ids
+enteros de un vocabulario compartido, junto con los límites de cada oración.
+La caché expulsa entradas (LRU) al superar su presupuesto de memoria y puede
+persistir en disco para reutilizarse entre ejecuciones.
+
+Los ids dependen del orden en que cada proceso ve las palabras, así que en
+disco cada entrada guarda sus propias palabras (las distintas del texto) y
+los tokens como índices a esa lista; al cargarla se traducen al vocabulario
+del proceso. Varios procesos pueden compartir el mismo cache_dir: cada
+archivo se escribe en uno temporal y se renombra de forma atómica.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _nltk_sentences(text, language):
+    from nltk.tokenize import sent_tokenize
+    return sent_tokenize(text, language=language)
+
+
+def _nltk_words(sentence, language):
+    from nltk.tokenize import word_tokenize
+    # La oración ya viene segmentada; evitar que word_tokenize la vuelva a dividir
+    return word_tokenize(sentence, language=language, preserve_line=True)
+
+
+class Vocabulary:
+    """Vocabulario compartido token <-> id (solo crece, los ids son estables)."""
+
+    def __init__(self, words=()):
+        self.words = []
+        self.ids = {}
+        self._masks = {}
+        for word in words:
+            self.add(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def add(self, word):
+        word_id = self.ids.get(word)
+        if word_id is None:
+            word_id = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return word_id
+
+    def encode(self, tokens):
+        return np.fromiter((self.add(t) for t in tokens), dtype=np.int32)
+
+    def decode(self, ids):
+        words = self.words
+        return [words[i] for i in ids]
+
+    def content_mask(self, stop_words):
+        """Máscara booleana por id: alfanumérico y no stopword (stop_words: frozenset)."""
+        mask = self._masks.get(stop_words)
+        if mask is None or len(mask) < len(self.words):
+            done = 0 if mask is None else len(mask)
+            tail = np.fromiter(
+                (w.isalnum() and w not in stop_words for w in self.words[done:]),
+                dtype=bool, count=len(self.words) - done,
+            )
+            mask = tail if mask is None else np.concatenate([mask, tail])
+            self._masks[stop_words] = mask
+        return mask
+
+
+class TokenizedText:
+    """Tokens (ids) de un texto y la partición en oraciones."""
+
+    __slots__ = ('tokens', 'sentence_bounds', 'sentence_spans')
+
+    def __init__(self, tokens, sentence_bounds, sentence_spans):
+        # tokens[sentence_bounds[i]:sentence_bounds[i + 1]] son los tokens de la oración i
+        self.tokens = tokens
+        self.sentence_bounds = sentence_bounds
+        # Desplazamientos (inicio, fin) de cada oración en el texto original
+        self.sentence_spans = sentence_spans
+
+    @property
+    def nbytes(self):
+        return self.tokens.nbytes + self.sentence_bounds.nbytes + self.sentence_spans.nbytes
+
+    @property
+    def n_sentences(self):
+        return len(self.sentence_spans)
+
+    def sentences(self, text):
+        return [text[start:end] for start, end in self.sentence_spans]
+
+
+class TokenCache:
+    """Caché LRU de textos tokenizados, con persistencia opcional en disco.
+
+    read_only=True lee las entradas guardadas en cache_dir pero no escribe
+    (así la usan los procesos del scheduler).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=None,
+                 sentence_splitter=_nltk_sentences, word_tokenizer=_nltk_words, read_only=False):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.read_only = read_only
+        self.sentence_splitter = sentence_splitter
+        self.word_tokenizer = word_tokenizer
+        self.vocabulary = Vocabulary()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._stop_words = {}
+
+        if cache_dir and not read_only:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def settings(self, lower=True, language='english'):
+        """Descripción del segmentador y el tokenizador (entra en las claves de caché)."""
+        splitter = getattr(self.sentence_splitter, '__name__', repr(self.sentence_splitter))
+        tokenizer = getattr(self.word_tokenizer, '__name__', repr(self.word_tokenizer))
+        return f'{splitter}|{tokenizer}|{language}|lower={lower}'
+
+    def key(self, text, lower=True, language='english'):
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        settings = hashlib.sha1(self.settings(lower, language).encode('utf-8')).hexdigest()[:12]
+        return f'{digest}-{settings}'
+
+    def get(self, text, lower=True, language='english'):
+        """Entrada tokenizada del texto; solo tokeniza si no está en caché."""
+        key = self.key(text, lower, language)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            entry = self._tokenize(text, lower, language)
+            self._save(key, entry)
+        else:
+            self.hits += 1
+        self._insert(key, entry)
+        return entry
+
+    def _tokenize(self, text, lower, language):
+        tokens = []
+        bounds = [0]
+        spans = []
+        position = 0
+        for sentence in self.sentence_splitter(text, language):
+            # Punkt devuelve fragmentos literales del texto: recuperamos su posición
+            start = text.find(sentence, position)
+            if start < 0:
+                start = position
+            end = start + len(sentence)
+            position = end
+            spans.append((start, end))
+
+            words = self.word_tokenizer(sentence, language)
+            if lower:
+                words = [w.lower() for w in words]
+            tokens.extend(words)
+            bounds.append(len(tokens))
+
+        return TokenizedText(
+            self.vocabulary.encode(tokens),
+            np.asarray(bounds, dtype=np.int32),
+            np.asarray(spans, dtype=np.int64).reshape(-1, 2),
+        )
+
+    def _insert(self, key, entry):
+        self._entries[key] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+    # --- Persistencia -----------------------------------------------------
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.npz')
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._entry_path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            # Entradas del formato anterior (ids de un vocabulario global): se ignoran
+            if 'words' not in data.files:
+                return None
+            local = self.vocabulary.encode(data['words'].tolist())
+            tokens = local[data['tokens']] if len(local) else np.zeros(0, dtype=np.int32)
+            return TokenizedText(tokens, data['sentence_bounds'], data['sentence_spans'])
+
+    def _save(self, key, entry):
+        if not self.cache_dir or self.read_only:
+            return
+        # Palabras propias de la entrada; los tokens se guardan como índices a ellas
+        unique, inverse = np.unique(entry.tokens, return_inverse=True)
+        words = np.array(self.vocabulary.decode(unique), dtype=str)
+        path = self._entry_path(key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez(f, words=words, tokens=inverse.astype(np.int32),
+                     sentence_bounds=entry.sentence_bounds, sentence_spans=entry.sentence_spans)
+        os.replace(temporary, path)
+
+    # --- Vistas habituales ------------------------------------------------
+
+    def stop_words(self, language='english'):
+        if language not in self._stop_words:
+            from nltk.corpus import stopwords
+            self._stop_words[language] = frozenset(stopwords.words(language))
+        return self._stop_words[language]
+
+    def tokens(self, text, content_only=False, language='english'):
+        """Ids de los tokens en minúsculas (opcionalmente sin stopwords ni puntuación)."""
+        ids = self.get(text, lower=True, language=language).tokens
+        if content_only:
+            ids = ids[self.vocabulary.content_mask(self.stop_words(language))[ids]]
+        return ids
+
+    def words(self, text, content_only=False, language='english'):
+        return self.vocabulary.decode(self.tokens(text, content_only, language))
+
+    def sentences(self, text, language='english'):
+        return self.get(text, lower=True, language=language).sentences(text)
+
+
+_default_cache = None
+
+
+def get_cache():
+    """Caché compartida por todo el proceso."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TokenCache(cache_dir=os.environ.get('DEBATES_TOKEN_CACHE'))
+    return _default_cache
+
+
+def configure(max_bytes=DEFAULT_MAX_BYTES, cache_dir=None, **kwargs):
+    """Reemplaza la caché compartida (p. ej. para activar la persistencia en disco)."""
+    global _default_cache
+    _default_cache = TokenCache(max_bytes=max_bytes, cache_dir=cache_dir, **kwargs)
+    return _default_cache
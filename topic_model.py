@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Modelo LDA único sobre los turnos de todos los oradores y debates.
+
+Cada turno es un documento. El diccionario de gensim y el corpus bag-of-words
+se construyen recorriendo los turnos bajo demanda (nunca como listas en
+memoria): `TurnTexts` vuelve a leer los intervalos del índice de turnos en
+cada pasada. Se entrena un solo LdaMulticore; las mezclas de temas por
+(debate, orador) se infieren después con ese modelo, promediando las de sus
+turnos ponderadas por número de tokens.
+
+Con transcripciones nuevas, `update` continúa el entrenamiento en línea con
+el mismo diccionario (las palabras nuevas se ignoran hasta volver a ajustar).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class TurnTexts:
+    """Textos de los turnos de un DebateCorpus, recorribles varias veces."""
+
+    def __init__(self, corpus, debates=None, speakers=None):
+        self.corpus = corpus
+        self.rows = corpus.select(debates, speakers)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        for row in self.rows:
+            yield self.corpus.turn_text(row)
+
+
+class Documents:
+    """Palabras de contenido de cada texto (del caché de tokens), bajo demanda."""
+
+    def __init__(self, texts):
+        self.texts = texts
+
+    def __iter__(self):
+        from token_cache import get_cache
+
+        cache = get_cache()
+        for text in self.texts:
+            yield cache.words(text, content_only=True)
+
+
+class BowCorpus:
+    """Corpus bag-of-words de gensim sobre Documents, sin materializarlo."""
+
+    def __init__(self, documents, dictionary):
+        self.documents = documents
+        self.dictionary = dictionary
+
+    def __iter__(self):
+        for words in self.documents:
+            yield self.dictionary.doc2bow(words)
+
+
+def _turn_selection(corpus, speakers_by_debate):
+    """Un TurnTexts por debate con sus oradores (todos los turnos si es None)."""
+    if speakers_by_debate is None:
+        return [TurnTexts(corpus)]
+    return [TurnTexts(corpus, debate, speakers) for debate, speakers in speakers_by_debate.items()]
+
+
+class Chain:
+    """Concatena varias colecciones recorribles."""
+
+    def __init__(self, parts):
+        self.parts = list(parts)
+
+    def __len__(self):
+        return sum(len(part) for part in self.parts)
+
+    def __iter__(self):
+        for part in self.parts:
+            yield from part
+
+
+class SegmentLDA:
+    """LDA entrenado una vez sobre segmentos (turnos u oraciones) con diccionario compartido."""
+
+    def __init__(self, num_topics=10, workers=None, passes=10, chunksize=2000, no_below=2,
+                 no_above=0.5, random_state=42):
+        self.num_topics = num_topics
+        # None = núcleos - 1 (el valor por defecto de gensim)
+        self.workers = workers
+        self.passes = passes
+        self.chunksize = chunksize
+        self.no_below = no_below
+        self.no_above = no_above
+        self.random_state = random_state
+        self.dictionary = None
+        self.model = None
+
+    def fit_texts(self, texts):
+        """Ajusta diccionario y modelo sobre una colección recorrible de textos."""
+        from gensim import corpora
+        from gensim.models import LdaMulticore
+
+        documents = Documents(texts)
+        self.dictionary = corpora.Dictionary(documents)
+        self.dictionary.filter_extremes(no_below=self.no_below, no_above=self.no_above, keep_n=None)
+        self.model = LdaMulticore(
+            corpus=BowCorpus(documents, self.dictionary),
+            id2word=self.dictionary,
+            num_topics=self.num_topics,
+            workers=self.workers,
+            passes=self.passes,
+            chunksize=self.chunksize,
+            random_state=self.random_state,
+        )
+        return self
+
+    def fit(self, corpus, speakers_by_debate=None):
+        """Ajusta sobre los turnos de un DebateCorpus (dict debate -> oradores, o todos)."""
+        return self.fit_texts(Chain(_turn_selection(corpus, speakers_by_debate)))
+
+    def update_texts(self, texts, passes=None):
+        """Entrenamiento en línea con textos nuevos (mismo diccionario)."""
+        if self.model is None:
+            return self.fit_texts(texts)
+        self.model.passes = passes or self.passes
+        self.model.update(BowCorpus(Documents(texts), self.dictionary))
+        return self
+
+    def update(self, corpus, speakers_by_debate=None, passes=None):
+        return self.update_texts(Chain(_turn_selection(corpus, speakers_by_debate)), passes)
+
+    def topics(self, num_words=10):
+        """[(id, 'peso*"palabra" + ...')], como LdaModel.print_topics."""
+        return self.model.print_topics(-1, num_words=num_words)
+
+    def infer(self, texts):
+        """Matriz (textos, temas) con la distribución de temas de cada texto y los tokens usados."""
+        bows = list(BowCorpus(Documents(texts), self.dictionary))
+        if not bows:
+            return np.zeros((0, self.num_topics)), np.zeros(0, dtype=np.int64)
+        gamma, _ = self.model.inference(bows)
+        theta = gamma / gamma.sum(axis=1, keepdims=True)
+        lengths = np.array([sum(count for _, count in bow) for bow in bows], dtype=np.int64)
+        return theta, lengths
+
+    def mixtures(self, corpus, speakers_by_debate):
+        """DataFrame (debate, orador) x tema: media de sus turnos ponderada por tokens."""
+        labels, thetas = [], []
+        for debate, speakers in speakers_by_debate.items():
+            for speaker in speakers:
+                theta, lengths = self.infer(TurnTexts(corpus, debate, speaker))
+                if lengths.sum() == 0:
+                    continue
+                labels.append((debate, speaker))
+                thetas.append(np.average(theta, axis=0, weights=lengths))
+        index = pd.MultiIndex.from_tuples(labels, names=['debate', 'speaker'])
+        return pd.DataFrame(np.array(thetas).reshape(len(labels), self.num_topics), index=index)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.model.save(path)
+
+    @classmethod
+    def load(cls, path):
+        from gensim.models import LdaMulticore
+
+        model = LdaMulticore.load(path)
+        lda = cls(num_topics=model.num_topics, passes=model.passes, chunksize=model.chunksize)
+        lda.model = model
+        lda.dictionary = model.id2word
+        return lda
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""Índice de turnos para las transcripciones de los debates.
+
+La transcripción se lee y se recorre una sola vez; cada turno se guarda como
+un intervalo (inicio, fin) sobre el texto original, de modo que los análisis
+pueden consultar por orador, rango de turnos o debate sin copiar texto hasta
+que realmente lo necesitan.
+"""
+
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+# Encabezado de turno: nombre en mayúsculas al inicio de línea seguido de ':'
+SPEAKER_PATTERN = re.compile(r'^([A-Z][A-Z ]*[A-Z]|[A-Z]):[ \t]*', re.MULTILINE)
+TOKEN_PATTERN = re.compile(r'\S+')
+
+TURN_DTYPE = np.dtype([
+    ('speaker', np.int32),
+    ('turn', np.int32),
+    ('start', np.int64),
+    ('end', np.int64),
+    ('n_tokens', np.int32),
+])
+
+
+def normalize_speaker(label):
+    """'PRESIDENT TRUMP' -> 'TRUMP', 'LINDSEY DAVIS' -> 'DAVIS'."""
+    return label.split()[-1]
+
+
+class TranscriptIndex:
+    """Índice compacto de los turnos de una transcripción."""
+
+    def __init__(self, text, name=None):
+        self.text = text
+        self.name = name
+        self.speakers = []
+        self._speaker_ids = {}
+
+        headers = list(SPEAKER_PATTERN.finditer(text))
+        turns = np.empty(len(headers), dtype=TURN_DTYPE)
+
+        for i, match in enumerate(headers):
+            start = match.end()
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+            # Recortar espacios moviendo los desplazamientos, no copiando el texto
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+
+            turns[i] = (
+                self._intern(normalize_speaker(match.group(1))),
+                i,
+                start,
+                end,
+                sum(1 for _ in TOKEN_PATTERN.finditer(text, start, end)),
+            )
+
+        self.turns = turns
+
+    @classmethod
+    def from_file(cls, file_path, name=None):
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return cls(file.read(), name=name or os.path.basename(file_path))
+
+    def _intern(self, speaker):
+        if speaker not in self._speaker_ids:
+            self._speaker_ids[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+        return self._speaker_ids[speaker]
+
+    def __len__(self):
+        return len(self.turns)
+
+    def speaker_id(self, speaker):
+        """Id del orador, o -1 si no aparece en la transcripción."""
+        return self._speaker_ids.get(speaker, -1)
+
+    def select(self, speakers=None, start=None, stop=None):
+        """Filas del índice para los oradores y el rango de turnos [start, stop)."""
+        turns = self.turns[start:stop]
+        if speakers is None:
+            return turns
+        if isinstance(speakers, str):
+            speakers = [speakers]
+        ids = [self.speaker_id(s) for s in speakers]
+        return turns[np.isin(turns['speaker'], ids)]
+
+    def turn_text(self, row):
+        """Texto de un turno (una fila del índice o su número)."""
+        if not isinstance(row, np.void):
+            row = self.turns[row]
+        return self.text[row['start']:row['end']]
+
+    def iter_texts(self, speakers=None, start=None, stop=None):
+        for row in self.select(speakers, start, stop):
+            yield self.text[row['start']:row['end']]
+
+    def speaker_text(self, speaker, sep=' '):
+        """Todo el discurso de un orador, unido en una sola pasada."""
+        return sep.join(self.iter_texts(speaker))
+
+    def speaker_texts(self, speakers, sep=' '):
+        return {speaker: self.speaker_text(speaker, sep) for speaker in speakers}
+
+    def token_counts(self):
+        """Total de tokens por orador."""
+        totals = np.bincount(self.turns['speaker'], weights=self.turns['n_tokens'],
+                             minlength=len(self.speakers))
+        return {speaker: int(totals[i]) for i, speaker in enumerate(self.speakers)}
+
+
+class DebateCorpus:
+    """Conjunto de transcripciones con ids de orador compartidos entre debates."""
+
+    def __init__(self, indexes=()):
+        self.debates = []
+        self.indexes = []
+        self.speakers = []
+        self._speaker_ids = {}
+        self._debate_ids = {}
+        self.turns = np.empty(0, dtype=self._corpus_dtype())
+        for index in indexes:
+            self.add(index)
+
+    @staticmethod
+    def _corpus_dtype():
+        return np.dtype([('debate', np.int32)] + TURN_DTYPE.descr)
+
+    @classmethod
+    def from_files(cls, file_paths):
+        return cls(load_transcript(path) for path in file_paths)
+
+    def add(self, index, name=None):
+        name = name or index.name or f'debate{len(self.debates) + 1}'
+        self._debate_ids[name] = len(self.debates)
+        self.debates.append(name)
+        self.indexes.append(index)
+
+        for speaker in index.speakers:
+            if speaker not in self._speaker_ids:
+                self._speaker_ids[speaker] = len(self.speakers)
+                self.speakers.append(speaker)
+        remap = np.array([self._speaker_ids[s] for s in index.speakers], dtype=np.int32)
+
+        rows = np.empty(len(index), dtype=self._corpus_dtype())
+        rows['debate'] = self._debate_ids[name]
+        for field in TURN_DTYPE.names:
+            rows[field] = index.turns[field]
+        if len(rows):
+            rows['speaker'] = remap[index.turns['speaker']]
+        self.turns = np.concatenate([self.turns, rows])
+        return index
+
+    def __getitem__(self, debate):
+        return self.indexes[self._debate_ids[debate]]
+
+    def __len__(self):
+        return len(self.turns)
+
+    def select(self, debates=None, speakers=None, start=None, stop=None):
+        """Filas del índice global filtradas por debate, orador y rango de turnos."""
+        mask = np.ones(len(self.turns), dtype=bool)
+        if debates is not None:
+            if isinstance(debates, str):
+                debates = [debates]
+            mask &= np.isin(self.turns['debate'], [self._debate_ids.get(d, -1) for d in debates])
+        if speakers is not None:
+            if isinstance(speakers, str):
+                speakers = [speakers]
+            mask &= np.isin(self.turns['speaker'], [self._speaker_ids.get(s, -1) for s in speakers])
+        if start is not None:
+            mask &= self.turns['turn'] >= start
+        if stop is not None:
+            mask &= self.turns['turn'] < stop
+        return self.turns[mask]
+
+    def turn_text(self, row):
+        return self.indexes[row['debate']].text[row['start']:row['end']]
+
+    def iter_texts(self, debates=None, speakers=None, start=None, stop=None):
+        for row in self.select(debates, speakers, start, stop):
+            yield self.turn_text(row)
+
+
+@lru_cache(maxsize=32)
+def index_for_text(text):
+    """Índice memoizado por contenido: el mismo texto se recorre una sola vez."""
+    return TranscriptIndex(text)
+
+
+def load_transcript(file_path):
+    """Carga (una sola vez mientras el archivo no cambie) el índice de una transcripción."""
+    path = os.path.abspath(file_path)
+    return _load_transcript(path, os.path.getmtime(path))
+
+
+@lru_cache(maxsize=64)
+def _load_transcript(path, mtime):
+    return TranscriptIndex.from_file(path)